@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
-from config import DB_HOST, DB_USER, DB_NAME, DB_PORT, DB_PASS
+from config import settings
 from models import database
 from models.models import *
 
@@ -16,11 +16,11 @@ from models.models import *
 config = context.config
 
 section = config.config_ini_section
-config.set_section_option(section, "DB_HOST", DB_HOST)
-config.set_section_option(section, "DB_PORT", DB_PORT)
-config.set_section_option(section, "DB_USER", DB_USER)
-config.set_section_option(section, "DB_NAME", DB_NAME)
-config.set_section_option(section, "DB_PASS", DB_PASS)
+config.set_section_option(section, "DB_HOST", settings.db_host)
+config.set_section_option(section, "DB_PORT", str(settings.db_port))
+config.set_section_option(section, "DB_USER", settings.db_user)
+config.set_section_option(section, "DB_NAME", settings.db_name)
+config.set_section_option(section, "DB_PASS", settings.db_pass)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,26 @@
+"""added bookings start_time id index
+
+Revision ID: 1ecc56ba3f3a
+Revises: 58f0049c3ed2
+Create Date: 2026-10-17 16:05:41.902377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ecc56ba3f3a'
+down_revision: Union[str, None] = '58f0049c3ed2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bookings_start_time_id', 'bookings', ['start_time', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_start_time_id', table_name='bookings')
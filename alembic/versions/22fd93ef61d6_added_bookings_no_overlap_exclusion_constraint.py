@@ -0,0 +1,32 @@
+"""added bookings no overlap exclusion constraint
+
+Revision ID: 22fd93ef61d6
+Revises: 35a0fb5f4843
+Create Date: 2026-10-17 15:14:51.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22fd93ef61d6'
+down_revision: Union[str, None] = '35a0fb5f4843'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist is needed to mix the "=" operator on table_id with "&&" on ranges.
+    # Already overlapping bookings (if any) must be cleaned up before this migration.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap "
+        "EXCLUDE USING gist (table_id WITH =, tsrange(start_time, end_time) WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('bookings_no_overlap', 'bookings', type_='exclude')
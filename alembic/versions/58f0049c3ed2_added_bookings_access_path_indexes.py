@@ -0,0 +1,29 @@
+"""added bookings access path indexes
+
+Revision ID: 58f0049c3ed2
+Revises: 22fd93ef61d6
+Create Date: 2026-10-17 15:32:08.517320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '58f0049c3ed2'
+down_revision: Union[str, None] = '22fd93ef61d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bookings_user_id_end_time', 'bookings', ['user_id', 'end_time'], unique=False)
+    op.create_index('ix_bookings_table_id_end_time_start_time', 'bookings',
+                    ['table_id', 'end_time', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_table_id_end_time_start_time', table_name='bookings')
+    op.drop_index('ix_bookings_user_id_end_time', table_name='bookings')
@@ -0,0 +1,45 @@
+"""added waitlist table
+
+Revision ID: 9b3e4f7a2c15
+Revises: 1ecc56ba3f3a
+Create Date: 2026-10-17 19:12:08.514730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e4f7a2c15'
+down_revision: Union[str, None] = '1ecc56ba3f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'waitlist',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('table_type', sa.String(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(), server_default='waiting', nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('assigned_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_waitlist_waiting', 'waitlist', ['start_time', 'id'], unique=False,
+                    postgresql_where=sa.text("status = 'waiting'"))
+    op.create_index('ix_waitlist_user_id', 'waitlist', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_waitlist_user_id', table_name='waitlist')
+    op.drop_index('ix_waitlist_waiting', table_name='waitlist', postgresql_where=sa.text("status = 'waiting'"))
+    op.drop_table('waitlist')
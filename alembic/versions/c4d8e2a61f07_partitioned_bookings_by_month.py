@@ -0,0 +1,143 @@
+"""partitioned bookings by month
+
+Revision ID: c4d8e2a61f07
+Revises: 9b3e4f7a2c15
+Create Date: 2026-10-17 21:03:26.118904
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2a61f07'
+down_revision: Union[str, None] = '9b3e4f7a2c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции создаются на столько месяцев вперёд, дальше их создаёт workers.partitions
+MONTHS_AHEAD = 3
+
+BOOKING_COLUMNS = "id, start_time, end_time, user_id, table_id"
+NO_OVERLAP = "EXCLUDE USING gist (table_id WITH =, tsrange(start_time, end_time) WITH &&)"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_booking_indexes(table: str) -> None:
+    op.create_index('ix_bookings_id', table, ['id'], unique=False)
+    op.create_index('ix_bookings_user_id_end_time', table, ['user_id', 'end_time'], unique=False)
+    op.create_index('ix_bookings_table_id_end_time_start_time', table,
+                    ['table_id', 'end_time', 'start_time'], unique=False)
+    op.create_index('ix_bookings_start_time_id', table, ['start_time', 'id'], unique=False)
+
+
+def _drop_booking_indexes(table: str) -> None:
+    op.drop_index('ix_bookings_start_time_id', table_name=table)
+    op.drop_index('ix_bookings_table_id_end_time_start_time', table_name=table)
+    op.drop_index('ix_bookings_user_id_end_time', table_name=table)
+    op.drop_index('ix_bookings_id', table_name=table)
+
+
+def upgrade() -> None:
+    # На секционированную таблицу можно сослаться только по всему первичному ключу (id, start_time)
+    op.drop_constraint('waitlist_booking_id_fkey', 'waitlist', type_='foreignkey')
+
+    # Старая таблица уступает имена индексов и ограничений новой
+    op.execute("ALTER TABLE bookings RENAME TO bookings_unpartitioned")
+    _drop_booking_indexes('bookings_unpartitioned')
+    op.drop_constraint('bookings_no_overlap', 'bookings_unpartitioned', type_='exclude')
+    op.execute("ALTER TABLE bookings_unpartitioned RENAME CONSTRAINT bookings_pkey TO bookings_unpartitioned_pkey")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+
+    op.execute(
+        "CREATE TABLE bookings ("
+        "id integer NOT NULL DEFAULT nextval('bookings_id_seq'), "
+        "start_time timestamp without time zone NOT NULL, "
+        "end_time timestamp without time zone NOT NULL, "
+        "user_id integer NOT NULL REFERENCES users (id), "
+        "table_id integer NOT NULL REFERENCES tables (id) ON DELETE CASCADE, "
+        "CONSTRAINT bookings_pkey PRIMARY KEY (id, start_time)"
+        ") PARTITION BY RANGE (start_time)"
+    )
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+
+    # Секции на каждый месяц с существующими бронями и до MONTHS_AHEAD месяцев вперёд
+    first_booking = op.get_bind().scalar(sa.text("SELECT min(start_time) FROM bookings_unpartitioned"))
+    current = date.today().replace(day=1)
+    month = min(first_booking.date().replace(day=1), current) if first_booking else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        name = f"bookings_p{month:%Y_%m}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF bookings "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        op.execute(f"ALTER TABLE {name} ADD CONSTRAINT {name}_no_overlap {NO_OVERLAP}")
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+    op.execute(f"ALTER TABLE bookings_default ADD CONSTRAINT bookings_default_no_overlap {NO_OVERLAP}")
+
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_unpartitioned")
+    op.drop_table('bookings_unpartitioned')
+    # индексы на bookings создаются во всех секциях, в том числе будущих
+    _create_booking_indexes('bookings')
+
+    # Без внешних ключей: архивные брони удалённых столов и пользователей остаются
+    # в истории (models.crud.BOOKING_HISTORY) со ссылками на несуществующие строки
+    op.create_table(
+        'bookings_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_bookings_archive_user_id_start_time_id', 'bookings_archive',
+                    ['user_id', 'start_time', 'id'], unique=False)
+    op.create_index('ix_bookings_archive_start_time_id', 'bookings_archive', ['start_time', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    # Архив возвращается в обычную таблицу вместе с горячими бронями
+    op.execute("ALTER TABLE bookings RENAME TO bookings_partitioned")
+    op.execute("ALTER TABLE bookings_partitioned RENAME CONSTRAINT bookings_pkey TO bookings_partitioned_pkey")
+    _drop_booking_indexes('bookings_partitioned')
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+
+    op.execute(
+        "CREATE TABLE bookings ("
+        "id integer NOT NULL DEFAULT nextval('bookings_id_seq'), "
+        "start_time timestamp without time zone NOT NULL, "
+        "end_time timestamp without time zone NOT NULL, "
+        "user_id integer NOT NULL REFERENCES users (id), "
+        "table_id integer NOT NULL REFERENCES tables (id) ON DELETE CASCADE, "
+        "CONSTRAINT bookings_pkey PRIMARY KEY (id)"
+        ")"
+    )
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    # строки архива удалённых столов и пользователей вернуть нельзя из-за внешних ключей
+    op.execute(
+        f"INSERT INTO bookings ({BOOKING_COLUMNS}) "
+        f"SELECT {BOOKING_COLUMNS} FROM bookings_archive a "
+        f"WHERE EXISTS (SELECT 1 FROM tables t WHERE t.id = a.table_id) "
+        f"AND EXISTS (SELECT 1 FROM users u WHERE u.id = a.user_id) "
+        f"UNION ALL SELECT {BOOKING_COLUMNS} FROM bookings_partitioned"
+    )
+    op.drop_index('ix_bookings_archive_start_time_id', table_name='bookings_archive')
+    op.drop_index('ix_bookings_archive_user_id_start_time_id', table_name='bookings_archive')
+    op.drop_table('bookings_archive')
+    op.execute("DROP TABLE bookings_partitioned")
+
+    _create_booking_indexes('bookings')
+    op.execute(f"ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap {NO_OVERLAP}")
+    op.execute("UPDATE waitlist SET booking_id = NULL "
+               "WHERE booking_id IS NOT NULL AND booking_id NOT IN (SELECT id FROM bookings)")
+    op.create_foreign_key('waitlist_booking_id_fkey', 'waitlist', 'bookings',
+                          ['booking_id'], ['id'], ondelete='SET NULL')
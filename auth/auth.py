@@ -5,26 +5,25 @@ import jwt
 from fastapi import Depends, HTTPException, status, APIRouter
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt import InvalidTokenError
-from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-import config
+from config import settings
 from models.crud import get_user_by_username
-from models.database import get_db
-from models.schemas import User
-
-SECRET_KEY = config.SECRET_KEY
-ALGORITHM = config.ALGORITHM
-ACCESS_TOKEN_EXPIRE_MINUTES = int(config.ACCESS_TOKEN_EXPIRE_MINUTES)
+from models.database import get_db, read_session_for
+from models.schemas import User, TokenUser
+from monitoring.timing import phase
+from ratelimit.limiter import limit_auth
+from .cache import user_cache
+from .hashing import password_hasher
+
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+CLAIMS_TOKEN_EXPIRE_MINUTES = settings.claims_token_expire_minutes
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto"
-)
-
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
@@ -40,19 +39,19 @@ class TokenData(BaseModel):
     username: str | None = None
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
 
 
 async def authenticate_user(username: str, password: str, db: AsyncSession = Depends(get_db)):
     user = await get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -68,9 +67,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-async def get_current_user(
-        token: Annotated[str, Depends(oauth2_scheme)],
-        db: AsyncSession = Depends(get_db)):
+def decode_access_token(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -81,29 +78,81 @@ async def get_current_user(
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
     except InvalidTokenError:
         raise credentials_exception
-    user = await get_user_by_username(db, username=token_data.username)
+    return payload
+
+
+async def load_user(db: AsyncSession, username: str) -> User | None:
+    user = user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        db_user = await get_user_by_username(db, username=username)
+        if not db_user:
+            return None
+        user = User.model_validate(db_user, from_attributes=True)
+        user_cache.set(username, user)
     return user
 
 
-async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-):
-    if current_user.disabled:
+async def get_current_user(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        db: AsyncSession = Depends(get_db)):
+    with phase("auth"):
+        payload = decode_access_token(token)
+        token_data = TokenData(username=payload["sub"])
+        user = await load_user(db, token_data.username)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def ensure_active(user: User | TokenUser):
+    if user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return user
 
 
-@router.post("/token")
+async def get_current_active_user(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        db: AsyncSession = Depends(get_db)):
+    """
+        With TOKEN_EMBED_CLAIMS the user is taken from the uid/adm/dis claims
+        without touching the database, otherwise from the user cache / database.
+    """
+    with phase("auth"):
+        payload = decode_access_token(token)
+        if settings.token_embed_claims and "uid" in payload:
+            current_user = TokenUser(
+                id=payload["uid"],
+                username=payload["sub"],
+                is_admin=payload.get("adm", False),
+                disabled=payload.get("dis", False),
+            )
+        else:
+            current_user = await get_current_user(token, db)
+    return ensure_active(current_user)
+
+
+async def get_user_read_db(
+        current_user: Annotated[User | TokenUser, Depends(get_current_active_user)]):
+    """
+        Read-only session for the current user's listings, see models.database.read_session_for
+    """
+    async with await read_session_for(current_user.id) as session:
+        yield session
+
+
+@router.post("/token", dependencies=[Depends(limit_auth)])
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: AsyncSession = Depends(get_db)
 ) -> Token:
-    user = await authenticate_user(form_data.username, form_data.password, db)
+    with phase("auth"):
+        user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,8 +160,13 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    token_data = {"sub": user.username}
+    if settings.token_embed_claims:
+        token_data.update({"uid": user.id, "adm": user.is_admin, "dis": user.disabled})
+        # права в токене не отзываются, поэтому такой токен живёт меньше
+        access_token_expires = min(access_token_expires, timedelta(minutes=CLAIMS_TOKEN_EXPIRE_MINUTES))
     access_token = create_access_token(
-        data={"sub": user.username},
+        data=token_data,
         expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer")
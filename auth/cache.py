@@ -0,0 +1,20 @@
+from config import settings
+from cache.lru import TTLCache
+
+# schemas.User snapshots keyed by username, filled by auth.get_current_user
+user_cache = TTLCache(
+    max_size=settings.user_cache_max_size,
+    ttl=settings.user_cache_ttl_seconds,
+)
+
+
+def evict_user(username: str | None):
+    """
+        pg_listener callback of crud.USER_CHANNEL: the user was changed through
+        some worker. None after a listener reconnect, when changes may have been
+        missed, drops the whole cache.
+    """
+    if username is None:
+        user_cache.clear()
+    else:
+        user_cache.invalidate(username)
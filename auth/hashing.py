@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from config import settings
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto"
+)
+
+
+# Module-level functions so that they can be sent to a process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class PasswordHasher:
+    """
+        Runs bcrypt off the event loop in a bounded thread or process pool.
+
+        At most `workers` calls run at once and at most `max_queue` more wait
+        for a worker; anything beyond that is rejected with 503 right away
+        instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_queue: int, executor: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies: deque[float] = deque(maxlen=1024)
+        self._waits: deque[float] = deque(maxlen=1024)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, please retry later",
+                headers={"Retry-After": "1"},
+            )
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        started_at = queued_at
+
+        def timed(*call_args):
+            nonlocal started_at
+            started_at = time.perf_counter()
+            return func(*call_args)
+
+        if self.executor_kind == "process":
+            # время ожидания в очереди процессного пула отдельно не измеряется
+            future = self.executor.submit(func, *args)
+        else:
+            future = self.executor.submit(timed, *args)
+        self.pending += 1
+        # Место освобождается, когда задача покинула пул, а не когда запрос перестал
+        # её ждать: отмена запроса снимает задачу из очереди, но не прерывает bcrypt
+        future.add_done_callback(lambda _: self._release_soon(loop))
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            finished_at = time.perf_counter()
+            self.completed += 1
+            self._latencies.append(finished_at - queued_at)
+            self._waits.append(started_at - queued_at)
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop):
+        # вызывается в потоке пула, счётчик меняется только в потоке event loop
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # event loop уже закрыт, счётчик больше никому не нужен
+            pass
+
+    def _release(self):
+        self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        waits = list(self._waits)
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "latency_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "queue_wait_p99_ms": round(_percentile(waits, 99) * 1000, 2),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers or os.cpu_count() or 1,
+    max_queue=settings.password_hash_max_queue,
+    executor=settings.password_hash_executor,
+)
@@ -0,0 +1,6 @@
+import os
+
+# Все бенчмарки ходят с одного адреса и от нескольких пользователей: без этого
+# они измеряли бы ответы 429 ограничителя. Чтобы проверить сам ограничитель,
+# задайте RATE_LIMIT_ENABLED=true явно.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
@@ -0,0 +1,119 @@
+"""
+    Replay of a synthetic day against each table allocation strategy
+    (models.allocation), in memory, no database needed.
+
+    Requests for random hour-aligned slots arrive in random order until the
+    requested hours reach `--demand` times the venue capacity. Every strategy
+    sees the same requests and starts from the same empty day. Reports
+    accepted and rejected bookings, utilization (booked table-hours out of the
+    bookable ones), free hours stranded in 1-hour gaps at the end of the day
+    and the time per allocation.
+
+        python -m benchmarks.allocation --tables 30 --demand 1.2 --days 20
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from models.allocation import AllocationStrategy, TableAllocator
+from models.occupancy import DAY_HOURS, OccupancyMap, occupancy_mask
+from models.schemas import OPENING_HOUR, CLOSING_HOUR, MIN_BOOKING_HOURS, MAX_BOOKING_HOURS, TableType
+from .common import next_free_day, summarize
+
+TABLE_TYPES = [table_type.value for table_type in TableType]
+# маленьких столов и запросов на них больше, чем больших
+TYPE_WEIGHTS = [3, 2, 1]
+
+# конец брони должен быть раньше CLOSING_HOUR, поэтому последний час дня не бронируется
+BOOKABLE_HOURS = DAY_HOURS - 1
+
+VARIANTS = {
+    "first_fit": TableAllocator(AllocationStrategy.first_fit, upgrade=False),
+    "best_fit": TableAllocator(AllocationStrategy.best_fit, upgrade=False),
+    "best_fit+upgrade": TableAllocator(AllocationStrategy.best_fit, upgrade=True),
+}
+
+
+def synthetic_day(day, tables_by_type: dict[str, int], demand: float) -> list:
+    requests = []
+    for table_type, tables in tables_by_type.items():
+        wanted_hours = demand * tables * BOOKABLE_HOURS
+        while wanted_hours > 0:
+            start_hour = random.randrange(OPENING_HOUR, CLOSING_HOUR - MIN_BOOKING_HOURS)
+            duration = random.randint(MIN_BOOKING_HOURS, min(MAX_BOOKING_HOURS, CLOSING_HOUR - 1 - start_hour))
+            start_time = day + timedelta(hours=start_hour)
+            requests.append((table_type, start_time, start_time + timedelta(hours=duration)))
+            wanted_hours -= duration
+    random.shuffle(requests)
+    return requests
+
+
+def replay(allocator: TableAllocator, tables_by_type: dict[str, int], requests: list) -> dict:
+    occupancy = OccupancyMap()
+    table_id = 0
+    for table_type, tables in tables_by_type.items():
+        for _ in range(tables):
+            table_id += 1
+            occupancy.add_table(table_id, table_type)
+
+    latencies, accepted, booked_hours = [], 0, 0
+    for booking_id, (table_type, start_time, end_time) in enumerate(requests, start=1):
+        day = start_time.date()
+        mask = occupancy_mask(day, start_time, end_time)
+        started = time.perf_counter()
+        picked = allocator.pick(occupancy, table_type, day, mask)
+        latencies.append(time.perf_counter() - started)
+        if picked is not None:
+            occupancy.add_booking(booking_id, picked, start_time, end_time)
+            accepted += 1
+            booked_hours += mask.bit_count()
+
+    days = {start_time.date() for _, start_time, _ in requests}
+    stranded = 0
+    bookable = (1 << BOOKABLE_HOURS) - 1
+    for day in days:
+        for masks in occupancy.masks(day).values():
+            for busy in masks:
+                free = ~busy & bookable
+                # свободный час, с обеих сторон которого занято или край дня
+                stranded += (free & ~(free << 1) & ~(free >> 1)).bit_count()
+
+    capacity = sum(tables_by_type.values()) * BOOKABLE_HOURS * len(days)
+    return {
+        "requests": len(requests),
+        "accepted": accepted,
+        "rejected": len(requests) - accepted,
+        "utilization": round(booked_hours / capacity, 4),
+        "stranded_1h_gaps": stranded,
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=30, help="tables over all types")
+    parser.add_argument("--demand", type=float, default=1.2, help="requested hours / bookable hours")
+    parser.add_argument("--days", type=int, default=20, help="days replayed, results are summed")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    total_weight = sum(TYPE_WEIGHTS)
+    tables_by_type = {
+        table_type: max(1, round(args.tables * weight / total_weight))
+        for table_type, weight in zip(TABLE_TYPES, TYPE_WEIGHTS)
+    }
+    first_day = next_free_day()
+    requests = [
+        request
+        for day in range(args.days)
+        for request in synthetic_day(first_day + timedelta(days=day), tables_by_type, args.demand)
+    ]
+    print(f"tables: {tables_by_type}, {len(requests)} requests over {args.days} days")
+    for name, allocator in VARIANTS.items():
+        print(f"{name:17}", replay(allocator, tables_by_type, requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+    Time bulk table provisioning and deletion through the API:
+    POST /tables/bulk_add for `--tables` tables, then `--bookings` bookings
+    inserted directly on those tables, then POST /tables/bulk_delete for all
+    of them (the bookings go with them via ON DELETE CASCADE).
+
+    `--single N` additionally times N calls of the one-by-one endpoints for
+    comparison. Meant for a disposable database:
+
+        python -m benchmarks.bulk_tables --tables 10000 --bookings 1000000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import text
+
+from models.database import engine
+from models.schemas import MAX_BULK_TABLES, TableType
+from .common import app_client, login_admin, summarize
+
+# 11 часовых броней в день на стол, начиная с завтрашнего дня
+BOOKINGS_SQL = (
+    "INSERT INTO bookings (start_time, end_time, user_id, table_id) "
+    "SELECT s, s + interval '1 hour', :user_id, :first_id + i % :tables "
+    "FROM generate_series(0, :bookings - 1) AS i, "
+    "LATERAL (SELECT current_date + interval '1 day' "
+    "         + (i / (:tables * 11)) * interval '1 day' "
+    "         + (9 + (i / :tables) % 11) * interval '1 hour' AS s) AS slot"
+)
+
+
+async def seed_bookings(table_ids: list[int], bookings: int):
+    async with engine.begin() as conn:
+        user_id = (await conn.execute(text("SELECT min(id) FROM users"))).scalar_one()
+        await conn.execute(text(BOOKINGS_SQL), {
+            "user_id": user_id,
+            "first_id": table_ids[0],
+            "tables": len(table_ids),
+            "bookings": bookings,
+        })
+        await conn.execute(text("ANALYZE bookings"))
+
+
+async def bulk_add(client, headers, tables: int) -> tuple[list[int], float]:
+    table_ids = []
+    started = time.perf_counter()
+    for offset in range(0, tables, MAX_BULK_TABLES):
+        response = await client.post("/tables/bulk_add", headers=headers, json={
+            "table_type": TableType.four_guest_table.value,
+            "count": min(MAX_BULK_TABLES, tables - offset),
+        })
+        response.raise_for_status()
+        table_ids.extend(row["id"] for row in response.json())
+    return table_ids, time.perf_counter() - started
+
+
+async def bulk_delete(client, headers, table_ids: list[int]) -> tuple[int, float]:
+    deleted = 0
+    started = time.perf_counter()
+    for offset in range(0, len(table_ids), MAX_BULK_TABLES):
+        response = await client.post("/tables/bulk_delete", headers=headers, json={
+            "ids": table_ids[offset:offset + MAX_BULK_TABLES],
+        })
+        response.raise_for_status()
+        deleted += len(response.json()["deleted"])
+    return deleted, time.perf_counter() - started
+
+
+async def single(client, headers, count: int) -> dict:
+    add_latencies, delete_latencies, table_ids = [], [], []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.post("/tables/add_table", headers=headers,
+                                     params={"table_type": TableType.four_guest_table.value})
+        add_latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        table_ids.append(response.json()["id"])
+    for table_id in table_ids:
+        started = time.perf_counter()
+        response = await client.delete(f"/tables/delete_table/{table_id}", headers=headers)
+        delete_latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return {"add_table": summarize(add_latencies), "delete_table": summarize(delete_latencies)}
+
+
+async def main(tables: int, bookings: int, single_count: int):
+    async with app_client() as client:
+        headers = await login_admin(client)
+
+        table_ids, add_seconds = await bulk_add(client, headers, tables)
+        started = time.perf_counter()
+        if bookings:
+            await seed_bookings(table_ids, bookings)
+        seed_seconds = time.perf_counter() - started
+        deleted, delete_seconds = await bulk_delete(client, headers, table_ids)
+
+        report = {
+            "tables": len(table_ids),
+            "bookings": bookings,
+            "bulk_add_s": round(add_seconds, 3),
+            "seed_bookings_s": round(seed_seconds, 3),
+            "bulk_delete_s": round(delete_seconds, 3),
+            "deleted": deleted,
+        }
+        if single_count:
+            report["single"] = await single(client, headers, single_count)
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=10_000)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--single", type=int, default=0, help="also time N one-by-one add/delete calls")
+    args = parser.parse_args()
+    asyncio.run(main(args.tables, args.bookings, args.single))
@@ -0,0 +1,151 @@
+"""
+    Helpers shared by the benchmark scripts.
+
+    Benchmarks drive the real `main.app` and need the database from `.env`
+    with all migrations applied. Run them from the project root, e.g.:
+
+        python -m benchmarks.concurrent_booking --requests 300
+"""
+import asyncio
+import math
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import httpx
+
+from config import settings
+from main import app
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def summarize(latencies: list[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def next_free_day(days_ahead: int = 1) -> datetime:
+    """Midnight of a day in the future, so the booking window is never in the past"""
+    day = datetime.now() + timedelta(days=days_ahead)
+    return day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@asynccontextmanager
+async def app_client(limit: int = 1000):
+    """httpx client talking to `main.app` in-process, with the app lifespan running"""
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=60,
+            limits=httpx.Limits(max_connections=limit),
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_server(port: int = 8765, workers: int = 1):
+    """uvicorn subprocess serving `main:app` on localhost, yielded once it answers"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as probe:
+            for _ in range(300):
+                if process.returncode is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    await probe.get("/docs")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start in 30s")
+        yield process
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+
+
+@asynccontextmanager
+async def uvicorn_client(port: int = 8765, workers: int = 1, limit: int = 1000):
+    """httpx client talking to `main:app` served by a uvicorn subprocess on localhost"""
+    async with uvicorn_server(port, workers):
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=60,
+            limits=httpx.Limits(max_connections=limit),
+        ) as client:
+            yield client
+
+
+class Recorder:
+    """
+        Latencies and status codes of the requests made through it, per endpoint label.
+
+        Throughput of a label is its request count over the window from its first
+        request start to its last response, so unrecorded setup work inside a
+        scenario does not dilute it.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.windows: dict[str, list[float]] = {}
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str,
+                      label: str | None = None, **kwargs) -> httpx.Response:
+        label = label or f"{method} {url}"
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        finished = time.perf_counter()
+        self.latencies[label].append(finished - started)
+        self.statuses[label][response.status_code] += 1
+        window = self.windows.setdefault(label, [started, finished])
+        window[0], window[1] = min(window[0], started), max(window[1], finished)
+        return response
+
+    def report(self) -> dict:
+        report = {}
+        for label, latencies in sorted(self.latencies.items()):
+            first, last = self.windows[label]
+            report[label] = {
+                **summarize(latencies),
+                "throughput_rps": round(len(latencies) / (last - first), 2) if last > first else 0.0,
+                "statuses": {str(status): count for status, count in sorted(self.statuses[label].items())},
+            }
+        return report
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str, email: str | None = None) -> dict:
+    """Register the user if needed and return an Authorization header"""
+    await client.post("/users/register", json={
+        "username": username,
+        "email": email or f"{username}@bench.local",
+        "password": password,
+    })
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def login_admin(client: httpx.AsyncClient) -> dict:
+    return await login(client, settings.admin_name, settings.admin_pass, settings.admin_email)
@@ -0,0 +1,67 @@
+"""
+    Fire many parallel `POST /bookings/create` requests at the same slot and
+    check that no table ended up double booked.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from models.database import SessionLocal
+from .common import app_client, login, login_admin, next_free_day, summarize
+
+
+async def run(requests: int, tables: int, table_type: str, days_ahead: int):
+    async with app_client() as client:
+        admin = await login_admin(client)
+        for _ in range(tables):
+            response = await client.post("/tables/add_table", params={"table_type": table_type}, headers=admin)
+            response.raise_for_status()
+        user = await login(client, "bench_concurrent", "bench_concurrent")
+
+        start_time = next_free_day(days_ahead).replace(hour=12)
+        params = {
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=2)).isoformat(),
+            "table_type": table_type,
+        }
+
+        async def create():
+            started = time.perf_counter()
+            response = await client.post("/bookings/create", params=params, headers=user)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(create() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    print(f"{requests} requests in {elapsed:.2f}s, statuses: {dict(statuses)}")
+    print(summarize([latency for _, latency in results]))
+
+    async with SessionLocal() as db:
+        overlaps = await db.scalar(text(
+            "SELECT count(*) FROM bookings a JOIN bookings b "
+            "ON a.table_id = b.table_id AND a.id < b.id "
+            "AND a.start_time < b.end_time AND a.end_time > b.start_time"
+        ))
+    print(f"overlapping bookings: {overlaps}")
+    if overlaps:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--table-type", default="four guest table")
+    parser.add_argument("--days-ahead", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.tables, args.table_type, args.days_ahead))
+
+
+if __name__ == "__main__":
+    main()
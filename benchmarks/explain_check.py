@@ -0,0 +1,124 @@
+"""
+    Run the crud queries against a seeded database, EXPLAIN every statement they
+    send and fail if any of them plans a sequential scan on `bookings`.
+
+    Seeding inserts directly with generate_series and is meant for a disposable
+    database:
+
+        python -m benchmarks.explain_check --seed --bookings 1000000
+"""
+import argparse
+import asyncio
+import json
+from datetime import timedelta
+
+from sqlalchemy import event, text
+
+from models import crud, schemas
+from models.database import SessionLocal, engine
+from .common import next_free_day
+
+SEED_SQL = [
+    "INSERT INTO users (username, email, hashed_password, is_admin, disabled) "
+    "SELECT 'seed_' || i, 'seed_' || i || '@bench.local', 'x', false, false "
+    "FROM generate_series(1, :users) AS i",
+
+    "INSERT INTO tables (table_type) "
+    "SELECT (ARRAY['two guest table', 'four guest table', 'eight guest table'])[i % 3 + 1] "
+    "FROM generate_series(1, :tables) AS i",
+
+    # Каждый стол получает по 11 часовых броней в день, половина истории уже в прошлом
+    "INSERT INTO bookings (start_time, end_time, user_id, table_id) "
+    "SELECT s, s + interval '1 hour', u.min_id + i % :users, t.min_id + i % :tables "
+    "FROM generate_series(0, :bookings - 1) AS i, "
+    "LATERAL (SELECT current_date - (:bookings / (:tables * 11) / 2) * interval '1 day' "
+    "         + (i / (:tables * 11)) * interval '1 day' "
+    "         + (9 + (i / :tables) % 11) * interval '1 hour' AS s) AS slot, "
+    "(SELECT min(id) AS min_id FROM users WHERE username LIKE 'seed\\_%') AS u, "
+    "(SELECT max(id) - :tables + 1 AS min_id FROM tables) AS t",
+
+    "ANALYZE users",
+    "ANALYZE tables",
+    "ANALYZE bookings",
+]
+
+
+async def seed(users: int, tables: int, bookings: int):
+    async with engine.begin() as conn:
+        for statement in SEED_SQL:
+            await conn.execute(text(statement), {"users": users, "tables": tables, "bookings": bookings})
+
+
+def seq_scans(plan: dict, relation: str) -> list[dict]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == relation:
+        found.append(plan)
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child, relation))
+    return found
+
+
+async def run_crud_queries() -> list[tuple[str, str, tuple]]:
+    captured = []
+    label = "get_user_by_username"
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+            captured.append((label, statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with SessionLocal() as db:
+            user = await crud.get_user_by_username(db, "seed_1")
+            current_user = schemas.User.model_validate(user, from_attributes=True)
+            start_time = next_free_day(7).replace(hour=12)
+            slot = schemas.BookingSlot(start_time=start_time, end_time=start_time + timedelta(hours=2))
+
+            calls = [
+                ("get_bookings", crud.get_bookings(db, current_user)),
+                ("get_upcoming_bookings", crud.get_upcoming_bookings(db, current_user)),
+                ("get_previous_bookings", crud.get_previous_bookings(db, current_user)),
+                ("get_available_table", crud.get_available_table(
+                    db, schemas.TableType.four_guest_table, slot.start_time, slot.end_time)),
+                ("book_available_table", crud.book_available_table(
+                    db, schemas.TableType.four_guest_table, slot, current_user.id)),
+            ]
+            for label, call in calls:
+                await call
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return captured
+
+
+async def run(args):
+    if args.seed:
+        await seed(args.users, args.tables, args.bookings)
+
+    failures = 0
+    for label, statement, parameters in await run_crud_queries():
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans = seq_scans(plan[0]["Plan"], "bookings")
+        status = "SEQ SCAN" if scans else "ok"
+        print(f"{label:24} {status}")
+        if scans:
+            failures += 1
+            print("    " + " ".join(statement.split()))
+
+    if failures:
+        raise SystemExit(f"{failures} statement(s) scan bookings sequentially")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", action="store_true", help="insert synthetic data first")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+    Stream `GET /bookings/export` and sample the process RSS while reading it.
+    RSS should stay flat no matter how many rows are exported.
+
+        python -m benchmarks.export_rss --seed --bookings 5000000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+from .common import app_client, login_admin
+from .explain_check import seed
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2 ** 20
+
+
+async def run(args):
+    if args.seed:
+        await seed(args.users, args.tables, args.bookings)
+
+    async with app_client() as client:
+        admin = await login_admin(client)
+        samples = []
+        received = 0
+        rows = 0
+        started = time.perf_counter()
+        async with client.stream("GET", "/bookings/export", params={"format": args.format}, headers=admin) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                rows += chunk.count(b"\n")
+                if len(samples) < rows // args.sample_every:
+                    samples.append(current_rss_mb())
+        elapsed = time.perf_counter() - started
+
+    print(f"{rows} lines, {received / 2 ** 20:.1f} MiB in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    if samples:
+        print(f"RSS during export: first {samples[0]:.1f} MiB, min {min(samples):.1f}, "
+              f"max {max(samples):.1f}, last {samples[-1]:.1f}")
+    print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", action="store_true", help="insert synthetic data first")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--sample-every", type=int, default=100_000, help="rows between RSS samples")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
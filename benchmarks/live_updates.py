@@ -0,0 +1,143 @@
+"""
+    Idle live availability subscribers on one uvicorn worker.
+
+    Opens `--subscribers` SSE connections to /live/availability, keeps them
+    idle for `--idle` seconds and reports the worker's resident memory per
+    connection. Then books one table and measures how long the event took to
+    reach every subscriber, and with `--burst N` publishes N more booking /
+    cancellation pairs to check that memory stays flat and how many clients
+    fell behind (overflows).
+
+    Needs a file descriptor limit above the number of subscribers for both
+    this process and the server (`ulimit -n`), the soft limit is raised to the
+    hard one automatically:
+
+        python -m benchmarks.live_updates --subscribers 10000
+"""
+import argparse
+import asyncio
+import resource
+import time
+from datetime import timedelta
+
+import httpx
+
+from .common import login, login_admin, next_free_day, summarize, uvicorn_server
+
+TABLE_TYPE = "two guest table"
+CONNECT_BATCH = 500
+BOOKED_MARKER = b'"op":"booked"'
+
+
+def raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard != resource.RLIM_INFINITY and hard < needed:
+        raise SystemExit(f"file descriptor limit {hard} is below the {needed} needed, raise `ulimit -Hn`")
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def open_stream(port: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /live/availability HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n")
+    await writer.drain()
+    status_line = await reader.readline()
+    if b" 200 " not in status_line:
+        raise RuntimeError(f"live stream refused: {status_line!r}")
+    return reader, writer
+
+
+async def watch(reader: asyncio.StreamReader, index: int, delivered: dict[int, float]):
+    # ответ идёт chunked, но строки событий всё равно приходят целиком
+    while line := await reader.readline():
+        if BOOKED_MARKER in line:
+            delivered.setdefault(index, time.perf_counter())
+
+
+async def wait_delivered(delivered: dict, expected: int, timeout: float = 60):
+    started = time.perf_counter()
+    while len(delivered) < expected and time.perf_counter() - started < timeout:
+        await asyncio.sleep(0.01)
+
+
+async def run(subscribers: int, port: int, idle: float, burst: int, days_ahead: int):
+    raise_fd_limit(subscribers + 1000)
+    async with uvicorn_server(port) as process, httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=60,
+    ) as client:
+        admin = await login_admin(client)
+        user = await login(client, "bench_live", "bench_live")
+        response = await client.post("/tables/bulk_add", headers=admin, json={"table_type": TABLE_TYPE, "count": 1})
+        response.raise_for_status()
+        table_ids = [table["id"] for table in response.json()]
+
+        base_rss = rss_bytes(process.pid)
+        started = time.perf_counter()
+        streams = []
+        while len(streams) < subscribers:
+            batch = min(CONNECT_BATCH, subscribers - len(streams))
+            streams += await asyncio.gather(*(open_stream(port) for _ in range(batch)))
+        connect_seconds = time.perf_counter() - started
+
+        delivered: dict[int, float] = {}
+        readers = [asyncio.create_task(watch(reader, i, delivered)) for i, (reader, _) in enumerate(streams)]
+        await asyncio.sleep(idle)
+        idle_rss = rss_bytes(process.pid)
+        stats = (await client.get("/admin/live", headers=admin)).json()
+
+        start_time = next_free_day(days_ahead).replace(hour=12)
+        params = {
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=2)).isoformat(),
+            "table_type": TABLE_TYPE,
+        }
+        published = time.perf_counter()
+        response = await client.post("/bookings/create", params=params, headers=user)
+        response.raise_for_status()
+        await wait_delivered(delivered, subscribers)
+        fanout = [at - published for at in delivered.values()]
+
+        booking_id = response.json()["id"]
+        for _ in range(burst):
+            await client.delete(f"/bookings/delete_booking/{booking_id}", headers=user)
+            response = await client.post("/bookings/create", params=params, headers=user)
+            booking_id = response.json()["id"]
+        burst_rss = rss_bytes(process.pid)
+        burst_stats = (await client.get("/admin/live", headers=admin)).json()
+
+        for task in readers:
+            task.cancel()
+        for _, writer in streams:
+            writer.close()
+        await client.post("/tables/bulk_delete", headers=admin, json={"ids": table_ids})
+
+    print(f"subscribers:        {stats['subscribers']} connected in {connect_seconds:.1f}s")
+    print(f"worker RSS:         {base_rss / 2**20:.1f} MiB before, {idle_rss / 2**20:.1f} MiB idle "
+          f"({(idle_rss - base_rss) / max(subscribers, 1) / 1024:.1f} KiB per subscriber)")
+    print(f"booking -> event:   {len(delivered)}/{subscribers} delivered", summarize(fanout))
+    if burst:
+        print(f"after {burst} more changes: RSS {burst_rss / 2**20:.1f} MiB, "
+              f"published {burst_stats['published']}, overflows {burst_stats['overflows']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle", type=float, default=20, help="seconds to stay idle, longer than the heartbeat")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--days-ahead", type=int, default=90)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.port, args.idle, args.burst, args.days_ahead))
+
+
+if __name__ == "__main__":
+    main()
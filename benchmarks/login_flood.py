@@ -0,0 +1,58 @@
+"""
+    Measure `GET /tables/` latency while `/auth/token` is flooded with
+    concurrent logins. With bcrypt on the event loop the p99 of the cheap
+    endpoint grows to the length of the whole login queue.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from .common import app_client, login, summarize
+
+
+async def run(logins: int, concurrency: int, probes: int):
+    async with app_client() as client:
+        await login(client, "bench_flood", "bench_flood")
+        statuses = Counter()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def flood_one():
+            async with semaphore:
+                response = await client.post("/auth/token", data={
+                    "username": "bench_flood",
+                    "password": "bench_flood",
+                })
+                statuses[response.status_code] += 1
+
+        async def probe():
+            latencies = []
+            for _ in range(probes):
+                started = time.perf_counter()
+                response = await client.get("/tables/")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+            return latencies
+
+        baseline = await probe()
+        flood = asyncio.gather(*(flood_one() for _ in range(logins)))
+        under_load = await probe()
+        await flood
+
+    print("GET /tables/ idle:       ", summarize(baseline))
+    print("GET /tables/ under flood:", summarize(under_load))
+    print("/auth/token statuses:    ", dict(statuses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency, args.probes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+    Free-table search with the hour bitmaps (models.occupancy.OccupancyMap)
+    compared to the SQL overlap query of crud.get_available_table.
+
+    The bitmap part needs no database. `--sql` also times the SQL path against
+    the database from `.env`, seeded with benchmarks.explain_check --seed.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import timedelta
+
+from models import crud
+from models.availability import availability_index
+from models.database import SessionLocal
+from models.occupancy import OccupancyMap, occupancy_mask
+from models.schemas import OPENING_HOUR, CLOSING_HOUR, TableType
+from .common import next_free_day, summarize
+
+TABLE_TYPES = [table_type.value for table_type in TableType]
+
+
+def random_slot(first_day, days: int):
+    day = first_day + timedelta(days=random.randrange(days))
+    start_hour = random.randrange(OPENING_HOUR, CLOSING_HOUR - 1)
+    duration = random.randint(1, min(4, CLOSING_HOUR - 1 - start_hour))
+    start_time = day + timedelta(hours=start_hour)
+    return start_time, start_time + timedelta(hours=duration)
+
+
+def build_map(tables: int, days: int, fill: float, first_day) -> OccupancyMap:
+    occupancy = OccupancyMap()
+    for table_id in range(1, tables + 1):
+        occupancy.add_table(table_id, TABLE_TYPES[table_id % len(TABLE_TYPES)])
+    booking_id = 0
+    for table_id in range(1, tables + 1):
+        for day in range(days):
+            hour = OPENING_HOUR
+            while hour < CLOSING_HOUR - 1:
+                duration = random.randint(1, 4)
+                if random.random() < fill and hour + duration < CLOSING_HOUR:
+                    booking_id += 1
+                    start_time = first_day + timedelta(days=day, hours=hour)
+                    occupancy.add_booking(booking_id, table_id, start_time, start_time + timedelta(hours=duration))
+                hour += duration
+    return occupancy
+
+
+def bench_bitmap(occupancy: OccupancyMap, queries: list) -> list[float]:
+    latencies = []
+    for table_type, start_time, end_time in queries:
+        started = time.perf_counter()
+        day = start_time.date()
+        occupancy.first_free(table_type, day, occupancy_mask(day, start_time, end_time))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def bench_sql(queries: list) -> list[float]:
+    availability_index.loaded = False  # только запрос к БД
+    latencies = []
+    async with SessionLocal() as db:
+        for table_type, start_time, end_time in queries:
+            started = time.perf_counter()
+            await crud.get_available_table(db, TableType(table_type), start_time, end_time)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--fill", type=float, default=0.6, help="share of slots that are booked")
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--sql", action="store_true", help="also time the SQL overlap query")
+    args = parser.parse_args()
+
+    random.seed(42)
+    first_day = next_free_day()
+    started = time.perf_counter()
+    occupancy = build_map(args.tables, args.days, args.fill, first_day)
+    print(f"built {args.tables} tables x {args.days} days in {time.perf_counter() - started:.1f}s")
+
+    queries = [(random.choice(TABLE_TYPES), *random_slot(first_day, args.days)) for _ in range(args.queries)]
+    print("bitmap first_free:", summarize(bench_bitmap(occupancy, queries)))
+    if args.sql:
+        print("SQL overlap query:", summarize(asyncio.run(bench_sql(queries[:1000]))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+    Booking latency as the bookings history grows.
+
+    Fills past months with synthetic 1-hour bookings on `--tables` tables
+    (INSERT ... SELECT FROM generate_series, one transaction per month, the
+    month's partition is created first) until the history holds each of the
+    `--sizes` rows. After every step it times `--bookings` calls of
+    crud.book_available_table for upcoming slots and the first page of
+    crud.get_previous_bookings. The booking only reads the partition of the
+    booked month, so its latency should stay flat while the history grows.
+    `--archive` also runs the partition maintenance after every step, which
+    moves months older than BOOKINGS_HOT_MONTHS to bookings_archive.
+
+    Writes straight into the database, use a disposable one:
+
+        python -m benchmarks.partitions --sizes 1M,10M,25M,50M --archive
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from config import settings
+from models import crud, models, schemas
+from models.database import SessionLocal
+from models.partitions import add_months, create_partition, list_partitions, maintain_partitions, month_start
+from models.schemas import OPENING_HOUR, CLOSING_HOUR
+from .common import summarize
+
+TABLE_TYPE = schemas.TableType.two_guest_table
+# брони по часу с открытия до последнего часа, который можно забронировать
+HOURS_PER_DAY = CLOSING_HOUR - 1 - OPENING_HOUR
+
+FILL_MONTH = text(
+    "INSERT INTO bookings (start_time, end_time, user_id, table_id) "
+    "SELECT d + make_interval(hours => h), d + make_interval(hours => h + 1), :user_id, t "
+    "FROM generate_series(CAST(:first_day AS timestamp), CAST(:last_day AS timestamp), interval '1 day') AS d, "
+    "generate_series(:opening, :last_hour) AS h, "
+    "unnest(CAST(:table_ids AS integer[])) AS t"
+)
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    multiplier = {"K": 1_000, "M": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("KM")) * multiplier)
+
+
+async def grow_history(db, rows: int, before: date, table_ids: list[int], user_id: int) -> date:
+    """Fill whole days backwards from `before` with at least `rows` bookings, returns the new first day"""
+    days = math.ceil(rows / (len(table_ids) * HOURS_PER_DAY))
+    first = before - timedelta(days=days)
+    day = first
+    while day < before:
+        month = month_start(day)
+        last = min(before, add_months(month, 1)) - timedelta(days=1)
+        await create_partition(db, month)
+        await db.execute(FILL_MONTH, {
+            "user_id": user_id, "first_day": datetime.combine(day, datetime.min.time()),
+            "last_day": datetime.combine(last, datetime.min.time()),
+            "opening": OPENING_HOUR, "last_hour": CLOSING_HOUR - 2, "table_ids": table_ids,
+        })
+        await db.commit()
+        day = last + timedelta(days=1)
+    await db.execute(text("ANALYZE bookings"))
+    await db.commit()
+    return first
+
+
+async def time_bookings(db, count: int, user_id: int) -> list[float]:
+    latencies = []
+    tomorrow = date.today() + timedelta(days=1)
+    for _ in range(count):
+        start_time = datetime.combine(tomorrow + timedelta(days=random.randrange(60)), datetime.min.time())
+        start_time += timedelta(hours=random.randrange(OPENING_HOUR, CLOSING_HOUR - 1))
+        slot = schemas.check_booking_slot(start_time, start_time + timedelta(hours=1))
+        started = time.perf_counter()
+        await crud.book_available_table(db, TABLE_TYPE, slot, user_id)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def time_previous_page(db, user, count: int) -> list[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await crud.get_previous_bookings(db, user)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(sizes: list[int], tables: int, bookings: int, archive: bool):
+    async with SessionLocal() as db:
+        user = await db.scalar(select(models.User).order_by(models.User.id).limit(1))
+        if user is None:
+            raise SystemExit("register at least one user first")
+        created = await crud.create_tables(db, schemas.TableBulkCreate(table_type=TABLE_TYPE, count=tables))
+        table_ids = [row["id"] for row in created]
+
+        first_booking = await db.scalar(select(func.min(models.Booking.start_time)))
+        before = min(first_booking.date(), date.today()) if first_booking else date.today()
+        history = 0
+        for size in sorted(sizes):
+            started = time.perf_counter()
+            before = await grow_history(db, size - history, before, table_ids, user.id)
+            history = size
+            fill_seconds = time.perf_counter() - started
+            if archive:
+                await maintain_partitions(db, date.today(), settings.bookings_partition_months_ahead,
+                                          settings.bookings_hot_months)
+            hot_rows = sum(partition["estimated_rows"] for partition in await list_partitions(db))
+            await db.rollback()
+
+            create = summarize(await time_bookings(db, bookings, user.id))
+            previous = summarize(await time_previous_page(db, user, 50))
+            print(f"history {size:>11,} rows (hot ~{hot_rows:,}, filled in {fill_seconds:.0f}s)")
+            print("    book_available_table: ", create)
+            print("    get_previous_bookings:", previous)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1M,5M,10M,25M,50M", help="history sizes to measure at, e.g. 1M,10M")
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=500, help="timed bookings per history size")
+    parser.add_argument("--archive", action="store_true", help="archive old months after every step")
+    args = parser.parse_args()
+    random.seed(42)
+    asyncio.run(run([parse_size(size) for size in args.sizes.split(",")], args.tables, args.bookings, args.archive))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+    Load scenarios run by benchmarks.suite. Every scenario gets a client (ASGI
+    or uvicorn), a Recorder and the prepared Context, and only the requests
+    made through the recorder end up in the report.
+"""
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import httpx
+
+from models.schemas import OPENING_HOUR, TableType
+from .common import Recorder, login, login_admin, next_free_day
+
+TABLE_TYPES = [table_type.value for table_type in TableType]
+
+
+@dataclass
+class Context:
+    admin: dict
+    users: list[dict]
+    passwords: list[tuple[str, str]]
+    concurrency: int
+    days_ahead: int
+    options: dict = field(default_factory=dict)
+
+    def semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.concurrency)
+
+
+async def prepare(client: httpx.AsyncClient, users: int, tables_per_type: int,
+                  concurrency: int, days_ahead: int, **options) -> Context:
+    """Log in the admin and `users` bench users, make sure every table type has enough tables"""
+    admin = await login_admin(client)
+    tables = (await client.get("/tables/")).json()
+    for table_type in TABLE_TYPES:
+        missing = tables_per_type - sum(1 for table in tables if table["table_type"] == table_type)
+        if missing > 0:
+            response = await client.post("/tables/bulk_add", headers=admin,
+                                         json={"table_type": table_type, "count": missing})
+            response.raise_for_status()
+
+    passwords = [(f"bench_user_{i}", f"bench_user_{i}") for i in range(users)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login_one(username: str, password: str) -> dict:
+        async with semaphore:
+            return await login(client, username, password)
+
+    headers = await asyncio.gather(*(login_one(username, password) for username, password in passwords))
+    return Context(admin=admin, users=list(headers), passwords=passwords,
+                   concurrency=concurrency, days_ahead=days_ahead, options=options)
+
+
+def random_slot(ctx: Context, first_hour: int = OPENING_HOUR, last_hour: int = 19):
+    day = next_free_day(ctx.days_ahead + random.randrange(7))
+    start_time = day.replace(hour=random.randint(first_hour, last_hour))
+    return start_time, start_time + timedelta(hours=random.randint(1, 2))
+
+
+async def lunch_rush(client: httpx.AsyncClient, recorder: Recorder, ctx: Context):
+    """Every user looks at the grid, books a table around noon and checks their bookings"""
+    semaphore = ctx.semaphore()
+
+    async def guest(headers: dict):
+        async with semaphore:
+            start_time, end_time = random_slot(ctx, 12, 14)
+            await recorder.request(client, "GET", "/bookings/availability", label="GET /bookings/availability",
+                                   params={"date": start_time.date().isoformat()})
+            await recorder.request(client, "POST", "/bookings/create", label="POST /bookings/create",
+                                   headers=headers, params={
+                                       "start_time": start_time.isoformat(),
+                                       "end_time": end_time.isoformat(),
+                                       "table_type": random.choice(TABLE_TYPES),
+                                   })
+            await recorder.request(client, "GET", "/bookings/my_upcoming_bookings",
+                                   label="GET /bookings/my_upcoming_bookings", headers=headers)
+            await recorder.request(client, "GET", "/tables/", label="GET /tables/")
+
+    await asyncio.gather(*(guest(headers) for headers in ctx.users))
+
+
+async def login_storm(client: httpx.AsyncClient, recorder: Recorder, ctx: Context):
+    """Logins of every user `logins_per_user` times at once, with GET /tables/ probes alongside"""
+    semaphore = ctx.semaphore()
+    done = asyncio.Event()
+
+    async def log_in(username: str, password: str):
+        async with semaphore:
+            await recorder.request(client, "POST", "/auth/token", label="POST /auth/token",
+                                   data={"username": username, "password": password})
+
+    async def probe():
+        while not done.is_set():
+            await recorder.request(client, "GET", "/tables/", label="GET /tables/ (during storm)")
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.gather(*(
+        log_in(username, password)
+        for _ in range(ctx.options.get("logins_per_user", 2))
+        for username, password in ctx.passwords
+    ))
+    done.set()
+    await prober
+
+
+async def admin_export(client: httpx.AsyncClient, recorder: Recorder, ctx: Context):
+    """Full NDJSON and CSV exports plus paging through get_all_bookings"""
+    for export_format in ("ndjson", "csv"):
+        await recorder.request(client, "GET", "/bookings/export", label=f"GET /bookings/export ({export_format})",
+                               headers=ctx.admin, params={"format": export_format})
+
+    cursor = None
+    for _ in range(ctx.options.get("export_pages", 50)):
+        params = {"limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        response = await recorder.request(client, "GET", "/bookings/get_all_bookings",
+                                          label="GET /bookings/get_all_bookings", headers=ctx.admin, params=params)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+
+async def mass_cancellations(client: httpx.AsyncClient, recorder: Recorder, ctx: Context):
+    """Every user books a table and then all of them cancel at the same time"""
+    semaphore = ctx.semaphore()
+
+    async def book(headers: dict) -> tuple[dict, int | None]:
+        async with semaphore:
+            start_time, end_time = random_slot(ctx)
+            response = await client.post("/bookings/create", headers=headers, params={
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat(),
+                "table_type": random.choice(TABLE_TYPES),
+            })
+            return headers, response.json()["id"] if response.status_code == 200 else None
+
+    async def cancel(headers: dict, booking_id: int):
+        async with semaphore:
+            await recorder.request(client, "DELETE", f"/bookings/delete_booking/{booking_id}",
+                                   label="DELETE /bookings/delete_booking/{id}", headers=headers)
+
+    booked = await asyncio.gather(*(book(headers) for headers in ctx.users))
+    await asyncio.gather(*(cancel(headers, booking_id) for headers, booking_id in booked if booking_id))
+
+
+SCENARIOS = {
+    "lunch_rush": lunch_rush,
+    "login_storm": login_storm,
+    "admin_export": admin_export,
+    "mass_cancellations": mass_cancellations,
+}
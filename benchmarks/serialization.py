@@ -0,0 +1,67 @@
+"""
+    Per-row cost of turning bookings into a JSON response body:
+
+    - orm:  ORM entities validated into list[BookingShow] and encoded with the
+            default JSON encoder (the previous response_model path)
+    - rows: column-only rows encoded with orjson (routers.responses.rows_response)
+
+    Needs no database.
+"""
+import argparse
+import json
+import time
+from datetime import timedelta
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models import models, schemas
+from routers.responses import rows_response
+from .common import next_free_day
+
+COLUMNS = ("id", "start_time", "end_time", "user_id", "table_id")
+
+
+def make_rows(count: int) -> list[tuple]:
+    day = next_free_day()
+    return [
+        (i, day + timedelta(hours=i % 11 + 9), day + timedelta(hours=i % 11 + 10), i % 1000, i % 500)
+        for i in range(count)
+    ]
+
+
+def orm_path(rows: list[tuple]) -> bytes:
+    entities = [models.Booking(**dict(zip(COLUMNS, row))) for row in rows]
+    adapter = TypeAdapter(list[schemas.BookingShow])
+    validated = adapter.validate_python(entities, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def rows_path(rows: list[tuple]) -> bytes:
+    return rows_response(dict(zip(COLUMNS, row)) for row in rows).body
+
+
+def measure(func, rows: list[tuple], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {name: measure(func, rows, args.repeat) for name, func in (("orm", orm_path), ("rows", rows_path))}
+    for name, elapsed in results.items():
+        print(f"{name:5} {elapsed * 1000:8.1f} ms total, {elapsed / args.rows * 1e6:6.2f} us/row")
+    print(f"speedup: {results['orm'] / results['rows']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+    Python-side cost of turning the hot crud queries into SQL, per call.
+
+    For get_user_by_username, the full free-table search of
+    get_available_table and the INSERT ... SELECT of book_available_table it
+    times, against the asyncpg dialect and without a database:
+
+      rebuilt, no cache   the statement built per call and compiled every time
+      rebuilt, cached     built per call, compiled SQL found by its cache key
+                          (what every request paid before the templates)
+      template, cached    the prebuilt crud template, only the cache lookup
+
+    `--db` also times get_user_by_username round trips against the database
+    from `.env` with the asyncpg prepared statement cache off and on:
+
+        python -m benchmarks.statement_cache --calls 20000 --db
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, literal, DateTime, Integer
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from config import settings
+from models import crud, models
+from models.database import DATABASE_URL, engine
+from models.schemas import TableType
+from .common import summarize
+
+TABLE_TYPE = TableType.four_guest_table
+START_TIME = datetime(2030, 1, 15, 12)
+END_TIME = START_TIME + timedelta(hours=2)
+
+
+# Запросы в том виде, в каком crud строил их до шаблонов
+def rebuilt_user(username: str):
+    return select(models.User).where(models.User.username == username)
+
+
+def rebuilt_search(table_type: TableType, start_time: datetime, end_time: datetime):
+    table_filter, type_order = crud._candidate_tables(table_type)
+    return select(models.Table).where(
+        table_filter,
+        crud._table_free_clause(start_time, end_time)
+    ).order_by(*type_order, models.Table.id)
+
+
+def rebuilt_booking(table_type: TableType, start_time: datetime, end_time: datetime, user_id: int, preferred_id: int):
+    table_filter, type_order = crud._candidate_tables(table_type)
+    free_table = select(
+        literal(start_time, DateTime),
+        literal(end_time, DateTime),
+        literal(user_id, Integer),
+        models.Table.id,
+    ).where(
+        table_filter,
+        crud._table_free_clause(start_time, end_time)
+    ).order_by((models.Table.id == preferred_id).desc(), *type_order, models.Table.id).limit(1)
+    return insert(models.Booking).from_select(
+        ["start_time", "end_time", "user_id", "table_id"], free_table
+    ).returning(*crud.BOOKING_COLUMNS)
+
+
+QUERIES = {
+    "get_user_by_username": (
+        lambda i: rebuilt_user(f"user_{i}"),
+        lambda i: crud.USER_BY_USERNAME,
+    ),
+    "get_available_table": (
+        lambda i: rebuilt_search(TABLE_TYPE, START_TIME + timedelta(days=i % 90), END_TIME + timedelta(days=i % 90)),
+        lambda i: crud._free_table_search(TABLE_TYPE),
+    ),
+    "book_available_table": (
+        lambda i: rebuilt_booking(TABLE_TYPE, START_TIME, END_TIME, i, i % 1000),
+        lambda i: crud._book_free_table(TABLE_TYPE, True),
+    ),
+}
+
+
+def compile_cached(stmt, cache: dict):
+    # тот же путь, что проходит Connection.execute до вызова драйвера
+    compiled, _, _ = stmt._compile_w_cache(engine.dialect, compiled_cache=cache, column_keys=[])
+    return compiled
+
+
+def time_per_call(calls: int, step) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        step(i)
+    return (time.perf_counter() - started) / calls
+
+
+def run_compile(calls: int):
+    for name, (rebuilt, template) in QUERIES.items():
+        cache = {}
+        compile_cached(template(0), cache)
+        results = {
+            "rebuilt, no cache": time_per_call(calls // 10, lambda i: rebuilt(i).compile(dialect=engine.dialect)),
+            "rebuilt, cached": time_per_call(calls, lambda i: compile_cached(rebuilt(i), cache)),
+            "template, cached": time_per_call(calls, lambda i: compile_cached(template(i), cache)),
+        }
+        print(name)
+        for variant, seconds in results.items():
+            speedup = results["rebuilt, cached"] / seconds
+            print(f"    {variant:<18} {seconds * 1e6:8.1f} us/call   x{speedup:.1f} vs rebuilt, cached")
+
+
+async def time_round_trips(cache_size: int, username: str, calls: int) -> dict:
+    bench_engine = create_async_engine(
+        DATABASE_URL, pool_size=1, connect_args={"prepared_statement_cache_size": cache_size},
+    )
+    latencies = []
+    async with async_sessionmaker(bind=bench_engine, class_=AsyncSession)() as db:
+        await crud.get_user_by_username(db, username)
+        for _ in range(calls):
+            started = time.perf_counter()
+            await crud.get_user_by_username(db, username)
+            latencies.append(time.perf_counter() - started)
+    await bench_engine.dispose()
+    return summarize(latencies)
+
+
+async def run_db(calls: int):
+    async with async_sessionmaker(bind=engine, class_=AsyncSession)() as db:
+        username = await db.scalar(select(models.User.username).order_by(models.User.id).limit(1))
+    await engine.dispose()
+    if username is None:
+        raise SystemExit("register at least one user first")
+    cache_size = settings.db_prepared_statement_cache_size or 100
+    print("get_user_by_username round trips")
+    print("    prepared statement cache off:", await time_round_trips(0, username, calls))
+    print(f"    prepared statement cache {cache_size}:", await time_round_trips(cache_size, username, calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--db", action="store_true", help="also time round trips against the database")
+    args = parser.parse_args()
+    run_compile(args.calls)
+    if args.db:
+        asyncio.run(run_db(min(args.calls, 5_000)))
+
+
+if __name__ == "__main__":
+    main()
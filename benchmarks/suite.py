@@ -0,0 +1,145 @@
+"""
+    Run the load scenarios of benchmarks.scenarios against `main.app` and save
+    the per-endpoint results as JSON, or compare two saved results.
+
+        python -m benchmarks.suite run --seed --seed-bookings 1000000 --out results/base.json
+        python -m benchmarks.suite run --transport uvicorn --workers 4 --out results/head.json
+        python -m benchmarks.suite compare results/base.json results/head.json --threshold 10
+
+    `compare` exits with code 1 when p95 latency of any endpoint grew (or its
+    throughput fell) by more than the threshold percent. Seeding writes
+    directly with generate_series and is meant for a disposable database.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .common import Recorder, app_client, uvicorn_client
+from .explain_check import seed
+from .scenarios import SCENARIOS, prepare
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    if args.seed:
+        await seed(args.seed_users, args.seed_tables, args.seed_bookings)
+
+    if args.transport == "uvicorn":
+        client_context = uvicorn_client(port=args.port, workers=args.workers, limit=args.concurrency)
+    else:
+        client_context = app_client(limit=args.concurrency)
+
+    results = {}
+    async with client_context as client:
+        ctx = await prepare(client, users=args.users, tables_per_type=args.tables_per_type,
+                            concurrency=args.concurrency, days_ahead=args.days_ahead,
+                            logins_per_user=args.logins_per_user, export_pages=args.export_pages)
+        for name in args.scenario or SCENARIOS:
+            recorder = Recorder()
+            started = time.perf_counter()
+            await SCENARIOS[name](client, recorder, ctx)
+            elapsed = time.perf_counter() - started
+            results[name] = {"elapsed_s": round(elapsed, 3), "endpoints": recorder.report()}
+            print(f"{name}: {elapsed:.2f}s", file=sys.stderr)
+        # блокировки event loop по данным сторожа (в режиме asgi туда входит и сам клиент)
+        event_loop = (await client.get("/admin/loop", headers=ctx.admin)).json()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "uvicorn" else None,
+            "users": args.users,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+        "event_loop": event_loop,
+    }
+
+
+def compare(base: dict, head: dict, threshold: float, min_ms: float) -> list[str]:
+    """Human readable regressions of `head` against `base`"""
+    regressions = []
+    base_blocked = base.get("event_loop", {}).get("blocked", 0)
+    head_blocked = head.get("event_loop", {}).get("blocked", 0)
+    print(f"event loop blocks: {base_blocked} -> {head_blocked}")
+    for scenario, head_result in head["scenarios"].items():
+        base_endpoints = base["scenarios"].get(scenario, {}).get("endpoints", {})
+        for label, new in head_result["endpoints"].items():
+            old = base_endpoints.get(label)
+            if old is None:
+                continue
+            change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            marker = ""
+            # мелкие абсолютные сдвиги (меньше min_ms) считаем шумом
+            if change > threshold and new["p95_ms"] - old["p95_ms"] > min_ms:
+                marker = "  <-- p95 regression"
+                regressions.append(f"{scenario} / {label}: p95 {old['p95_ms']} -> {new['p95_ms']} ms ({change:+.1f}%)")
+            if old["throughput_rps"] and new["throughput_rps"] < old["throughput_rps"] * (1 - threshold / 100):
+                marker += "  <-- throughput regression"
+                regressions.append(f"{scenario} / {label}: throughput "
+                                   f"{old['throughput_rps']} -> {new['throughput_rps']} rps")
+            print(f"{scenario:20} {label:45} p95 {old['p95_ms']:>9} -> {new['p95_ms']:>9} ms "
+                  f"({change:+6.1f}%){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    run_parser.add_argument("--port", type=int, default=8765)
+    run_parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                            help="run only this scenario, may be repeated")
+    run_parser.add_argument("--users", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=100)
+    run_parser.add_argument("--tables-per-type", type=int, default=20)
+    run_parser.add_argument("--days-ahead", type=int, default=30)
+    run_parser.add_argument("--logins-per-user", type=int, default=2)
+    run_parser.add_argument("--export-pages", type=int, default=50)
+    run_parser.add_argument("--seed", action="store_true", help="seed the database before running")
+    run_parser.add_argument("--seed-users", type=int, default=10_000)
+    run_parser.add_argument("--seed-tables", type=int, default=100)
+    run_parser.add_argument("--seed-bookings", type=int, default=1_000_000)
+    run_parser.add_argument("--out", type=Path, help="write JSON results to this file")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("head", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=10, help="allowed regression, percent")
+    compare_parser.add_argument("--min-ms", type=float, default=1, help="ignore p95 changes smaller than this")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        results = asyncio.run(run(args))
+        output = json.dumps(results, indent=2)
+        if args.out:
+            args.out.parent.mkdir(parents=True, exist_ok=True)
+            args.out.write_text(output)
+        print(output)
+    else:
+        regressions = compare(json.loads(args.base.read_text()), json.loads(args.head.read_text()),
+                              args.threshold, args.min_ms)
+        if regressions:
+            print("\nRegressions:\n" + "\n".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+    Waitlist assignment throughput and queue latency.
+
+    All tables of one type are booked for a slot, `--waiting` users join the
+    waitlist for it, then `--freed` new tables are added at once. Reports how
+    long the background worker took to assign them (assignments per second)
+    and the queue latency (assigned_at - created_at) of the assigned entries.
+    Also times one cancellation -> assignment round trip.
+
+        python -m benchmarks.waitlist --waiting 500 --freed 200
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from models.database import SessionLocal
+from .common import app_client, login, login_admin, next_free_day, summarize
+
+TABLE_TYPE = "eight guest table"
+
+
+async def assigned_entries(entry_ids: list[int]) -> list[tuple[int, float]]:
+    async with SessionLocal() as db:
+        result = await db.execute(text(
+            "SELECT id, extract(epoch FROM assigned_at - created_at) FROM waitlist "
+            "WHERE id = ANY(:ids) AND status = 'assigned'"
+        ), {"ids": entry_ids})
+        return [(entry_id, float(latency)) for entry_id, latency in result]
+
+
+async def wait_assigned(entry_ids: list[int], expected: int, timeout: float = 120) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if len(await assigned_entries(entry_ids)) >= expected:
+            return time.perf_counter() - started
+        await asyncio.sleep(0.01)
+    raise TimeoutError(f"fewer than {expected} entries assigned in {timeout}s")
+
+
+async def run(waiting: int, freed: int, days_ahead: int):
+    async with app_client() as client:
+        admin = await login_admin(client)
+        user = await login(client, "bench_waitlist", "bench_waitlist")
+        start_time = next_free_day(days_ahead).replace(hour=15)
+        params = {
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=2)).isoformat(),
+            "table_type": TABLE_TYPE,
+        }
+
+        # занимаем все столы этого типа на выбранный слот
+        booked = []
+        while True:
+            response = await client.post("/bookings/create", params=params, headers=user)
+            if response.status_code != 200:
+                break
+            booked.append(response.json()["id"])
+
+        entry_ids = []
+        for _ in range(waiting):
+            response = await client.post("/bookings/create", params={**params, "waitlist": "true"}, headers=user)
+            response.raise_for_status()
+            entry_ids.append(response.json()["id"])
+
+        # одна отмена -> одно назначение
+        cancel_seconds = None
+        if booked:
+            started = time.perf_counter()
+            response = await client.delete(f"/bookings/delete_booking/{booked[0]}", headers=user)
+            response.raise_for_status()
+            await wait_assigned(entry_ids, 1)
+            cancel_seconds = time.perf_counter() - started
+
+        response = await client.post("/tables/bulk_add", headers=admin, json={"table_type": TABLE_TYPE, "count": freed})
+        response.raise_for_status()
+        expected = min(waiting, freed + (1 if booked else 0))
+        assign_seconds = await wait_assigned(entry_ids, expected)
+
+        stats = (await client.get("/admin/waitlist", headers=admin)).json()
+        latencies = [latency for _, latency in await assigned_entries(entry_ids)]
+
+        # убираем за собой добавленные столы вместе с бронями
+        table_ids = [table["id"] for table in response.json()]
+        await client.post("/tables/bulk_delete", headers=admin, json={"ids": table_ids})
+
+    print(f"booked tables:      {len(booked)}, waiting entries: {waiting}, freed tables: {freed}")
+    if cancel_seconds is not None:
+        print(f"cancel -> assigned: {cancel_seconds * 1000:.1f} ms")
+    print(f"assigned {expected} in {assign_seconds:.3f}s ({expected / assign_seconds:.0f} assignments/s)")
+    print("queue latency:     ", summarize(latencies))
+    print("worker:            ", stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiting", type=int, default=500)
+    parser.add_argument("--freed", type=int, default=200)
+    parser.add_argument("--days-ahead", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(run(args.waiting, args.freed, args.days_ahead))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import asyncio
+
+
+def redis_from_url(url: str, setting: str):
+    """
+        redis.asyncio client for `url`. The redis package is optional and only
+        needed when `setting` selects the redis backend.
+    """
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError as exc:
+        raise RuntimeError(f"{setting}=redis requires the `redis` package") from exc
+    return redis_asyncio.Redis.from_url(url)
+
+
+def client_errors() -> tuple[type[Exception], ...]:
+    """
+        Exceptions of an unreachable or slow Redis, after which the callers
+        fall back to per-worker state
+    """
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        return OSError, asyncio.TimeoutError
+    return RedisError, OSError, asyncio.TimeoutError
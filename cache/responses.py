@@ -0,0 +1,205 @@
+import hashlib
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+
+from config import settings
+from workers.listener import pg_listener
+from .lru import TTLCache
+from .redis_client import redis_from_url
+
+# Канал Postgres NOTIFY, payload - ключ ответа, изменённого в каком-то из воркеров
+RESPONSE_CACHE_CHANNEL = "response_cache"
+
+# Запись в Redis, только если поколение ключа не изменилось с начала промаха
+FILL_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[2] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+    media_type: str = "application/json"
+
+    @classmethod
+    def build(cls, body: bytes) -> "CachedResponse":
+        return cls(etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body=body)
+
+    def dumps(self) -> bytes:
+        return self.etag.encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, value: bytes) -> "CachedResponse":
+        etag, body = value.split(b"\n", 1)
+        return cls(etag=etag.decode(), body=body)
+
+    def not_modified(self, request: Request) -> bool:
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in tags or self.etag in tags
+
+    def to_response(self, request: Request) -> Response:
+        """
+            304 without a body when the client already has this version, the cached body otherwise
+        """
+        # no-cache: клиент может хранить ответ, но обязан перепроверять его через If-None-Match
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class MemoryBackend:
+    """
+        Per-process backend. Writes made through other workers arrive as
+        RESPONSE_CACHE_CHANNEL notifications, see ResponseCache.start.
+    """
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._generations: dict[str, int] = {}
+        # растёт при сбросе всех ключей, входит в поколение каждого ключа
+        self._epoch = 0
+
+    async def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    async def generation(self, key: str) -> int:
+        return self._epoch + self._generations.get(key, 0)
+
+    async def set_if_generation(self, key: str, value: bytes, ttl: float, generation: int) -> bool:
+        if await self.generation(key) != generation:
+            return False
+        self._cache.set(key, value)
+        return True
+
+    async def invalidate(self, key: str):
+        self.drop(key)
+
+    def drop(self, key: str | None):
+        """
+            Invalidate `key`, or every key for None; synchronous for the
+            pg_listener callback
+        """
+        if key is None:
+            self._epoch += 1
+            self._cache.clear()
+        else:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._cache.invalidate(key)
+
+    def stats(self) -> dict:
+        return {"size": len(self._cache), "max_size": self._cache.max_size, "evictions": self._cache.evictions}
+
+
+class RedisBackend:
+    """
+        Backend shared by all workers, the generations live in Redis next to
+        the bodies (`<key>:gen`), so a fill of any worker checks invalidations
+        of all of them. `client` is anything with the async get / incr / delete /
+        eval methods of redis.asyncio.Redis, so a fake client can stand in for
+        a real server.
+    """
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "response:"):
+        self._client = client
+        self._prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(self._prefix + key)
+
+    async def generation(self, key: str) -> int:
+        return int(await self._client.get(self._prefix + key + ":gen") or 0)
+
+    async def set_if_generation(self, key: str, value: bytes, ttl: float, generation: int) -> bool:
+        stored = await self._client.eval(
+            FILL_SCRIPT, 2, self._prefix + key, self._prefix + key + ":gen",
+            value, str(generation), max(1, round(ttl)),
+        )
+        return bool(stored)
+
+    async def invalidate(self, key: str):
+        # сначала поколение: заполнение, начатое до сброса, уже не запишет старое тело
+        await self._client.incr(self._prefix + key + ":gen")
+        await self._client.delete(self._prefix + key)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ResponseCache:
+    """
+        Encoded response bodies with their ETags, invalidated explicitly by the
+        code that changes the underlying data.
+
+        A miss that started before an invalidation does not store its (possibly
+        stale) body afterwards: `fill` only writes if the key's generation, kept
+        by the backend, has not changed since the miss.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def start(self):
+        # у каждого воркера своя копия в памяти: записи других воркеров приходят уведомлениями
+        if isinstance(self.backend, MemoryBackend):
+            pg_listener.subscribe(RESPONSE_CACHE_CHANNEL, self.backend.drop)
+
+    async def generation(self, key: str) -> int:
+        """Read before loading the data a following `fill` stores"""
+        return await self.backend.generation(key)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResponse.loads(value)
+
+    async def fill(self, key: str, body: bytes, generation: int) -> CachedResponse:
+        cached = CachedResponse.build(body)
+        await self.backend.set_if_generation(key, cached.dumps(), self.ttl, generation)
+        return cached
+
+    async def invalidate(self, key: str):
+        self.invalidations += 1
+        await self.backend.invalidate(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+
+def make_backend():
+    if settings.response_cache_backend == "redis":
+        return RedisBackend(redis_from_url(settings.response_cache_redis_url, "RESPONSE_CACHE_BACKEND"))
+    return MemoryBackend(max_size=settings.response_cache_max_size, ttl=settings.response_cache_ttl_seconds)
+
+
+# Закодированные ответы публичных списков; ключи ниже сбрасывает crud после записи
+response_cache = ResponseCache(make_backend(), ttl=settings.response_cache_ttl_seconds)
+
+TABLES_RESPONSE_KEY = "tables:list"
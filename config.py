@@ -1,18 +1,209 @@
-from dotenv import load_dotenv
+from dataclasses import dataclass
 import os
 
+from dotenv import load_dotenv
+
 load_dotenv()
 
-DB_HOST = os.environ.get("DB_HOST")
-DB_PORT = os.environ.get("DB_PORT")
-DB_NAME = os.environ.get("DB_NAME")
-DB_USER = os.environ.get("DB_USER")
-DB_PASS = os.environ.get("DB_PASS")
 
-ADMIN_NAME = os.environ.get("ADMIN_NAME")
-ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL")
-ADMIN_PASS = os.environ.get("ADMIN_PASS")
+def _env_str(name: str, default: str | None = None) -> str | None:
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+        Service settings, read from the environment (and `.env`) once at import time
+    """
+    db_host: str | None
+    db_port: int
+    db_name: str | None
+    db_user: str | None
+    db_pass: str | None
+    # Необязательная реплика для чтения, полный URL SQLAlchemy (postgresql+asyncpg://...)
+    db_read_url: str | None
+    # Сколько секунд после своей записи пользователь читает из основной БД
+    db_read_your_writes_seconds: float
+    # Где хранятся эти отметки: memory (в каждом воркере) или redis (общие)
+    db_read_your_writes_backend: str
+    db_read_your_writes_redis_url: str | None
+
+    # Пул соединений и параметры asyncpg
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    db_statement_timeout_ms: int
+    db_prepared_statement_cache_size: int
+    # Кэш скомпилированных SQLAlchemy запросов на движок, записей
+    db_query_cache_size: int
+
+    admin_name: str | None
+    admin_email: str | None
+    admin_pass: str | None
+
+    secret_key: str | None
+    algorithm: str | None
+    access_token_expire_minutes: int
+
+    user_cache_ttl_seconds: float
+    user_cache_max_size: int
+    # Класть uid/adm/dis в токен и не обращаться к БД при проверке токена
+    token_embed_claims: bool
+    # Срок жизни таких токенов: отозвать права из них до истечения нельзя
+    claims_token_expire_minutes: int
+
+    # Кэш сетки свободных столов по дням (GET /bookings/availability)
+    availability_cache_ttl_seconds: float
+    availability_cache_max_days: int
+
+    # Выбор стола для брони: first_fit или best_fit; при нехватке столов - стол большего типа
+    allocation_strategy: str
+    allocation_upgrade: bool
+
+    # Кэш ответов GET /tables/: memory (в каждом воркере) или redis (общий)
+    response_cache_backend: str
+    response_cache_redis_url: str | None
+    response_cache_ttl_seconds: float
+    response_cache_max_size: int
+
+    # Пул для bcrypt: thread или process, 0 воркеров = по числу CPU
+    password_hash_executor: str
+    password_hash_workers: int
+    password_hash_max_queue: int
+
+    # Ограничение частоты (token bucket на пользователя / IP) и параллельности по классам маршрутов
+    rate_limit_enabled: bool
+    rate_limit_backend: str
+    rate_limit_redis_url: str | None
+    rate_limit_bookings_per_minute: float
+    rate_limit_bookings_burst: int
+    rate_limit_auth_per_minute: float
+    rate_limit_auth_burst: int
+    # 0 = db_pool_size + db_max_overflow
+    concurrency_bookings_limit: int
+    # 0 = без ограничения (bcrypt и так ограничен своим пулом)
+    concurrency_auth_limit: int
+    concurrency_max_queue: int
+    concurrency_queue_timeout_seconds: float
+
+    # Очередь ожидания: фоновый воркер, размер пачки назначений, период полного обхода
+    waitlist_enabled: bool
+    waitlist_batch_size: int
+    waitlist_sweep_seconds: float
+
+    # Поток изменений свободных столов (SSE / WebSocket): лимит подписчиков на воркер,
+    # сколько сообщений ждёт отправки медленному клиенту до сброса, период heartbeat
+    live_updates_enabled: bool
+    live_updates_max_subscribers: int
+    live_updates_max_pending: int
+    live_updates_heartbeat_seconds: float
+
+    # Секции bookings по месяцам: на сколько месяцев вперёд создавать, сколько прошедших
+    # месяцев держать в горячих секциях до переноса в bookings_archive, период обслуживания
+    partition_maintenance_enabled: bool
+    partition_maintenance_interval_seconds: float
+    bookings_partition_months_ahead: int
+    bookings_hot_months: int
+
+    # Метрики: GET /metrics, заголовок Server-Timing, лог медленных запросов (0 = выключен)
+    metrics_enabled: bool
+    server_timing_enabled: bool
+    slow_query_ms: float
+
+    # Сторож event loop: период проверки, порог блокировки, в debug логировать стек блокирующего кода
+    loop_watchdog_enabled: bool
+    loop_watchdog_interval_ms: float
+    loop_block_threshold_ms: float
+    loop_watchdog_debug: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            db_host=_env_str("DB_HOST"),
+            db_port=_env_int("DB_PORT", 5432),
+            db_name=_env_str("DB_NAME"),
+            db_user=_env_str("DB_USER"),
+            db_pass=_env_str("DB_PASS"),
+            db_read_url=_env_str("DB_READ_URL") or None,
+            db_read_your_writes_seconds=_env_float("DB_READ_YOUR_WRITES_SECONDS", 5),
+            db_read_your_writes_backend=_env_str("DB_READ_YOUR_WRITES_BACKEND", "memory"),
+            db_read_your_writes_redis_url=_env_str("DB_READ_YOUR_WRITES_REDIS_URL", "redis://localhost:6379/0"),
+            db_pool_size=_env_int("DB_POOL_SIZE", 5),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            db_pool_timeout=_env_float("DB_POOL_TIMEOUT", 30),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", -1),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", False),
+            db_statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 0),
+            db_prepared_statement_cache_size=_env_int("DB_PREPARED_STATEMENT_CACHE_SIZE", 100),
+            db_query_cache_size=_env_int("DB_QUERY_CACHE_SIZE", 500),
+            admin_name=_env_str("ADMIN_NAME"),
+            admin_email=_env_str("ADMIN_EMAIL"),
+            admin_pass=_env_str("ADMIN_PASS"),
+            secret_key=_env_str("SECRET_KEY"),
+            algorithm=_env_str("ALGORITHM"),
+            access_token_expire_minutes=_env_int("ACCESS_TOKEN_EXPIRE_MINUTES", 30),
+            user_cache_ttl_seconds=_env_float("USER_CACHE_TTL_SECONDS", 60),
+            user_cache_max_size=_env_int("USER_CACHE_MAX_SIZE", 10000),
+            token_embed_claims=_env_bool("TOKEN_EMBED_CLAIMS", False),
+            claims_token_expire_minutes=_env_int("CLAIMS_TOKEN_EXPIRE_MINUTES", 5),
+            availability_cache_ttl_seconds=_env_float("AVAILABILITY_CACHE_TTL_SECONDS", 30),
+            availability_cache_max_days=_env_int("AVAILABILITY_CACHE_MAX_DAYS", 400),
+            allocation_strategy=_env_str("ALLOCATION_STRATEGY", "best_fit"),
+            allocation_upgrade=_env_bool("ALLOCATION_UPGRADE", False),
+            response_cache_backend=_env_str("RESPONSE_CACHE_BACKEND", "memory"),
+            response_cache_redis_url=_env_str("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+            response_cache_ttl_seconds=_env_float("RESPONSE_CACHE_TTL_SECONDS", 300),
+            response_cache_max_size=_env_int("RESPONSE_CACHE_MAX_SIZE", 256),
+            password_hash_executor=_env_str("PASSWORD_HASH_EXECUTOR", "thread"),
+            password_hash_workers=_env_int("PASSWORD_HASH_WORKERS", 0),
+            password_hash_max_queue=_env_int("PASSWORD_HASH_MAX_QUEUE", 64),
+            rate_limit_enabled=_env_bool("RATE_LIMIT_ENABLED", True),
+            rate_limit_backend=_env_str("RATE_LIMIT_BACKEND", "memory"),
+            rate_limit_redis_url=_env_str("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"),
+            rate_limit_bookings_per_minute=_env_float("RATE_LIMIT_BOOKINGS_PER_MINUTE", 60),
+            rate_limit_bookings_burst=_env_int("RATE_LIMIT_BOOKINGS_BURST", 10),
+            rate_limit_auth_per_minute=_env_float("RATE_LIMIT_AUTH_PER_MINUTE", 10),
+            rate_limit_auth_burst=_env_int("RATE_LIMIT_AUTH_BURST", 5),
+            concurrency_bookings_limit=_env_int("CONCURRENCY_BOOKINGS_LIMIT", 0),
+            concurrency_auth_limit=_env_int("CONCURRENCY_AUTH_LIMIT", 0),
+            concurrency_max_queue=_env_int("CONCURRENCY_MAX_QUEUE", 50),
+            concurrency_queue_timeout_seconds=_env_float("CONCURRENCY_QUEUE_TIMEOUT_SECONDS", 1),
+            waitlist_enabled=_env_bool("WAITLIST_ENABLED", True),
+            waitlist_batch_size=_env_int("WAITLIST_BATCH_SIZE", 100),
+            waitlist_sweep_seconds=_env_float("WAITLIST_SWEEP_SECONDS", 30),
+            live_updates_enabled=_env_bool("LIVE_UPDATES_ENABLED", True),
+            live_updates_max_subscribers=_env_int("LIVE_UPDATES_MAX_SUBSCRIBERS", 20000),
+            live_updates_max_pending=_env_int("LIVE_UPDATES_MAX_PENDING", 100),
+            live_updates_heartbeat_seconds=_env_float("LIVE_UPDATES_HEARTBEAT_SECONDS", 15),
+            partition_maintenance_enabled=_env_bool("PARTITION_MAINTENANCE_ENABLED", True),
+            partition_maintenance_interval_seconds=_env_float("PARTITION_MAINTENANCE_INTERVAL_SECONDS", 3600),
+            bookings_partition_months_ahead=_env_int("BOOKINGS_PARTITION_MONTHS_AHEAD", 3),
+            bookings_hot_months=_env_int("BOOKINGS_HOT_MONTHS", 3),
+            metrics_enabled=_env_bool("METRICS_ENABLED", True),
+            server_timing_enabled=_env_bool("SERVER_TIMING_ENABLED", True),
+            slow_query_ms=_env_float("SLOW_QUERY_MS", 200),
+            loop_watchdog_enabled=_env_bool("LOOP_WATCHDOG_ENABLED", True),
+            loop_watchdog_interval_ms=_env_float("LOOP_WATCHDOG_INTERVAL_MS", 100),
+            loop_block_threshold_ms=_env_float("LOOP_BLOCK_THRESHOLD_MS", 100),
+            loop_watchdog_debug=_env_bool("LOOP_WATCHDOG_DEBUG", False),
+        )
+
 
-SECRET_KEY = os.environ.get("SECRET_KEY")
-ALGORITHM = os.environ.get("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES")
\ No newline at end of file
+settings = Settings.from_env()
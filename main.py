@@ -1,17 +1,79 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
-from routers import bookings, users, tables
+from config import settings
+from routers import bookings, users, tables, admin, export, metrics, waitlist, live
 from auth import auth
+from auth.cache import evict_user
+from auth.hashing import password_hasher
+from cache.responses import response_cache
+from models import crud
+from models.availability import availability_index
+from models.database import SessionLocal, engine, read_engine
+from monitoring.sql import instrument_engine
+from monitoring.timing import TimingMiddleware
+from monitoring.watchdog import loop_watchdog
+from workers.broadcast import availability_broadcaster
+from workers.listener import pg_listener
+from workers.partitions import partition_maintenance
+from workers.waitlist import waitlist_worker
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.loop_watchdog_enabled:
+        loop_watchdog.start()
+    try:
+        async with SessionLocal() as db:
+            await availability_index.rebuild(db)
+    except Exception:
+        # Без индекса сервис продолжает работать, выбирая столы запросом к БД
+        logger.exception("Failed to load availability index")
+    availability_index.start_pruning()
+    if settings.waitlist_enabled:
+        waitlist_worker.start()
+    if settings.live_updates_enabled:
+        availability_broadcaster.start()
+    if settings.partition_maintenance_enabled:
+        partition_maintenance.start()
+    pg_listener.subscribe(crud.USER_CHANNEL, evict_user)
+    response_cache.start()
+    pg_listener.start()
+    yield
+    await partition_maintenance.stop()
+    await availability_index.stop_pruning()
+    await pg_listener.stop()
+    await waitlist_worker.stop()
+    await loop_watchdog.stop()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
     title="Happy Coon Coffee tables reservation service",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+if settings.metrics_enabled:
+    instrument_engine(engine)
+    instrument_engine(read_engine)
+    app.add_middleware(TimingMiddleware)
+    app.include_router(metrics.router)
+
 app.include_router(bookings.router)
+app.include_router(waitlist.router)
+if settings.live_updates_enabled:
+    app.include_router(live.router)
+app.include_router(export.router)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(tables.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
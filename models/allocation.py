@@ -0,0 +1,85 @@
+from datetime import date
+from enum import Enum
+
+from config import settings
+from .occupancy import DAY_HOURS, OccupancyMap
+from .schemas import TableType
+
+
+class AllocationStrategy(str, Enum):
+    # первый свободный стол по id
+    first_fit = "first_fit"
+    # стол, у которого бронь плотнее всего прилегает к соседним
+    best_fit = "best_fit"
+
+
+def gaps_around(day_mask: int, mask: int) -> tuple[int, int]:
+    """
+        Free hours left right before and right after `mask` on a table whose
+        day is `day_mask`, i.e. the pieces the booking cuts its free run into
+    """
+    first = (mask & -mask).bit_length() - 1
+    last = mask.bit_length()
+    before = first - (day_mask & ((1 << first) - 1)).bit_length()
+    above = day_mask >> last
+    after = (above & -above).bit_length() - 1 if above else DAY_HOURS - last
+    return before, after
+
+
+def fit_key(day_mask: int, mask: int) -> tuple[int, int]:
+    """
+        Best-fit order: the smallest free run first, then the booking that sits
+        against a neighbour (one leftover piece rather than two)
+    """
+    before, after = gaps_around(day_mask, mask)
+    return before + after, min(before, after)
+
+
+class TableAllocator:
+    """
+        Picks the table for a booking from the hour bitmaps of an OccupancyMap.
+
+        First-fit takes the lowest free table id, which over a day scatters
+        bookings across tables and leaves short gaps nobody can use. Best-fit
+        looks at the free tables only and picks the one whose free run around
+        the requested hours is the tightest, so whole runs stay open for long
+        bookings. Both are O(tables) big-int and small-int operations per pick.
+
+        With `upgrade` a booking that does not fit any table of the requested
+        type gets a free table of the next larger type.
+    """
+
+    def __init__(self, strategy: AllocationStrategy, upgrade: bool):
+        self.strategy = strategy
+        self.upgrade = upgrade
+
+    def candidate_types(self, table_type) -> list[str]:
+        """Requested table type and, with upgrades, the larger ones in order of size"""
+        types = [table_type.value for table_type in TableType]
+        requested = TableType(table_type).value
+        if not self.upgrade:
+            return [requested]
+        return types[types.index(requested):]
+
+    def pick_of_type(self, occupancy: OccupancyMap, table_type: str, day: date, mask: int) -> int | None:
+        if self.strategy is AllocationStrategy.first_fit:
+            return occupancy.first_free(table_type, day, mask)
+        free = occupancy.free_table_masks(table_type, day, mask)
+        if not free:
+            return None
+        # min() оставляет первый из равных, то есть стол с меньшим id
+        table_id, _ = min(free, key=lambda table: fit_key(table[1], mask))
+        return table_id
+
+    def pick(self, occupancy: OccupancyMap, table_type, day: date, mask: int) -> int | None:
+        for candidate in self.candidate_types(table_type):
+            table_id = self.pick_of_type(occupancy, candidate, day, mask)
+            if table_id is not None:
+                return table_id
+        return None
+
+
+table_allocator = TableAllocator(
+    strategy=AllocationStrategy(settings.allocation_strategy),
+    upgrade=settings.allocation_upgrade,
+)
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.lru import TTLCache
+from config import settings
+from . import models
+from .allocation import table_allocator
+from .occupancy import OccupancyMap, day_window, hours_mask, occupancy_mask
+from .schemas import OPENING_HOUR, CLOSING_HOUR, MIN_BOOKING_HOURS, MAX_BOOKING_HOURS, TableType
+
+logger = logging.getLogger(__name__)
+
+# Как часто индекс забывает закончившиеся брони
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _type_key(table_type) -> str:
+    # schemas.TableType is a str Enum, models.Table.table_type is a plain string
+    return getattr(table_type, "value", table_type)
+
+
+class TableSchedule:
+    """
+        Upcoming bookings of a single table, sorted by start time.
+
+        Bookings of one table never overlap, so `ends` is sorted as well and
+        an overlap check is a single bisect.
+    """
+    __slots__ = ("starts", "ends", "booking_ids")
+
+    def __init__(self):
+        self.starts: list[datetime] = []
+        self.ends: list[datetime] = []
+        self.booking_ids: list[int] = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, booking_id: int, start_time: datetime, end_time: datetime):
+        i = bisect_right(self.starts, start_time)
+        self.starts.insert(i, start_time)
+        self.ends.insert(i, end_time)
+        self.booking_ids.insert(i, booking_id)
+
+    def remove(self, booking_id: int, start_time: datetime):
+        i = bisect_left(self.starts, start_time)
+        while i < len(self.starts) and self.starts[i] == start_time:
+            if self.booking_ids[i] == booking_id:
+                del self.starts[i], self.ends[i], self.booking_ids[i]
+                return
+            i += 1
+
+    def is_free(self, start_time: datetime, end_time: datetime) -> bool:
+        # first booking that ends after the requested start is the only candidate for an overlap
+        i = bisect_right(self.ends, start_time)
+        return i == len(self.starts) or self.starts[i] >= end_time
+
+    def prune(self, before: datetime):
+        i = bisect_right(self.ends, before)
+        if i:
+            del self.starts[:i], self.ends[:i], self.booking_ids[:i]
+
+
+class AvailabilityIndex:
+    """
+        Per-process index of upcoming bookings grouped by table type.
+
+        Hour-aligned requests within one day (all bookings made through the API)
+        are answered from the hour bitmaps of `occupancy`; anything else falls
+        back to the sorted per-table schedules.
+
+        It is only a hint: a table returned by `pick_table` must still be
+        confirmed against the database, since other workers may have written
+        bookings this process has not seen.
+    """
+
+    def __init__(self):
+        self._tables_by_type: dict[str, list[int]] = {}
+        self._table_types: dict[int, str] = {}
+        self._schedules: dict[int, TableSchedule] = {}
+        self._bookings: dict[int, tuple[int, datetime]] = {}
+        self.occupancy = OccupancyMap()
+        self.loaded = False
+        self._prune_task: asyncio.Task | None = None
+
+    def clear(self):
+        self._tables_by_type.clear()
+        self._table_types.clear()
+        self._schedules.clear()
+        self._bookings.clear()
+        self.occupancy.clear()
+        self.loaded = False
+
+    def add_table(self, table_id: int, table_type):
+        key = _type_key(table_type)
+        if table_id in self._table_types:
+            return
+        self._table_types[table_id] = key
+        ids = self._tables_by_type.setdefault(key, [])
+        ids.insert(bisect_left(ids, table_id), table_id)
+        self._schedules[table_id] = TableSchedule()
+        self.occupancy.add_table(table_id, key)
+
+    def remove_table(self, table_id: int):
+        key = self._table_types.pop(table_id, None)
+        if key is None:
+            return
+        ids = self._tables_by_type[key]
+        ids.pop(bisect_left(ids, table_id))
+        schedule = self._schedules.pop(table_id)
+        for booking_id in schedule.booking_ids:
+            self._bookings.pop(booking_id, None)
+        self.occupancy.remove_table(table_id)
+
+    def add_booking(self, booking_id: int, table_id: int, start_time: datetime, end_time: datetime):
+        schedule = self._schedules.get(table_id)
+        if schedule is None or booking_id in self._bookings:
+            return
+        schedule.add(booking_id, start_time, end_time)
+        self._bookings[booking_id] = (table_id, start_time)
+        self.occupancy.add_booking(booking_id, table_id, start_time, end_time)
+
+    def remove_booking(self, booking_id: int):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        table_id, start_time = entry
+        schedule = self._schedules.get(table_id)
+        if schedule is not None:
+            schedule.remove(booking_id, start_time)
+        self.occupancy.remove_booking(booking_id)
+
+    def pick_table(self, table_type, start_time: datetime, end_time: datetime) -> int | None:
+        """
+            Id of the table the allocation strategy picks for [start_time, end_time)
+            among the free tables of the given type (or larger ones), or None
+        """
+        day = start_time.date()
+        opening, closing = day_window(day)
+        if (opening <= start_time < end_time <= closing
+                and start_time.minute == start_time.second == start_time.microsecond == 0
+                and end_time.minute == end_time.second == end_time.microsecond == 0):
+            return table_allocator.pick(self.occupancy, table_type, day, occupancy_mask(day, start_time, end_time))
+
+        # неровные по часу интервалы (старые данные) - первый свободный стол по расписаниям
+        for key in table_allocator.candidate_types(table_type):
+            for table_id in self._tables_by_type.get(key, ()):
+                if self._schedules[table_id].is_free(start_time, end_time):
+                    return table_id
+        return None
+
+    def prune(self, before: datetime):
+        """
+            Drop bookings that ended before the given moment
+        """
+        for schedule in self._schedules.values():
+            for booking_id in schedule.booking_ids[:bisect_right(schedule.ends, before)]:
+                self._bookings.pop(booking_id, None)
+            schedule.prune(before)
+        self.occupancy.prune(before.date())
+
+    def start_pruning(self, interval: float = PRUNE_INTERVAL_SECONDS):
+        """
+            Prune finished bookings every `interval` seconds, otherwise every
+            booking made during the worker's lifetime stays in the index
+        """
+        if self._prune_task is None:
+            self._prune_task = asyncio.create_task(self._prune_periodically(interval))
+
+    async def stop_pruning(self):
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            try:
+                await self._prune_task
+            except asyncio.CancelledError:
+                pass
+            self._prune_task = None
+
+    async def _prune_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.prune(datetime.now())
+            except Exception:
+                logger.exception("Availability index pruning failed")
+
+    async def rebuild(self, db: AsyncSession):
+        """
+            Reload all tables and upcoming bookings from the database
+        """
+        now = datetime.now().replace(tzinfo=None)
+        tables = await db.execute(select(models.Table.id, models.Table.table_type))
+        bookings = await db.execute(
+            select(
+                models.Booking.id,
+                models.Booking.table_id,
+                models.Booking.start_time,
+                models.Booking.end_time,
+            ).where(
+                models.Booking.end_time > now,
+                # условие на ключ секционирования: читаются только текущие и будущие секции
+                models.Booking.start_time > now - timedelta(hours=MAX_BOOKING_HOURS)
+            ).order_by(models.Booking.start_time)
+        )
+
+        self.clear()
+        for table_id, table_type in tables:
+            self.add_table(table_id, table_type)
+        for booking_id, table_id, start_time, end_time in bookings:
+            self.add_booking(booking_id, table_id, start_time, end_time)
+        self.loaded = True
+        logger.info("Availability index loaded: %d tables, %d upcoming bookings",
+                    len(self._table_types), len(self._bookings))
+
+
+availability_index = AvailabilityIndex()
+
+
+def build_availability_grid(
+        day: date,
+        masks_by_type: dict[str, list[int]],
+        now: datetime,
+        only_type: TableType | None = None,
+) -> dict:
+    """
+        Free tables per hour and bookable (start, duration) pairs for every table type
+        (or only `only_type`), computed from per-table occupancy masks of the day
+    """
+    table_types = []
+    for table_type in [only_type] if only_type else TableType:
+        masks = masks_by_type.get(table_type.value, [])
+        hours = [
+            {"hour": hour, "free_tables": sum(1 for mask in masks if not mask & hours_mask(hour, 1))}
+            for hour in range(OPENING_HOUR, CLOSING_HOUR)
+        ]
+        bookable = []
+        for start_hour in range(OPENING_HOUR, CLOSING_HOUR):
+            if datetime.combine(day, time(start_hour)) < now:
+                continue
+            for duration in range(MIN_BOOKING_HOURS, MAX_BOOKING_HOURS + 1):
+                # конец брони тоже должен быть раньше CLOSING_HOUR, см. BookingSlot.check_datetimes
+                if start_hour + duration >= CLOSING_HOUR:
+                    break
+                wanted = hours_mask(start_hour, duration)
+                free_tables = sum(1 for mask in masks if not mask & wanted)
+                if free_tables:
+                    bookable.append({"start_hour": start_hour, "duration": duration, "free_tables": free_tables})
+        table_types.append({
+            "table_type": table_type.value,
+            "total_tables": len(masks),
+            "hours": hours,
+            "bookable": bookable,
+        })
+    return {"day": day.isoformat(), "table_types": table_types}
+
+
+# Маски занятости столов по дням, сбрасываются при записи броней этого дня
+day_occupancy_cache = TTLCache(
+    max_size=settings.availability_cache_max_days,
+    ttl=settings.availability_cache_ttl_seconds,
+)
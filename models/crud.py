@@ -1,21 +1,36 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
+import orjson
 from fastapi import HTTPException
-from passlib.context import CryptContext
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, bindparam, case, insert, update, delete, func, literal, tuple_, union_all, DateTime, Integer, String
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-import config
+from config import settings
+from auth.cache import user_cache
+from auth.hashing import password_hasher
+from cache.responses import response_cache, RESPONSE_CACHE_CHANNEL, TABLES_RESPONSE_KEY
 from . import models, schemas
+from .allocation import table_allocator
+from .availability import availability_index, day_occupancy_cache
+from .database import recent_writers
+from .occupancy import OccupancyMap, day_window, occupancy_mask
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, decode_cursor
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto"
-)
+
+# Запросы горячего пути собираются один раз при импорте, значения
+# передаются параметрами: SQLAlchemy не строит выражение и его ключ кэша
+# на каждый вызов, скомпилированный SQL берётся из кэша движка
+# (DB_QUERY_CACHE_SIZE), а asyncpg повторно использует подготовленный
+# запрос соединения (DB_PREPARED_STATEMENT_CACHE_SIZE).
+USER_BY_ID = select(models.User).where(models.User.id == bindparam("user_id"))
+USER_BY_USERNAME = select(models.User).where(models.User.username == bindparam("username"))
+USER_BY_EMAIL = select(models.User).where(models.User.email == bindparam("email"))
 
 
 async def get_user(db: AsyncSession, user_id: int):
-    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
     user = result.scalars().first()
     if user:
         return user
@@ -24,7 +39,7 @@ async def get_user(db: AsyncSession, user_id: int):
 
 
 async def get_user_by_username(db: AsyncSession, username: str):
-    result = await db.execute(select(models.User).where(models.User.username == username))
+    result = await db.execute(USER_BY_USERNAME, {"username": username})
     user = result.scalars().first()
     if user:
         return user
@@ -33,7 +48,7 @@ async def get_user_by_username(db: AsyncSession, username: str):
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
-    result = await db.execute(select(models.User).where(models.User.email == email))
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
     user = result.scalars().first()
     if user:
         return user
@@ -42,9 +57,9 @@ async def get_user_by_email(db: AsyncSession, email: str):
 
 
 async def create_user(db: AsyncSession, user: schemas.UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
 
-    if user.username == config.ADMIN_NAME and user.email == config.ADMIN_EMAIL and user.password == config.ADMIN_PASS:
+    if user.username == settings.admin_name and user.email == settings.admin_email and user.password == settings.admin_pass:
         is_admin = True
     else:
         is_admin = False
@@ -59,12 +74,225 @@ async def create_user(db: AsyncSession, user: schemas.UserCreate):
     return db_user
 
 
+async def update_user_status(db: AsyncSession, user_id: int, user_status: schemas.UserStatusUpdate):
+    db_user = await get_user(db, user_id)
+    for field, value in user_status.model_dump(exclude_none=True).items():
+        setattr(db_user, field, value)
+    # Закэшированный снимок пользователя больше не актуален ни в одном воркере
+    await notify(db, USER_CHANNEL, db_user.username)
+    await db.commit()
+    await db.refresh(db_user)
+    user_cache.invalidate(db_user.username)
+    return db_user
+
+
 async def get_tables(db: AsyncSession):
-    result = await db.execute(select(models.Table))
-    tables = result.scalars().all()
+    result = await db.execute(select(models.Table.id, models.Table.table_type).order_by(models.Table.id))
+    tables = result.mappings().all()
     return tables
 
 
+BOOKING_COLUMNS = (
+    models.Booking.id,
+    models.Booking.start_time,
+    models.Booking.end_time,
+    models.Booking.user_id,
+    models.Booking.table_id,
+)
+
+# Горячие брони и архив старых месяцев (models.partitions) одним списком
+# для чтения истории. Условия WHERE и ORDER BY ... LIMIT Postgres переносит
+# в обе ветви UNION ALL. У архива нет внешних ключей, поэтому брони
+# удалённых столов и пользователей остаются в истории.
+BOOKING_HISTORY = union_all(
+    select(*BOOKING_COLUMNS),
+    select(
+        models.BookingArchive.id,
+        models.BookingArchive.start_time,
+        models.BookingArchive.end_time,
+        models.BookingArchive.user_id,
+        models.BookingArchive.table_id,
+    ),
+).subquery("bookings_history")
+
+# Бронь длится не больше MAX_BOOKING_HOURS, поэтому пересекающая интервал
+# бронь началась не раньше, чем за BOOKING_SPAN до его начала. Это условие
+# на ключ секционирования bookings позволяет Postgres читать только секции
+# нужных месяцев.
+BOOKING_SPAN = timedelta(hours=schemas.MAX_BOOKING_HOURS)
+
+
+def _overlaps(start_time: datetime, end_time: datetime):
+    return and_(
+        models.Booking.start_time < end_time,
+        models.Booking.start_time > start_time - BOOKING_SPAN,
+        models.Booking.end_time > start_time
+    )
+
+
+# Каналы Postgres NOTIFY, уведомления доставляются слушателям после COMMIT
+CAPACITY_CHANNEL = "capacity_freed"
+WAITLIST_CHANNEL = "waitlist_assigned"
+AVAILABILITY_CHANNEL = "availability"
+# payload - username пользователя, чей снимок в user_cache устарел
+USER_CHANNEL = "user_changed"
+
+# Postgres ограничивает payload уведомления 8000 байтами
+NOTIFY_PAYLOAD_LIMIT = 7900
+# id столов в одном событии tables_added / tables_deleted
+TABLE_IDS_PER_EVENT = 500
+
+
+async def notify(db: AsyncSession, channel: str, payload: str = ""):
+    await db.execute(select(func.pg_notify(channel, payload)))
+
+
+async def notify_availability(db: AsyncSession, events: list[dict]):
+    """
+        Publish availability changes for the live updates stream (routers.live).
+        Every payload is a JSON array of events; large changes are split into
+        several notifications to stay under the payload limit.
+    """
+    if not settings.live_updates_enabled or not events:
+        return
+    chunks, size = [[]], 2
+    for event in events:
+        encoded = orjson.dumps(event)
+        if chunks[-1] and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            chunks.append([])
+            size = 2
+        chunks[-1].append(encoded)
+        size += len(encoded) + 1
+    for chunk in chunks:
+        await notify(db, AVAILABILITY_CHANNEL, (b"[" + b",".join(chunk) + b"]").decode())
+
+
+def _booking_events(op: str, bookings) -> list[dict]:
+    # user_id не публикуется: поток открыт для всех
+    return [
+        {
+            "op": op,
+            "id": booking["id"],
+            "table_id": booking["table_id"],
+            "start_time": booking["start_time"],
+            "end_time": booking["end_time"],
+        }
+        for booking in bookings
+    ]
+
+
+def _table_events(op: str, table_ids: list[int], table_type: str | None = None) -> list[dict]:
+    events = []
+    for i in range(0, len(table_ids), TABLE_IDS_PER_EVENT):
+        event = {"op": op, "ids": table_ids[i:i + TABLE_IDS_PER_EVENT]}
+        if table_type is not None:
+            event["table_type"] = table_type
+        events.append(event)
+    return events
+
+
+# Обновление кэшей и индексов в памяти после записи в БД
+async def _on_tables_added(tables):
+    for table_id, table_type in tables:
+        availability_index.add_table(table_id, table_type)
+    day_occupancy_cache.clear()
+    await response_cache.invalidate(TABLES_RESPONSE_KEY)
+
+
+async def _on_tables_deleted(table_ids):
+    for table_id in table_ids:
+        availability_index.remove_table(table_id)
+    day_occupancy_cache.clear()
+    if table_ids:
+        await response_cache.invalidate(TABLES_RESPONSE_KEY)
+
+
+async def _on_bookings_created(bookings):
+    for booking in bookings:
+        availability_index.add_booking(booking["id"], booking["table_id"],
+                                       booking["start_time"], booking["end_time"])
+        day_occupancy_cache.invalidate(booking["start_time"].date())
+    for user_id in {booking["user_id"] for booking in bookings}:
+        await recent_writers.mark(user_id)
+
+
+async def _on_booking_deleted(booking_id: int, start_time: datetime, user_ids):
+    availability_index.remove_booking(booking_id)
+    day_occupancy_cache.invalidate(start_time.date())
+    for user_id in set(user_ids):
+        await recent_writers.mark(user_id)
+
+
+def _table_free_clause(start_time: datetime, end_time: datetime):
+    return ~models.Table.bookings.any(_overlaps(start_time, end_time))
+
+
+def _candidate_tables(table_type: schemas.TableType) -> tuple:
+    """
+        WHERE clause and ORDER BY for tables of the requested type, followed by
+        the larger types when upgrades are allowed
+    """
+    types = table_allocator.candidate_types(table_type)
+    if len(types) == 1:
+        return models.Table.table_type == types[0], []
+    rank = case({name: rank for rank, name in enumerate(types)}, value=models.Table.table_type)
+    return models.Table.table_type.in_(types), [rank]
+
+
+START_TIME = bindparam("start_time", type_=DateTime)
+END_TIME = bindparam("end_time", type_=DateTime)
+
+@lru_cache(maxsize=64)
+def _free_table_by_id(table_type: schemas.TableType):
+    """
+        Confirms the candidate of the availability index. The index is only a
+        hint, so the table type is checked along with the free slot.
+    """
+    table_filter, _ = _candidate_tables(table_type)
+    return select(models.Table).where(
+        models.Table.id == bindparam("table_id"),
+        table_filter,
+        _table_free_clause(START_TIME, END_TIME)
+    )
+
+
+@lru_cache(maxsize=64)
+def _free_table_search(table_type: schemas.TableType):
+    """Full search of a free table of the given type, see get_available_table"""
+    table_filter, type_order = _candidate_tables(table_type)
+    return select(models.Table).where(
+        table_filter,
+        _table_free_clause(START_TIME, END_TIME)
+    ).order_by(*type_order, models.Table.id)
+
+
+@lru_cache(maxsize=64)
+def _book_free_table(table_type: schemas.TableType, preferred: bool):
+    """
+        INSERT ... SELECT of book_available_table. With `preferred` the table
+        :preferred_id picked by the availability index is tried first, so
+        there are two templates per table type.
+    """
+    table_filter, type_order = _candidate_tables(table_type)
+    order_by = [*type_order, models.Table.id]
+    if preferred:
+        order_by.insert(0, (models.Table.id == bindparam("preferred_id", type_=Integer)).desc())
+
+    free_table = select(
+        START_TIME,
+        END_TIME,
+        bindparam("user_id", type_=Integer),
+        models.Table.id,
+    ).where(
+        table_filter,
+        _table_free_clause(START_TIME, END_TIME)
+    ).order_by(*order_by).limit(1)
+
+    return insert(models.Booking).from_select(
+        ["start_time", "end_time", "user_id", "table_id"], free_table
+    ).returning(*BOOKING_COLUMNS)
+
+
 async def get_available_table(
         db: AsyncSession,
         table_type: schemas.TableType,
@@ -73,42 +301,122 @@ async def get_available_table(
 ):
     start_time = start_time.replace(tzinfo=None)
     end_time = end_time.replace(tzinfo=None)
+    params = {"start_time": start_time, "end_time": end_time}
+
+    # Быстрый путь: кандидат из индекса в памяти, подтверждаемый по первичному ключу
+    if availability_index.loaded:
+        table_id = availability_index.pick_table(table_type, start_time, end_time)
+        if table_id is not None:
+            result = await db.execute(_free_table_by_id(table_type), {**params, "table_id": table_id})
+            table = result.scalars().first()
+            if table:
+                return table
+
+    # Индекс не загружен или устарел (брони других воркеров) - полный поиск в БД
+    result = await db.execute(_free_table_search(table_type), params)
+    table = result.scalars().first()
+    return table
+
+
+async def get_day_occupancy(db: AsyncSession, day: date) -> dict[str, list[int]]:
+    """
+        Hour occupancy masks of every table for the given day, grouped by table type.
+        Loaded with a single tables LEFT JOIN bookings query and cached per day
+        for AVAILABILITY_CACHE_TTL_SECONDS. The in-memory availability index is
+        not used here: it only sees the bookings of this worker.
+    """
+    occupancy = day_occupancy_cache.get(day)
+    if occupancy is not None:
+        return occupancy
+
+    opening, closing = day_window(day)
     result = await db.execute(
-        select(models.Table).where(
-            models.Table.table_type == table_type,
-            ~models.Table.bookings.any(
-                and_(
-                    models.Booking.start_time < end_time,
-                    models.Booking.end_time > start_time
-                )
+        select(
+            models.Table.id,
+            models.Table.table_type,
+            models.Booking.start_time,
+            models.Booking.end_time,
+        ).outerjoin(
+            models.Booking,
+            and_(
+                models.Booking.table_id == models.Table.id,
+                _overlaps(opening, closing)
             )
         )
     )
-    table = result.scalars().first()
-    return table
+    masks: dict[int, int] = {}
+    table_types: dict[int, str] = {}
+    for table_id, table_type, start_time, end_time in result:
+        table_types[table_id] = table_type
+        masks[table_id] = masks.get(table_id, 0)
+        if start_time is not None:
+            masks[table_id] |= occupancy_mask(day, start_time, end_time)
+
+    occupancy = {}
+    for table_id in sorted(masks):
+        occupancy.setdefault(table_types[table_id], []).append(masks[table_id])
+    day_occupancy_cache.set(day, occupancy)
+    return occupancy
 
 
 async def create_table(db: AsyncSession, table: schemas.TableCreate):
     db_table = models.Table(**table.dict())
     db.add(db_table)
+    await db.flush()
+    await notify(db, CAPACITY_CHANNEL)
+    await notify(db, RESPONSE_CACHE_CHANNEL, TABLES_RESPONSE_KEY)
+    await notify_availability(db, _table_events("tables_added", [db_table.id], db_table.table_type))
     await db.commit()
     await db.refresh(db_table)
+    await _on_tables_added([(db_table.id, db_table.table_type)])
     return db_table
 
 
-async def delete_table(db: AsyncSession, table_id: int):
-    table_query = await db.execute(
-        select(models.Table).where(
-            models.Table.id == table_id
-        )
+async def create_tables(db: AsyncSession, tables: schemas.TableBulkCreate):
+    """
+        Create `count` tables of one type with a single INSERT ... SELECT FROM generate_series
+    """
+    stmt = insert(models.Table).from_select(
+        ["table_type"],
+        select(literal(tables.table_type.value, String)).select_from(func.generate_series(1, tables.count))
+    ).returning(models.Table.id, models.Table.table_type)
+    result = await db.execute(stmt)
+    created = result.mappings().all()
+    await notify(db, CAPACITY_CHANNEL)
+    await notify(db, RESPONSE_CACHE_CHANNEL, TABLES_RESPONSE_KEY)
+    await notify_availability(
+        db, _table_events("tables_added", [row["id"] for row in created], tables.table_type.value)
     )
-    table_chosen = table_query.scalars().first()
+    await db.commit()
+    await _on_tables_added([(row["id"], row["table_type"]) for row in created])
+    return created
 
-    if not table_chosen:
-        raise HTTPException(status_code=404, detail="Table not found")
 
-    await db.delete(table_chosen)
+async def delete_tables(db: AsyncSession, table_ids: list[int]) -> list[int]:
+    """
+        Delete tables with one set-based DELETE. Their bookings are removed by the
+        database (ON DELETE CASCADE), without loading them into the session.
+    """
+    result = await db.execute(
+        delete(models.Table).where(
+            models.Table.id.in_(table_ids)
+        ).returning(models.Table.id)
+    )
+    deleted = list(result.scalars().all())
+    if deleted:
+        await notify(db, RESPONSE_CACHE_CHANNEL, TABLES_RESPONSE_KEY)
+    await notify_availability(db, _table_events("tables_deleted", deleted))
     await db.commit()
+    await _on_tables_deleted(deleted)
+    return deleted
+
+
+async def delete_table(db: AsyncSession, table_id: int):
+    deleted = await delete_tables(db, [table_id])
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Table not found")
+
     return {"message": f"Table №{table_id} deleted successfully"}
 
 
@@ -124,47 +432,295 @@ async def create_booking(db: AsyncSession, booking: schemas.BookingCreate):
         table_id=booking.table_id
     )
     db.add(db_booking)
+    await db.flush()
+    row = {column.key: getattr(db_booking, column.key) for column in BOOKING_COLUMNS}
+    await notify_availability(db, _booking_events("booked", [row]))
     await db.commit()
     await db.refresh(db_booking)
+    await _on_bookings_created([row])
     return db_booking
 
 
-async def get_bookings(db: AsyncSession, current_user: schemas.User):
+def _is_overlap_violation(exc: IntegrityError) -> bool:
+    # ограничения называются по секциям: bookings_p2026_10_no_overlap,
+    # bookings_default_no_overlap
+    return (getattr(exc.orig, "sqlstate", None) == "23P01"
+            or "_no_overlap" in str(exc.orig))
+
+
+async def book_available_table(
+        db: AsyncSession,
+        table_type: schemas.TableType,
+        booking: schemas.BookingSlot,
+        user_id: int
+):
+    """
+        Pick a free table of the given type (the one chosen by the allocation
+        strategy, see models.allocation) and insert the booking in a single
+        INSERT ... SELECT ... RETURNING statement. The no_overlap exclusion
+        constraint of the booking's partition rejects the insert if a concurrent
+        request took the same table, in which case the statement is retried
+        once against the next free table.
+    """
+    start_time = booking.start_time.replace(tzinfo=None)
+    end_time = booking.end_time.replace(tzinfo=None)
+
+    preferred_id = None
+    if availability_index.loaded:
+        preferred_id = availability_index.pick_table(table_type, start_time, end_time)
+    stmt = _book_free_table(table_type, preferred_id is not None)
+    params = {"start_time": start_time, "end_time": end_time, "user_id": user_id}
+    if preferred_id is not None:
+        params["preferred_id"] = preferred_id
+
+    for attempt in range(2):
+        try:
+            result = await db.execute(stmt, params)
+            row = result.mappings().first()
+            if row is not None:
+                await notify_availability(db, _booking_events("booked", [row]))
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if not _is_overlap_violation(e):
+                raise
+            continue
+        if row is None:
+            return None
+        await _on_bookings_created([row])
+        return dict(row)
+
+    raise HTTPException(status_code=409, detail="The selected time was booked concurrently, please try again")
+
+
+async def _load_occupancy(
+        db: AsyncSession,
+        period_start: datetime,
+        period_end: datetime,
+        table_types: list[str],
+) -> OccupancyMap:
+    """
+        Tables of the given types with their bookings over the period, read with one query
+    """
     result = await db.execute(
-        select(models.Booking).where(
-            models.Booking.user_id == current_user.id
+        select(
+            models.Table.id,
+            models.Table.table_type,
+            models.Booking.id,
+            models.Booking.start_time,
+            models.Booking.end_time,
+        ).outerjoin(
+            models.Booking,
+            and_(
+                models.Booking.table_id == models.Table.id,
+                _overlaps(period_start, period_end)
+            )
+        ).where(
+            models.Table.table_type.in_(table_types)
         )
     )
-    bookings = result.scalars().all()
-    return bookings
+    occupancy = OccupancyMap()
+    for table_id, table_type, booking_id, start_time, end_time in result:
+        occupancy.add_table(table_id, table_type)
+        if booking_id is not None:
+            occupancy.add_booking(booking_id, table_id, start_time, end_time)
+    return occupancy
+
+
+async def book_batch(
+        db: AsyncSession,
+        table_type: schemas.TableType,
+        slots: list[schemas.BookingSlot],
+        user_id: int,
+        all_or_nothing: bool,
+) -> list[dict | None]:
+    """
+        Book a table of the given type for every slot in one transaction.
+
+        Tables and their bookings over the whole period are read with one query,
+        free tables are assigned in memory with an OccupancyMap and all bookings are
+        written with a single multi-row INSERT. Returns the created booking (or None
+        if no table was free) for every slot. With all_or_nothing nothing is written
+        unless every slot got a table.
+    """
+    periods = [(slot.start_time.replace(tzinfo=None), slot.end_time.replace(tzinfo=None)) for slot in slots]
+    if not periods:
+        return []
+    period_start = min(start_time for start_time, _ in periods)
+    period_end = max(end_time for _, end_time in periods)
+    type_key = schemas.TableType(table_type).value
+
+    for attempt in range(2):
+        occupancy = await _load_occupancy(db, period_start, period_end, table_allocator.candidate_types(type_key))
+
+        assigned: list[int | None] = []
+        for i, (start_time, end_time) in enumerate(periods):
+            day = start_time.date()
+            table_id = table_allocator.pick(occupancy, type_key, day, occupancy_mask(day, start_time, end_time))
+            if table_id is not None:
+                # отрицательный id, чтобы не пересечься с настоящими бронями
+                occupancy.add_booking(-(i + 1), table_id, start_time, end_time)
+            assigned.append(table_id)
+
+        values = [
+            {"start_time": start_time, "end_time": end_time, "user_id": user_id, "table_id": table_id}
+            for (start_time, end_time), table_id in zip(periods, assigned)
+            if table_id is not None
+        ]
+        if not values or (all_or_nothing and len(values) < len(periods)):
+            await db.rollback()
+            return [None] * len(periods)
+
+        try:
+            result = await db.execute(insert(models.Booking).values(values).returning(*BOOKING_COLUMNS))
+            rows = result.mappings().all()
+            await notify_availability(db, _booking_events("booked", rows))
+            await db.commit()
+        except IntegrityError as e:
+            # другой запрос занял один из выбранных столов -
+            # пересчитываем по свежим данным
+            await db.rollback()
+            if not _is_overlap_violation(e):
+                raise
+            continue
+
+        await _on_bookings_created(rows)
+        created = {(row["table_id"], row["start_time"]): dict(row) for row in rows}
+        return [
+            created[(table_id, start_time)] if table_id is not None else None
+            for (start_time, _), table_id in zip(periods, assigned)
+        ]
+
+    raise HTTPException(status_code=409, detail="Some of the selected times were booked concurrently, please try again")
+
+
+def _naive(value: datetime | None) -> datetime | None:
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+async def list_bookings(
+        db: AsyncSession,
+        *filters,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+        One page of bookings (hot and archived, filters on BOOKING_HISTORY columns)
+        ordered by (start_time, id), selected as plain rows instead of ORM entities.
+        Returns the rows and the cursor of the next page, or None if this page
+        is the last one.
+    """
+    history = BOOKING_HISTORY.c
+    stmt = select(BOOKING_HISTORY).where(*filters)
+    if cursor:
+        after_start, after_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(history.start_time, history.id) > tuple_(after_start, after_id)
+        )
+    stmt = stmt.order_by(history.start_time, history.id).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    rows = result.mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["start_time"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def booking_filters(
+        user_id: int | None = None,
+        table_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+) -> list:
+    history = BOOKING_HISTORY.c
+    filters = []
+    if user_id is not None:
+        filters.append(history.user_id == user_id)
+    if table_id is not None:
+        filters.append(history.table_id == table_id)
+    if date_from is not None:
+        filters.append(history.start_time >= _naive(date_from))
+    if date_to is not None:
+        filters.append(history.start_time < _naive(date_to))
+    return filters
+
+
+async def get_bookings(
+        db: AsyncSession,
+        current_user: schemas.User,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+):
+    return await list_bookings(
+        db,
+        BOOKING_HISTORY.c.user_id == current_user.id,
+        cursor=cursor,
+        limit=limit,
+    )
 
 
 async def get_upcoming_bookings(db: AsyncSession, current_user: schemas.User):
+    now = datetime.now().replace(tzinfo=None)
     result = await db.execute(
-        select(models.Booking).where(
-            models.Booking.end_time > datetime.now().replace(tzinfo=None),
+        select(*BOOKING_COLUMNS).where(
+            models.Booking.end_time > now,
+            models.Booking.start_time > now - BOOKING_SPAN,
             models.Booking.user_id == current_user.id
-        )
+        ).order_by(models.Booking.start_time, models.Booking.id)
     )
-    upcoming_bookings = result.scalars().all()
+    upcoming_bookings = result.mappings().all()
     return upcoming_bookings
 
 
-async def get_previous_bookings(db: AsyncSession, current_user: schemas.User):
-    result = await db.execute(
-        select(models.Booking).where(
-            models.Booking.end_time <= datetime.now().replace(tzinfo=None),
-            models.Booking.user_id == current_user.id
-        )
+async def get_previous_bookings(
+        db: AsyncSession,
+        current_user: schemas.User,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+        Past bookings of the user, older months are read from the archive
+        transparently (BOOKING_HISTORY)
+    """
+    return await list_bookings(
+        db,
+        BOOKING_HISTORY.c.end_time <= datetime.now().replace(tzinfo=None),
+        BOOKING_HISTORY.c.user_id == current_user.id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+async def admin_get_all_bookings(
+        db: AsyncSession,
+        user_id: int | None = None,
+        table_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+):
+    return await list_bookings(
+        db,
+        *booking_filters(user_id, table_id, date_from, date_to),
+        cursor=cursor,
+        limit=limit,
     )
-    previous_bookings = result.scalars().all()
-    return previous_bookings
 
 
-async def admin_get_all_bookings(db: AsyncSession):
-    result = await db.execute(select(models.Booking))
-    bookings = result.scalars().all()
-    return bookings
+async def stream_bookings(db: AsyncSession, *filters, batch_size: int = 1000):
+    """
+        Yield batches of booking rows read through a server-side cursor,
+        so memory use does not depend on the number of exported rows
+    """
+    stmt = select(BOOKING_HISTORY).where(*filters).order_by(
+        BOOKING_HISTORY.c.start_time, BOOKING_HISTORY.c.id
+    ).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.partitions(batch_size):
+        yield partition
 
 
 async def delete_booking(
@@ -172,6 +728,10 @@ async def delete_booking(
         booking_id: int,
         current_user: schemas.User
 ):
+    """
+        Only bookings of the hot partitions can be deleted: an archived booking
+        is not found here and gets 404 like a missing one
+    """
     booking_query = await db.execute(
         select(models.Booking).where(
             models.Booking.id == booking_id
@@ -190,8 +750,202 @@ async def delete_booking(
         raise HTTPException(status_code=403, detail="Access denied: as a booking creator, "
                                                     "you can delete only upcoming bookings")
 
+    owner_id = booking_chosen.user_id
+    start_time = booking_chosen.start_time
+    cancelled = _booking_events("cancelled", [
+        {column.key: getattr(booking_chosen, column.key) for column in BOOKING_COLUMNS}
+    ])
     await db.delete(booking_chosen)
+    await notify(db, CAPACITY_CHANNEL, start_time.date().isoformat())
+    await notify_availability(db, cancelled)
     await db.commit()
+    await _on_booking_deleted(booking_id, start_time, (owner_id, current_user.id))
     return {"message": f"Booking №{booking_id} deleted successfully"}
 
 
+WAITLIST_COLUMNS = (
+    models.WaitlistEntry.id,
+    models.WaitlistEntry.user_id,
+    models.WaitlistEntry.table_type,
+    models.WaitlistEntry.start_time,
+    models.WaitlistEntry.end_time,
+    models.WaitlistEntry.status,
+    models.WaitlistEntry.booking_id,
+    models.WaitlistEntry.created_at,
+    models.WaitlistEntry.assigned_at,
+)
+
+# Ключ pg_advisory_xact_lock: столы из очереди назначает один воркер за раз
+WAITLIST_LOCK_ID = 7_245_001
+
+
+async def join_waitlist(
+        db: AsyncSession,
+        table_type: schemas.TableType,
+        booking: schemas.BookingSlot,
+        user_id: int
+) -> dict:
+    result = await db.execute(
+        insert(models.WaitlistEntry).values(
+            user_id=user_id,
+            table_type=schemas.TableType(table_type).value,
+            start_time=booking.start_time.replace(tzinfo=None),
+            end_time=booking.end_time.replace(tzinfo=None),
+        ).returning(*WAITLIST_COLUMNS)
+    )
+    entry = dict(result.mappings().one())
+    # место могло освободиться между неудачной попыткой брони и постановкой в очередь
+    await notify(db, CAPACITY_CHANNEL, entry["start_time"].date().isoformat())
+    await db.commit()
+    entry["position"] = await _waitlist_position(db, entry)
+    return entry
+
+
+async def _waitlist_position(db: AsyncSession, entry) -> int:
+    ahead = await db.scalar(
+        select(func.count()).select_from(models.WaitlistEntry).where(
+            models.WaitlistEntry.status == schemas.WaitlistStatus.waiting.value,
+            models.WaitlistEntry.table_type == entry["table_type"],
+            models.WaitlistEntry.start_time < entry["end_time"],
+            models.WaitlistEntry.end_time > entry["start_time"],
+            models.WaitlistEntry.id < entry["id"],
+        )
+    )
+    return ahead + 1
+
+
+async def get_waitlist_entry(db: AsyncSession, entry_id: int, current_user: schemas.User) -> dict:
+    result = await db.execute(select(*WAITLIST_COLUMNS).where(models.WaitlistEntry.id == entry_id))
+    row = result.mappings().first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    if not (current_user.is_admin or current_user.id == row["user_id"]):
+        raise HTTPException(status_code=403, detail="Access denied: only Admin or "
+                                                    "entry creator can see this waitlist entry")
+    entry = dict(row)
+    entry["position"] = None
+    if entry["status"] == schemas.WaitlistStatus.waiting.value:
+        entry["position"] = await _waitlist_position(db, entry)
+    return entry
+
+
+async def cancel_waitlist_entry(db: AsyncSession, entry_id: int, current_user: schemas.User):
+    entry = await get_waitlist_entry(db, entry_id, current_user)
+    result = await db.execute(
+        update(models.WaitlistEntry).where(
+            models.WaitlistEntry.id == entry_id,
+            models.WaitlistEntry.status == schemas.WaitlistStatus.waiting.value
+        ).values(status=schemas.WaitlistStatus.cancelled.value).returning(models.WaitlistEntry.id)
+    )
+    cancelled = result.scalar()
+    await db.commit()
+    if cancelled is None:
+        raise HTTPException(status_code=409, detail=f"Waitlist entry is already {entry['status']}")
+    return {"message": f"Waitlist entry №{entry_id} cancelled successfully"}
+
+
+async def expire_waitlist(db: AsyncSession) -> int:
+    """
+        Mark waiting entries whose slot has already started as expired
+    """
+    result = await db.execute(
+        update(models.WaitlistEntry).where(
+            models.WaitlistEntry.status == schemas.WaitlistStatus.waiting.value,
+            models.WaitlistEntry.start_time <= datetime.now().replace(tzinfo=None)
+        ).values(status=schemas.WaitlistStatus.expired.value)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def assign_waitlist(
+        db: AsyncSession,
+        after_id: int,
+        batch_size: int,
+        day: date | None = None,
+) -> tuple[list[dict], int | None]:
+    """
+        Assign free tables to the next `batch_size` waiting entries with id above
+        `after_id` (only entries for `day`, if given), earliest entries first.
+
+        Works like book_batch: occupancy of the batch period is read with one
+        query, tables are picked in memory and all bookings are written with one
+        INSERT in the same transaction that marks the entries as assigned.
+        Returns the created bookings and the last id looked at, or None as the id
+        when there is nothing left (or another worker is assigning right now).
+    """
+    locked = await db.scalar(select(func.pg_try_advisory_xact_lock(WAITLIST_LOCK_ID)))
+    if not locked:
+        await db.rollback()
+        return [], None
+
+    now = datetime.now().replace(tzinfo=None)
+    filters = [
+        models.WaitlistEntry.status == schemas.WaitlistStatus.waiting.value,
+        models.WaitlistEntry.start_time > now,
+        models.WaitlistEntry.id > after_id,
+    ]
+    if day is not None:
+        day_start = datetime(day.year, day.month, day.day)
+        filters += [
+            models.WaitlistEntry.start_time >= day_start,
+            models.WaitlistEntry.start_time < day_start + timedelta(days=1),
+        ]
+    result = await db.execute(
+        select(*WAITLIST_COLUMNS[:5]).where(*filters).order_by(
+            models.WaitlistEntry.id
+        ).limit(batch_size).with_for_update(skip_locked=True)
+    )
+    entries = result.all()
+    if not entries:
+        await db.rollback()
+        return [], None
+
+    occupancy = await _load_occupancy(
+        db,
+        min(entry.start_time for entry in entries),
+        max(entry.end_time for entry in entries),
+        list({name for entry in entries for name in table_allocator.candidate_types(entry.table_type)}),
+    )
+    picked, values = [], []
+    for entry in entries:
+        day_of_entry = entry.start_time.date()
+        table_id = table_allocator.pick(occupancy, entry.table_type, day_of_entry,
+                                        occupancy_mask(day_of_entry, entry.start_time, entry.end_time))
+        if table_id is None:
+            continue
+        occupancy.add_booking(-entry.id, table_id, entry.start_time, entry.end_time)
+        picked.append((entry, table_id))
+        values.append({"start_time": entry.start_time, "end_time": entry.end_time,
+                       "user_id": entry.user_id, "table_id": table_id})
+
+    last_id = entries[-1].id
+    if not values:
+        await db.rollback()
+        return [], last_id
+
+    try:
+        result = await db.execute(insert(models.Booking).values(values).returning(*BOOKING_COLUMNS))
+        rows = result.mappings().all()
+        created = {(row["table_id"], row["start_time"]): row for row in rows}
+        await db.execute(update(models.WaitlistEntry), [
+            {
+                "id": entry.id,
+                "status": schemas.WaitlistStatus.assigned.value,
+                "booking_id": created[(table_id, entry.start_time)]["id"],
+                "assigned_at": now,
+            }
+            for entry, table_id in picked
+        ])
+        await notify(db, WAITLIST_CHANNEL, ",".join(str(entry.id) for entry, _ in picked))
+        await notify_availability(db, _booking_events("booked", rows))
+        await db.commit()
+    except IntegrityError as e:
+        # стол занят параллельной бронью - пачка будет пересчитана по свежим данным
+        await db.rollback()
+        if not _is_overlap_violation(e):
+            raise
+        return [], after_id
+
+    await _on_bookings_created(rows)
+    return [dict(row) for row in rows], last_id
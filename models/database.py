@@ -1,11 +1,111 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncAttrs
+import logging
+import time
+from collections import deque
+
+from sqlalchemy import URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncAttrs, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from cache.redis_client import client_errors, redis_from_url
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = URL.create(
+    "postgresql+asyncpg",
+    username=settings.db_user,
+    password=settings.db_pass,
+    host=settings.db_host,
+    port=settings.db_port,
+    database=settings.db_name,
+)
+
+
+class PoolWaitStats:
+    """
+        How long sessions waited for a connection to be checked out of the pool
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent: deque[float] = deque(maxlen=1024)
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent.append(wait)
+
+    def as_dict(self) -> dict:
+        recent = sorted(self._recent)
+        p99 = recent[min(len(recent) - 1, int(0.99 * len(recent)))] if recent else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "p99_wait_ms": round(p99 * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Pool.recreate() builds a new instance of the same class, so the stats
+    # live on a per-engine subclass, see timed_pool_class()
+    wait_stats: PoolWaitStats
 
-from config import DB_USER, DB_PASS, DB_HOST, DB_NAME
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
 
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
 
-engine = create_async_engine(DATABASE_URL)
+def timed_pool_class(name: str) -> type[TimedQueuePool]:
+    return type(f"{name}TimedQueuePool", (TimedQueuePool,), {"wait_stats": PoolWaitStats()})
+
+
+def make_engine(url: URL | str, name: str) -> AsyncEngine:
+    server_settings = {}
+    if settings.db_statement_timeout_ms:
+        server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+    return create_async_engine(
+        url,
+        poolclass=timed_pool_class(name),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        query_cache_size=settings.db_query_cache_size,
+        connect_args={
+            "server_settings": server_settings,
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+        },
+    )
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.db_max_overflow,
+        "wait": pool.wait_stats.as_dict(),
+    }
+
+
+engine = make_engine(DATABASE_URL, "Primary")
 SessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -14,6 +114,105 @@ SessionLocal = async_sessionmaker(
 )
 
 
+# Без DB_READ_URL чтение идёт в основную БД, но через отдельную фабрику сессий
+read_engine = make_engine(settings.db_read_url, "Replica") if settings.db_read_url else engine
+ReadSessionLocal = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+    class_=AsyncSession,
+)
+
+
+class RecentWriters:
+    """
+        Users who created or deleted bookings in the last `window` seconds.
+        Their reads go to the primary so they see their own writes despite
+        replication lag. Tracked per worker process: with several workers use
+        RedisRecentWriters, so a read served by another worker sees the mark.
+    """
+    name = "memory"
+
+    def __init__(self, window: float, max_size: int = 100_000):
+        self.window = window
+        self.max_size = max_size
+        self._until: dict[int, float] = {}
+
+    async def mark(self, user_id: int):
+        now = time.monotonic()
+        if len(self._until) >= self.max_size:
+            self._until = {k: v for k, v in self._until.items() if v > now}
+        self._until[user_id] = now + self.window
+
+    async def is_recent(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._until[user_id]
+            return False
+        return True
+
+
+class RedisRecentWriters:
+    """
+        Recent writers shared by all workers as keys expiring after `window`.
+        `client` is anything with the async set / exists of redis.asyncio.Redis.
+
+        Marks are also kept in this worker's `fallback`, which answers while
+        Redis is unreachable.
+    """
+    name = "redis"
+
+    def __init__(self, client, window: float, prefix: str = "recent_writer:"):
+        self._client = client
+        self._prefix = prefix
+        self._errors = client_errors()
+        self.window = window
+        self.fallback = RecentWriters(window)
+        self.failures = 0
+        self._failing = False
+
+    async def mark(self, user_id: int):
+        await self.fallback.mark(user_id)
+        try:
+            await self._client.set(f"{self._prefix}{user_id}", 1, px=max(1, round(self.window * 1000)))
+        except self._errors:
+            self._failed()
+        else:
+            self._recovered()
+
+    async def is_recent(self, user_id: int) -> bool:
+        try:
+            recent = await self._client.exists(f"{self._prefix}{user_id}")
+        except self._errors:
+            self._failed()
+            return await self.fallback.is_recent(user_id)
+        self._recovered()
+        return bool(recent)
+
+    def _failed(self):
+        self.failures += 1
+        if not self._failing:
+            self._failing = True
+            logger.exception("Read-your-writes backend unavailable, using the marks of this worker until it recovers")
+
+    def _recovered(self):
+        if self._failing:
+            self._failing = False
+            logger.warning("Read-your-writes backend recovered")
+
+
+def make_recent_writers():
+    if settings.db_read_your_writes_backend == "redis":
+        client = redis_from_url(settings.db_read_your_writes_redis_url, "DB_READ_YOUR_WRITES_BACKEND")
+        return RedisRecentWriters(client, settings.db_read_your_writes_seconds)
+    return RecentWriters(settings.db_read_your_writes_seconds)
+
+
+recent_writers = make_recent_writers()
+
+
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
@@ -21,3 +220,21 @@ class Base(AsyncAttrs, DeclarativeBase):
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_db():
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def read_session_for(user_id: int | None) -> AsyncSession:
+    """
+        Session for read-only queries of the given user: replica, or primary
+        right after the user's own writes
+    """
+    # без реплики чтения и так идут в основную БД, отметки можно не проверять
+    if read_engine is engine:
+        return ReadSessionLocal()
+    if user_id is not None and await recent_writers.is_recent(user_id):
+        return SessionLocal()
+    return ReadSessionLocal()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean, Index, func, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from models.database import Base
@@ -41,19 +41,34 @@ class Table(Base):
     )
     table_type: Mapped[str] = mapped_column(String)
 
+    # Брони удаляет сама БД (ondelete="CASCADE"), ORM не загружает их перед удалением стола
     bookings: Mapped[list["Booking"]] = relationship(back_populates="table",
-                                                     cascade="all, delete-orphan")
+                                                     cascade="all, delete-orphan",
+                                                     passive_deletes=True)
 
 
 class Booking(Base):
+    # Секционирована по месяцам start_time (models.partitions, миграция c4d8e2a61f07), поэтому
+    # start_time входит в первичный ключ. Пересечение броней одного стола запрещено ограничением
+    # EXCLUDE USING gist в каждой секции (<секция>_no_overlap)
     __tablename__ = "bookings"
+    __table_args__ = (
+        # брони пользователя: все / предстоящие / прошедшие
+        Index("ix_bookings_user_id_end_time", "user_id", "end_time"),
+        # пересечение по времени для конкретного стола: end_time > start отсекает прошлые брони
+        Index("ix_bookings_table_id_end_time_start_time", "table_id", "end_time", "start_time"),
+        # постраничный вывод всех броней по курсору (start_time, id)
+        Index("ix_bookings_start_time_id", "start_time", "id"),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
         primary_key=True,
+        autoincrement=True,
         index=True
     )
-    start_time: Mapped[datetime] = mapped_column(DateTime)
+    start_time: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     end_time: Mapped[datetime] = mapped_column(DateTime)
 
     user_id: Mapped[int] = mapped_column(
@@ -67,3 +82,50 @@ class Booking(Base):
     )
     table: Mapped["Table"] = relationship(back_populates="bookings")
 
+
+class BookingArchive(Base):
+    # Брони из старых секций bookings, перенесённые models.partitions.archive_partition.
+    # Без внешних ключей: история остаётся и после удаления стола
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        Index("ix_bookings_archive_user_id_start_time_id", "user_id", "start_time", "id"),
+        Index("ix_bookings_archive_start_time_id", "start_time", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        autoincrement=False
+    )
+    start_time: Mapped[datetime] = mapped_column(DateTime)
+    end_time: Mapped[datetime] = mapped_column(DateTime)
+    user_id: Mapped[int] = mapped_column(Integer)
+    table_id: Mapped[int] = mapped_column(Integer)
+
+
+class WaitlistEntry(Base):
+    # Очередь запросов на занятые слоты, столы назначает workers.waitlist в порядке id
+    __tablename__ = "waitlist"
+    __table_args__ = (
+        # ожидающие запросы по дню освободившегося места и порядку очереди
+        Index("ix_waitlist_waiting", "start_time", "id",
+              postgresql_where=text("status = 'waiting'")),
+        Index("ix_waitlist_user_id", "user_id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE")
+    )
+    table_type: Mapped[str] = mapped_column(String)
+    start_time: Mapped[datetime] = mapped_column(DateTime)
+    end_time: Mapped[datetime] = mapped_column(DateTime)
+    status: Mapped[str] = mapped_column(String, default="waiting", server_default="waiting")
+    # без внешнего ключа: на секционированную bookings можно сослаться только по (id, start_time)
+    booking_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    assigned_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
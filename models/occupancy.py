@@ -0,0 +1,210 @@
+from bisect import bisect_left
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+
+from .schemas import OPENING_HOUR, CLOSING_HOUR
+
+# Бит i маски дня соответствует часу OPENING_HOUR + i (12 часов рабочего дня)
+DAY_HOURS = CLOSING_HOUR - OPENING_HOUR
+
+# Маски всех столов одного типа за день упакованы в одно целое число, по 16 бит на стол.
+# Старший бит полосы всегда свободен, поэтому проверка "полоса пуста" делается сразу
+# для всех столов одним сложением (SWAR) без цикла на Python.
+LANE_BITS = 16
+LANE_MASK = (1 << LANE_BITS) - 1
+LANE_HIGH_BIT = 1 << (LANE_BITS - 1)
+assert DAY_HOURS < LANE_BITS
+
+
+@lru_cache(maxsize=256)
+def _repeat(lane_value: int, lanes: int) -> int:
+    """lane_value copied into each of `lanes` lanes"""
+    if lanes == 0:
+        return 0
+    return lane_value * (((1 << (LANE_BITS * lanes)) - 1) // LANE_MASK)
+
+
+def hours_mask(first_hour: int, hours: int) -> int:
+    """
+        Mask of `hours` consecutive hour cells starting at `first_hour`
+    """
+    return ((1 << hours) - 1) << (first_hour - OPENING_HOUR)
+
+
+def day_window(day: date) -> tuple[datetime, datetime]:
+    opening = datetime(day.year, day.month, day.day, OPENING_HOUR)
+    return opening, opening + timedelta(hours=DAY_HOURS)
+
+
+def occupancy_mask(day: date, start_time: datetime, end_time: datetime) -> int:
+    """
+        Hour cells of the given day covered by [start_time, end_time)
+    """
+    opening, closing = day_window(day)
+    start_time, end_time = max(start_time, opening), min(end_time, closing)
+    if end_time <= start_time:
+        return 0
+    first = (start_time - opening) // timedelta(hours=1)
+    # неровные по часу брони (старые данные) занимают час целиком
+    last = -((opening - end_time) // timedelta(hours=1))
+    return ((1 << (last - first)) - 1) << first
+
+
+def booking_days(start_time: datetime, end_time: datetime):
+    day = start_time.date()
+    while datetime(day.year, day.month, day.day) < end_time:
+        yield day
+        day += timedelta(days=1)
+
+
+class OccupancyMap:
+    """
+        Hour occupancy of every table by (day, table_id).
+
+        For each day and table type the 12-bit masks of all tables of that type
+        are packed into one int, one 16-bit lane per table in table id order.
+        Finding a free table or counting free tables for a mask is a handful of
+        big-int operations over all tables at once instead of a loop over
+        datetime comparisons.
+    """
+
+    def __init__(self):
+        self._tables_by_type: dict[str, list[int]] = {}
+        self._table_types: dict[int, str] = {}
+        self._days: dict[date, dict[str, int]] = {}
+        # booking_id -> (table_id, [(day, mask), ...]) чтобы снять бронь без обращения к БД
+        self._bookings: dict[int, tuple[int, list[tuple[date, int]]]] = {}
+
+    def clear(self):
+        self._tables_by_type.clear()
+        self._table_types.clear()
+        self._days.clear()
+        self._bookings.clear()
+
+    def _lane(self, table_id: int) -> tuple[str, int]:
+        table_type = self._table_types[table_id]
+        return table_type, bisect_left(self._tables_by_type[table_type], table_id)
+
+    def add_table(self, table_id: int, table_type: str):
+        if table_id in self._table_types:
+            return
+        ids = self._tables_by_type.setdefault(table_type, [])
+        lane = bisect_left(ids, table_id)
+        ids.insert(lane, table_id)
+        self._table_types[table_id] = table_type
+        # освобождаем полосу под новый стол во всех днях
+        shift = LANE_BITS * lane
+        for packed_by_type in self._days.values():
+            packed = packed_by_type.get(table_type, 0)
+            low = packed & ((1 << shift) - 1)
+            packed_by_type[table_type] = low | ((packed >> shift) << (shift + LANE_BITS))
+
+    def remove_table(self, table_id: int):
+        if table_id not in self._table_types:
+            return
+        table_type, lane = self._lane(table_id)
+        shift = LANE_BITS * lane
+        for packed_by_type in self._days.values():
+            packed = packed_by_type.get(table_type, 0)
+            low = packed & ((1 << shift) - 1)
+            packed_by_type[table_type] = low | ((packed >> (shift + LANE_BITS)) << shift)
+        self._tables_by_type[table_type].pop(lane)
+        del self._table_types[table_id]
+        for booking_id in [b for b, (t, _) in self._bookings.items() if t == table_id]:
+            del self._bookings[booking_id]
+
+    def add_booking(self, booking_id: int, table_id: int, start_time: datetime, end_time: datetime):
+        if table_id not in self._table_types or booking_id in self._bookings:
+            return
+        table_type, lane = self._lane(table_id)
+        cells = []
+        for day in booking_days(start_time, end_time):
+            mask = occupancy_mask(day, start_time, end_time)
+            if mask:
+                packed_by_type = self._days.setdefault(day, {})
+                packed_by_type[table_type] = packed_by_type.get(table_type, 0) | (mask << (LANE_BITS * lane))
+                cells.append((day, mask))
+        if cells:
+            self._bookings[booking_id] = (table_id, cells)
+
+    def remove_booking(self, booking_id: int):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        table_id, cells = entry
+        if table_id not in self._table_types:
+            return
+        table_type, lane = self._lane(table_id)
+        for day, mask in cells:
+            packed_by_type = self._days.get(day)
+            if packed_by_type and table_type in packed_by_type:
+                packed_by_type[table_type] &= ~(mask << (LANE_BITS * lane))
+
+    def _free_lanes(self, day: date, table_type: str, mask: int) -> int:
+        """High bit set in the lane of every table free for the whole mask"""
+        lanes = len(self._tables_by_type.get(table_type, ()))
+        packed = self._days.get(day, {}).get(table_type, 0)
+        busy = packed & _repeat(mask, lanes)
+        # полоса > 0 даёт перенос в старший бит полосы, пустая полоса - нет
+        nonzero = (busy + _repeat(LANE_HIGH_BIT - 1, lanes)) & _repeat(LANE_HIGH_BIT, lanes)
+        return nonzero ^ _repeat(LANE_HIGH_BIT, lanes)
+
+    def first_free(self, table_type: str, day: date, mask: int) -> int | None:
+        free = self._free_lanes(day, table_type, mask)
+        if not free:
+            return None
+        lane = ((free & -free).bit_length() - 1) // LANE_BITS
+        return self._tables_by_type[table_type][lane]
+
+    def free_tables(self, table_type: str, day: date, mask: int) -> list[int]:
+        free = self._free_lanes(day, table_type, mask)
+        ids = self._tables_by_type.get(table_type, [])
+        lanes = []
+        while free:
+            low = free & -free
+            lanes.append(ids[(low.bit_length() - 1) // LANE_BITS])
+            free ^= low
+        return lanes
+
+    def free_table_masks(self, table_type: str, day: date, mask: int) -> list[tuple[int, int]]:
+        """
+            (table_id, day mask) of every table free for the whole mask, in table id order
+        """
+        free = self._free_lanes(day, table_type, mask)
+        ids = self._tables_by_type.get(table_type, [])
+        packed = self._days.get(day, {}).get(table_type, 0)
+        tables = []
+        while free:
+            low = free & -free
+            lane = (low.bit_length() - 1) // LANE_BITS
+            tables.append((ids[lane], (packed >> (LANE_BITS * lane)) & LANE_MASK))
+            free ^= low
+        return tables
+
+    def count_free(self, table_type: str, day: date, mask: int) -> int:
+        return self._free_lanes(day, table_type, mask).bit_count()
+
+    def table_count(self, table_type: str) -> int:
+        return len(self._tables_by_type.get(table_type, ()))
+
+    def masks(self, day: date) -> dict[str, list[int]]:
+        """
+            Unpacked per-table masks of the day, grouped by table type in table id order
+        """
+        packed_by_type = self._days.get(day, {})
+        return {
+            table_type: [
+                (packed_by_type.get(table_type, 0) >> (LANE_BITS * lane)) & LANE_MASK
+                for lane in range(len(ids))
+            ]
+            for table_type, ids in self._tables_by_type.items()
+        }
+
+    def prune(self, before: date):
+        """
+            Drop days before the given one
+        """
+        for day in [d for d in self._days if d < before]:
+            del self._days[day]
+        for booking_id in [b for b, (_, cells) in self._bookings.items() if cells[-1][0] < before]:
+            del self._bookings[booking_id]
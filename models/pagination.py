@@ -0,0 +1,28 @@
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(start_time: datetime, booking_id: int) -> str:
+    """
+        Opaque keyset cursor pointing right after the (start_time, id) of the last row of a page
+    """
+    raw = f"{start_time.isoformat()}|{booking_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, booking_id = raw.split("|")
+        return datetime.fromisoformat(start_time), int(booking_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+# Курсор следующей страницы передаётся в заголовке, тело ответа остаётся списком
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
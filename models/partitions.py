@@ -0,0 +1,146 @@
+"""
+    Monthly partitions of `bookings` (PARTITION BY RANGE (start_time), migration
+    c4d8e2a61f07).
+
+    Every month has its own partition `bookings_pYYYY_MM` with its own
+    `bookings_pYYYY_MM_no_overlap` exclusion constraint: a booking never spans
+    two days, so bookings that could overlap always share a partition. Rows outside the
+    created months go to `bookings_default`. Months older than the hot window
+    are moved to the unpartitioned `bookings_archive` table and dropped.
+
+    Every step runs in its own transaction under an advisory lock, so several
+    workers running the maintenance at once do each step once.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "bookings_default"
+PARTITIONS_LOCK_ID = 7_245_002
+
+BOOKING_COLUMN_LIST = "id, start_time, end_time, user_id, table_id"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"bookings_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Month of a partition created by create_partition, None for any other table"""
+    try:
+        year, month = name.removeprefix("bookings_p").split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+async def list_partitions(db: AsyncSession) -> list[dict]:
+    """Partitions of bookings with their estimated row counts, oldest first"""
+    result = await db.execute(text(
+        "SELECT c.relname AS name, c.reltuples::bigint AS estimated_rows "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'bookings'::regclass ORDER BY c.relname"
+    ))
+    return [dict(row) for row in result.mappings()]
+
+
+async def _lock(db: AsyncSession) -> bool:
+    return await db.scalar(select(func.pg_try_advisory_xact_lock(PARTITIONS_LOCK_ID)))
+
+
+async def _exists(db: AsyncSession, name: str) -> bool:
+    return await db.scalar(select(func.to_regclass(name))) is not None
+
+
+async def create_partition(db: AsyncSession, month: date) -> bool:
+    """
+        Create and attach the partition of `month`, moving its rows out of the
+        default partition if any got there. Returns False if the partition
+        already exists or another worker holds the maintenance lock.
+    """
+    name = partition_name(month)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    in_month = f"start_time >= '{month.isoformat()}' AND start_time < '{add_months(month, 1).isoformat()}'"
+    if not await _lock(db) or await _exists(db, name):
+        await db.rollback()
+        return False
+
+    # пока строки месяца переносятся из секции по умолчанию, новые туда не попадут
+    await db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    await db.execute(text(f"CREATE TABLE {name} (LIKE bookings INCLUDING DEFAULTS)"))
+    await db.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_no_overlap "
+        f"EXCLUDE USING gist (table_id WITH =, tsrange(start_time, end_time) WITH &&)"
+    ))
+    await db.execute(text(
+        f"INSERT INTO {name} ({BOOKING_COLUMN_LIST}) "
+        f"SELECT {BOOKING_COLUMN_LIST} FROM {DEFAULT_PARTITION} WHERE {in_month}"
+    ))
+    await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+    # индексы, первичный ключ и внешние ключи секция получает от bookings при подключении
+    await db.execute(text(f"ALTER TABLE bookings ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    await db.commit()
+    logger.info("Created bookings partition %s", name)
+    return True
+
+
+async def archive_partition(db: AsyncSession, month: date) -> int | None:
+    """
+        Copy the rows of the partition of `month` into bookings_archive, then
+        detach and drop it, all in one transaction: readers of bookings_history
+        see the rows either in the partition or in the archive. Returns the
+        number of archived rows, None if there was nothing to do.
+    """
+    name = partition_name(month)
+    if not await _lock(db) or not await _exists(db, name):
+        await db.rollback()
+        return None
+
+    # запрещаем запись в секцию на время копирования, чтение не блокируется
+    await db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+    result = await db.execute(text(
+        f"INSERT INTO bookings_archive ({BOOKING_COLUMN_LIST}) SELECT {BOOKING_COLUMN_LIST} FROM {name}"
+    ))
+    await db.execute(text(f"ALTER TABLE bookings DETACH PARTITION {name}"))
+    await db.execute(text(f"DROP TABLE {name}"))
+    await db.commit()
+    logger.info("Archived bookings partition %s: %d rows", name, result.rowcount)
+    return result.rowcount
+
+
+async def maintain_partitions(db: AsyncSession, today: date, months_ahead: int, hot_months: int) -> dict:
+    """
+        Make sure partitions exist from the current month to `months_ahead`
+        months ahead and archive the ones that ended more than `hot_months`
+        months before the current month
+    """
+    current = month_start(today)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if await create_partition(db, month):
+            created.append(partition_name(month))
+
+    archived = {}
+    oldest_hot = add_months(current, -hot_months)
+    for partition in await list_partitions(db):
+        month = partition_month(partition["name"])
+        if month is not None and month < oldest_hot:
+            rows = await archive_partition(db, month)
+            if rows is not None:
+                archived[partition["name"]] = rows
+    await db.rollback()
+    return {"created": created, "archived": archived}
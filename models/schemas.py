@@ -1,8 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
+from typing import Annotated
 
 from fastapi import HTTPException
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class UserBase(BaseModel):
@@ -19,8 +20,22 @@ class User(UserBase):
     is_admin: bool
     disabled: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TokenUser(BaseModel):
+    """
+        User restored from the token claims, without a database lookup
+    """
+    id: int
+    username: str
+    is_admin: bool
+    disabled: bool
+
+
+class UserStatusUpdate(BaseModel):
+    is_admin: bool | None = None
+    disabled: bool | None = None
 
 
 class TableType(str, Enum):
@@ -40,8 +55,30 @@ class TableCreate(TableBase):
 class Table(TableBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+MAX_BULK_TABLES = 10_000
+
+
+class TableBulkCreate(TableBase):
+    count: int = Field(ge=1, le=MAX_BULK_TABLES)
+
+
+class TableBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BULK_TABLES)
+
+
+class TableBulkDeleteResult(BaseModel):
+    deleted: list[int]
+    not_found: list[int]
+
+
+# Брони начинаются и заканчиваются в целые часы в интервале [OPENING_HOUR, CLOSING_HOUR)
+OPENING_HOUR = 9
+CLOSING_HOUR = 21
+MIN_BOOKING_HOURS = 1
+MAX_BOOKING_HOURS = 4
 
 
 class BookingBase(BaseModel):
@@ -49,10 +86,7 @@ class BookingBase(BaseModel):
     end_time: datetime
 
 
-class BookingCreate(BookingBase):
-    user_id: int
-    table_id: int
-
+class BookingSlot(BookingBase):
     @field_validator("start_time", "end_time")
     def check_datetimes(cls, v: datetime):
         if v.minute != 0 or v.second != 0 or v.microsecond != 0:
@@ -61,16 +95,146 @@ class BookingCreate(BookingBase):
         if v.replace(tzinfo=None) < datetime.now().replace(tzinfo=None):
             raise HTTPException(status_code=400, detail="Time must not be in the past")
 
-        if not (9 <= v.hour < 21):
+        if not (OPENING_HOUR <= v.hour < CLOSING_HOUR):
             raise HTTPException(status_code=400, detail="Booking must start and end between 9 AM and 9 PM")
 
         return v
 
 
+def check_booking_slot(start_time: datetime, end_time: datetime) -> BookingSlot:
+    """
+        All rules of a single booking: BookingSlot time checks plus its duration
+    """
+    # Проверка, что end_time позже start_time
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    # Проверка, что разница между start_time и end_time не менее 1 часа и не более 4 часов
+    duration = end_time - start_time
+    if duration < timedelta(hours=MIN_BOOKING_HOURS) or duration > timedelta(hours=MAX_BOOKING_HOURS):
+        raise HTTPException(status_code=400, detail="Booking duration must be between 1 and 4 hours")
+
+    return BookingSlot(start_time=start_time, end_time=end_time)
+
+
+class BookingCreate(BookingSlot):
+    user_id: int
+    table_id: int
+
+
 class BookingShow(BookingBase):
     id: int
     user_id: int
     table_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HourAvailability(BaseModel):
+    hour: int
+    free_tables: int
+
+
+class SlotAvailability(BaseModel):
+    start_hour: int
+    duration: int
+    free_tables: int
+
+
+class TableTypeAvailability(BaseModel):
+    table_type: TableType
+    total_tables: int
+    hours: list[HourAvailability]
+    bookable: list[SlotAvailability]
+
+
+class AvailabilityGrid(BaseModel):
+    day: date
+    table_types: list[TableTypeAvailability]
+
+
+MAX_BATCH_SLOTS = 100
+MAX_RECURRENCE_DAYS = 366
+
+
+class RecurrenceRule(BaseModel):
+    """
+        The same hours on the chosen weekdays (0 - Monday) from start_date to until inclusive
+    """
+    start_date: date
+    until: date
+    weekdays: set[Annotated[int, Field(ge=0, le=6)]] = Field(default={0, 1, 2, 3, 4}, min_length=1)
+    start_hour: int = Field(ge=OPENING_HOUR, lt=CLOSING_HOUR)
+    duration: int = Field(ge=MIN_BOOKING_HOURS, le=MAX_BOOKING_HOURS)
+
+    @model_validator(mode="after")
+    def check_period(self):
+        if self.until < self.start_date:
+            raise HTTPException(status_code=400, detail="Recurrence must end after it starts")
+        # expand() проходит период по дням, поэтому его длина ограничена
+        if (self.until - self.start_date).days >= MAX_RECURRENCE_DAYS:
+            raise HTTPException(status_code=400, detail=f"Recurrence must not span more than {MAX_RECURRENCE_DAYS} days")
+        return self
+
+    def expand(self) -> list[BookingBase]:
+        slots = []
+        day = self.start_date
+        while day <= self.until:
+            if day.weekday() in self.weekdays:
+                start_time = datetime(day.year, day.month, day.day, self.start_hour)
+                slots.append(BookingBase(start_time=start_time, end_time=start_time + timedelta(hours=self.duration)))
+                if len(slots) > MAX_BATCH_SLOTS:
+                    break
+            day += timedelta(days=1)
+        return slots
+
+
+class BatchMode(str, Enum):
+    all_or_nothing = "all_or_nothing"
+    partial = "partial"
+
+
+class BookingBatchCreate(BaseModel):
+    table_type: TableType
+    slots: list[BookingBase] = Field(default=[], max_length=MAX_BATCH_SLOTS)
+    recurrence: RecurrenceRule | None = None
+    mode: BatchMode = BatchMode.all_or_nothing
+
+
+class SlotStatus(str, Enum):
+    booked = "booked"
+    invalid = "invalid"
+    unavailable = "unavailable"
+
+
+class BookingSlotResult(BookingBase):
+    status: SlotStatus
+    booking: BookingShow | None = None
+    detail: str | None = None
+
+
+class BookingBatchResult(BaseModel):
+    booked: int
+    failed: int
+    results: list[BookingSlotResult]
+
+
+class WaitlistStatus(str, Enum):
+    waiting = "waiting"
+    assigned = "assigned"
+    expired = "expired"
+    cancelled = "cancelled"
+
+
+class WaitlistEntry(BookingBase):
+    id: int
+    user_id: int
+    table_type: TableType
+    status: WaitlistStatus
+    booking_id: int | None = None
+    created_at: datetime
+    assigned_at: datetime | None = None
+    # место в очереди среди ожидающих того же типа стола на пересекающееся время
+    position: int | None = None
+
+    model_config = ConfigDict(from_attributes=True)
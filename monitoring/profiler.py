@@ -0,0 +1,216 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from enum import Enum
+
+from fastapi import HTTPException
+
+MAX_PROFILE_SECONDS = 60
+MAX_STACK_DEPTH = 128
+
+
+class ProfileMode(str, Enum):
+    wall = "wall"
+    cpu = "cpu"
+
+
+class ProfileFormat(str, Enum):
+    collapsed = "collapsed"
+    speedscope = "speedscope"
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{frame.f_lineno})"
+
+
+def frame_stack(frame) -> tuple[str, ...]:
+    """Frames from the outermost to `frame`, at most MAX_STACK_DEPTH innermost ones"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+
+def is_idle(frame) -> bool:
+    """
+        The event loop thread is waiting for I/O: selectors.select with the
+        default loop, or no Python frame above run_until_complete/run_forever
+        with uvloop
+    """
+    code = frame.f_code
+    if code.co_name in ("select", "poll") and code.co_filename.endswith("selectors.py"):
+        return True
+    return code.co_name in ("run_forever", "run_until_complete")
+
+
+class LoopHeartbeat:
+    """
+        Coroutine ticking every `interval` seconds; how late the ticks wake up
+        is the event loop lag
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_tick = time.perf_counter()
+        self.lags: list[float] = []
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.perf_counter()
+            self.lags.append(max(0.0, self.last_tick - expected))
+
+    def stalled(self) -> float:
+        """Seconds the loop has been overdue for the next tick"""
+        return time.perf_counter() - self.last_tick - self.interval
+
+
+class SamplingProfiler:
+    """
+        Samples the stack of one thread from a separate thread.
+
+        `wall` mode keeps every sample, idle ones marked as "(idle)"; `cpu`
+        mode drops samples where the loop was waiting for I/O. While
+        sampling it also records blocks: episodes where the heartbeat was
+        overdue by more than `block_threshold`, with the stack that held the
+        loop at that moment.
+    """
+
+    def __init__(self, thread_id: int, interval: float, mode: str,
+                 heartbeat: LoopHeartbeat, block_threshold: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.mode = mode
+        self.heartbeat = heartbeat
+        self.block_threshold = block_threshold
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self.total_samples = 0
+        self.idle_samples = 0
+        self.blocks: dict[float, dict] = {}
+        self._stopped = threading.Event()
+
+    def run(self, seconds: float):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline and not self._stopped.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._sample(frame)
+            del frame
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """Make `run` return after the current sample"""
+        self._stopped.set()
+
+    def _sample(self, frame):
+        self.total_samples += 1
+        idle = is_idle(frame)
+        if idle:
+            self.idle_samples += 1
+            if self.mode == "wall":
+                self.samples[("(idle)",)] += 1
+            return
+        stack = frame_stack(frame)
+        self.samples[stack] += 1
+
+        stalled = self.heartbeat.stalled()
+        if stalled > self.block_threshold:
+            # один эпизод блокировки = одно значение last_tick, стек берём при первом обнаружении
+            block = self.blocks.setdefault(self.heartbeat.last_tick, {"stack": stack, "stalled": 0.0})
+            block["stalled"] = max(block["stalled"], stalled)
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common())
+
+    def speedscope(self, seconds: float) -> dict:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.samples.most_common():
+            ids = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                ids.append(index[name])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"event loop thread, {self.mode}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": seconds,
+                "samples": samples,
+                "weights": weights,
+            }],
+            "exporter": "monitoring.profiler",
+        }
+
+    def block_report(self) -> list[dict]:
+        blocks = sorted(self.blocks.values(), key=lambda block: block["stalled"], reverse=True)
+        return [
+            {"blocked_ms": round((block["stalled"] + self.heartbeat.interval) * 1000, 1),
+             "stack": list(block["stack"])}
+            for block in blocks
+        ]
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def profile_event_loop(seconds: float, interval_ms: float, mode: ProfileMode,
+                             output: ProfileFormat, block_threshold_ms: float) -> dict:
+    """
+        Profile the event loop thread of this worker for `seconds`.
+
+        Nothing runs until it is called; one profile at a time per worker,
+        a concurrent call gets 409.
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    async with _profile_lock:
+        heartbeat = LoopHeartbeat(interval=max(interval_ms, 5) / 1000)
+        profiler = SamplingProfiler(
+            thread_id=threading.get_ident(),
+            interval=interval_ms / 1000,
+            mode=mode.value,
+            heartbeat=heartbeat,
+            block_threshold=block_threshold_ms / 1000,
+        )
+        stop = asyncio.Event()
+        ticking = asyncio.create_task(heartbeat.run(stop))
+        sampling = asyncio.create_task(asyncio.to_thread(profiler.run, seconds))
+        try:
+            await asyncio.shield(sampling)
+        finally:
+            # при отмене запроса (клиент отключился) поток сэмплирования тоже должен
+            # закончиться, и блокировка держится, пока он не завершится
+            profiler.stop()
+            stop.set()
+            await asyncio.wait({sampling, ticking})
+
+    lags = sorted(heartbeat.lags)
+    return {
+        "seconds": seconds,
+        "mode": mode.value,
+        "samples": profiler.total_samples,
+        "idle_samples": profiler.idle_samples,
+        "loop_lag": {
+            "ticks": len(lags),
+            "p50_ms": round(lags[len(lags) // 2] * 1000, 2) if lags else 0.0,
+            "p99_ms": round(lags[min(len(lags) - 1, int(0.99 * len(lags)))] * 1000, 2) if lags else 0.0,
+            "max_ms": round(lags[-1] * 1000, 2) if lags else 0.0,
+            "threshold_ms": block_threshold_ms,
+            "blocks": profiler.block_report(),
+        },
+        "profile": profiler.speedscope(seconds) if output == ProfileFormat.speedscope else profiler.collapsed(),
+    }
@@ -0,0 +1,119 @@
+from bisect import bisect_left
+from collections import Counter
+
+# Границы корзин гистограмм в секундах, как у prometheus_client по умолчанию
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RouteStats:
+    __slots__ = ("duration", "statuses", "sql_statements", "sql_seconds", "phase_seconds")
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.statuses: Counter[int] = Counter()
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.phase_seconds: Counter[str] = Counter()
+
+
+class RequestMetrics:
+    """
+        Per-route request metrics of this worker process in the Prometheus text
+        format. Every worker exposes its own numbers, Prometheus sums them.
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.sql_statements_total = 0
+        self.slow_queries_total = 0
+        # Метрики других модулей (задержка event loop и т.п.): функции, возвращающие строки
+        self.collectors = []
+
+    def observe(self, method: str, route: str, status_code: int, elapsed: float, timings):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.duration.observe(elapsed)
+        stats.statuses[status_code] += 1
+        stats.sql_statements += timings.sql_count
+        stats.sql_seconds += timings.sql_time
+        for name, spent in timings.phases.items():
+            stats.phase_seconds[name] += spent
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Wall time of HTTP requests",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            lines.extend(stats.duration.render("http_request_duration_seconds", _labels(method=method, route=route)))
+
+        lines += ["# HELP http_requests_total HTTP responses by status code",
+                  "# TYPE http_requests_total counter"]
+        for (method, route), stats in sorted(self.routes.items()):
+            for status_code, count in sorted(stats.statuses.items()):
+                lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+        lines += ["# HELP http_request_sql_statements_total SQL statements executed by requests",
+                  "# TYPE http_request_sql_statements_total counter"]
+        for (method, route), stats in sorted(self.routes.items()):
+            lines.append(f"http_request_sql_statements_total{{{_labels(method=method, route=route)}}} "
+                         f"{stats.sql_statements}")
+
+        lines += ["# HELP http_request_sql_seconds_total Time requests spent in SQL statements",
+                  "# TYPE http_request_sql_seconds_total counter"]
+        for (method, route), stats in sorted(self.routes.items()):
+            lines.append(f"http_request_sql_seconds_total{{{_labels(method=method, route=route)}}} "
+                         f"{stats.sql_seconds}")
+
+        lines += ["# HELP http_request_phase_seconds_total Time requests spent in named phases (auth, ...)",
+                  "# TYPE http_request_phase_seconds_total counter"]
+        for (method, route), stats in sorted(self.routes.items()):
+            for name, spent in sorted(stats.phase_seconds.items()):
+                lines.append(f"http_request_phase_seconds_total{{{_labels(method=method, route=route, phase=name)}}} "
+                             f"{spent}")
+
+        lines += ["# HELP sql_statements_total SQL statements executed by this worker",
+                  "# TYPE sql_statements_total counter",
+                  f"sql_statements_total {self.sql_statements_total}",
+                  "# HELP sql_slow_queries_total SQL statements slower than SLOW_QUERY_MS",
+                  "# TYPE sql_slow_queries_total counter",
+                  f"sql_slow_queries_total {self.slow_queries_total}"]
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
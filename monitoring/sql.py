@@ -0,0 +1,66 @@
+import logging
+import re
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+from .prometheus import request_metrics
+from .timing import current_timings
+
+logger = logging.getLogger("sql.slow")
+
+_PARAM_LIST = re.compile(r"\(\s*\$\d+(?:::\w+)?(?:\s*,\s*\$\d+(?:::\w+)?)*\s*\)")
+_PARAM = re.compile(r"\$\d+(?:::\w+)?")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+        Statement with literals and bind parameters replaced by `?` and IN lists
+        collapsed, so the same query with different arguments logs the same way
+    """
+    statement = _PARAM_LIST.sub("(...)", statement)
+    statement = _PARAM.sub("?", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    request_metrics.sql_statements_total += 1
+    timings = current_timings.get()
+    if timings is not None:
+        timings.sql_count += 1
+        timings.sql_time += elapsed
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        request_metrics.slow_queries_total += 1
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, normalize_statement(statement))
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute не вызывается для упавших запросов
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+        Count and time every statement of the engine for the current request
+        and log slow ones
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
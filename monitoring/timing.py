@@ -0,0 +1,112 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+from .prometheus import request_metrics
+
+
+class RequestTimings:
+    """
+        Time spent in each phase of the current request. Filled by `phase()`
+        and by the SQL engine hooks, see monitoring.sql.
+    """
+    __slots__ = ("started", "sql_count", "sql_time", "phases", "_open")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.phases: dict[str, float] = {}
+        self._open: set[str] = set()
+
+    def server_timing(self) -> str:
+        parts = [f"app;dur={(time.perf_counter() - self.started) * 1000:.2f}"]
+        if self.sql_count:
+            parts.append(f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"')
+        for name, spent in self.phases.items():
+            parts.append(f"{name};dur={spent * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """
+        Add the time of the block to the `name` phase of the current request.
+        Nested blocks of the same phase are counted once.
+    """
+    timings = current_timings.get()
+    if timings is None or name in timings._open:
+        yield
+        return
+    timings._open.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(name)
+        timings.phases[name] = timings.phases.get(name, 0.0) + time.perf_counter() - started
+
+
+_endpoint_paths: dict[int, dict] = {}
+
+
+def route_label(scope) -> str:
+    """
+        Path template of the matched route ("/bookings/delete_booking/{booking_id}"),
+        so metrics are not split by path parameters
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint, app = scope.get("endpoint"), scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    paths = _endpoint_paths.get(id(app))
+    if paths is None:
+        paths = _endpoint_paths[id(app)] = {
+            route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")
+        }
+    return paths.get(endpoint, "unmatched")
+
+
+class TimingMiddleware:
+    """
+        Pure ASGI middleware: wall time, SQL statements and auth time of every
+        HTTP request go to the Prometheus histograms and, at the start of the
+        response, into a `Server-Timing` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.server_timing_enabled:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            request_metrics.observe(
+                scope["method"], route_label(scope), status_code,
+                time.perf_counter() - timings.started, timings,
+            )
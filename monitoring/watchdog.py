@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+
+from config import settings
+from .profiler import frame_stack, is_idle
+from .prometheus import Histogram, request_metrics
+
+logger = logging.getLogger("loop.watchdog")
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopWatchdog:
+    """
+        Measures how late a coroutine sleeping `interval` seconds wakes up, i.e.
+        how long ready callbacks wait for the event loop, for the whole life of
+        the worker.
+
+        Wake-ups later than `threshold` are counted and logged. In debug mode a
+        helper thread also watches the heartbeat and, while the loop is stuck,
+        logs the stack of the code holding it, once per stall.
+    """
+
+    def __init__(self, interval: float, threshold: float, debug: bool):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.lag = Histogram(LAG_BUCKETS)
+        self.blocked = 0
+        self.max_lag = 0.0
+        self._last_tick = time.perf_counter()
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._last_tick = time.perf_counter()
+        self._task = asyncio.create_task(self._tick())
+        if self.debug:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True,
+            )
+            self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._last_tick = now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self.lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += 1
+                if not self.debug:
+                    logger.warning("Event loop blocked for %.1f ms", lag * 1000)
+
+    def _watch(self, loop_thread_id: int):
+        reported_tick = None
+        while not self._stop.wait(self.threshold / 2):
+            tick = self._last_tick
+            stalled = time.perf_counter() - tick - self.interval
+            if stalled <= self.threshold or tick == reported_tick:
+                continue
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None or is_idle(frame):
+                continue
+            reported_tick = tick
+            logger.warning("Event loop blocked for more than %.1f ms in:\n  %s",
+                           stalled * 1000, "\n  ".join(frame_stack(frame)))
+            del frame
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "debug": self.debug,
+            "ticks": self.lag.count,
+            "avg_lag_ms": round(self.lag.sum / self.lag.count * 1000, 3) if self.lag.count else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocked": self.blocked,
+        }
+
+    def render(self) -> list[str]:
+        return [
+            "# HELP event_loop_lag_seconds Delay of the watchdog wake-ups behind schedule",
+            "# TYPE event_loop_lag_seconds histogram",
+            *self.lag.render("event_loop_lag_seconds", ""),
+            "# HELP event_loop_blocked_total Wake-ups later than LOOP_BLOCK_THRESHOLD_MS",
+            "# TYPE event_loop_blocked_total counter",
+            f"event_loop_blocked_total {self.blocked}",
+        ]
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.loop_watchdog_interval_ms / 1000,
+    threshold=settings.loop_block_threshold_ms / 1000,
+    debug=settings.loop_watchdog_debug,
+)
+request_metrics.collectors.append(loop_watchdog.render)
@@ -0,0 +1,103 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from cache.redis_client import client_errors
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTokenBuckets:
+    """
+        Token buckets of this worker process, one per key, `rate` tokens per
+        second up to `burst`. The least recently used keys beyond `max_keys`
+        are dropped, which only resets them to a full bucket.
+    """
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+            Take one token. Returns 0 if it was available, otherwise the seconds
+            until one will be.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Refill and take in one round trip; the bucket expires once it would be full again
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisTokenBuckets:
+    """
+        Token buckets shared by all workers. `client` is anything with the async
+        `eval` of redis.asyncio.Redis, so a fake client can stand in for a server.
+
+        While Redis is unreachable the limits are kept per worker in `fallback`
+        instead of failing the requests.
+    """
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self._client = client
+        self._prefix = prefix
+        self._errors = client_errors()
+        self.fallback = MemoryTokenBuckets()
+        self.failures = 0
+        self._failing = False
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            retry_after = await self._client.eval(TAKE_SCRIPT, 1, self._prefix + key, rate, burst, time.time())
+        except self._errors:
+            self.failures += 1
+            if not self._failing:
+                self._failing = True
+                logger.exception("Rate limit backend unavailable, limiting per worker until it recovers")
+            return await self.fallback.take(key, rate, burst)
+        if self._failing:
+            self._failing = False
+            logger.warning("Rate limit backend recovered")
+        return float(retry_after)
+
+    def __len__(self):
+        return len(self.fallback)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
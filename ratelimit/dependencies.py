@@ -0,0 +1,20 @@
+from typing import Annotated
+
+from fastapi import Depends
+
+from auth.auth import get_current_active_user
+from config import settings
+from models.schemas import User, TokenUser
+from .limiter import booking_limits
+
+
+async def limit_bookings(current_user: Annotated[User | TokenUser, Depends(get_current_active_user)]):
+    """
+        Dependency for booking writes: rate limit by user id and hold a slot of
+        the bookings concurrency limit for the rest of the request
+    """
+    if not settings.rate_limit_enabled:
+        yield
+        return
+    async with booking_limits.admit(f"user:{current_user.id}"):
+        yield
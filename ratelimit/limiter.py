@@ -0,0 +1,173 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, Request, status
+
+from cache.redis_client import redis_from_url
+from config import settings
+from .buckets import MemoryTokenBuckets, RedisTokenBuckets, retry_after_header
+
+
+class ConcurrencyLimiter:
+    """
+        At most `limit` requests of a route class run at once in this worker and
+        at most `max_queue` more wait up to `queue_timeout` seconds for a slot.
+        Anything beyond that gets 503 with Retry-After right away, so a burst
+        does not turn into a long queue in front of the database pool.
+        `limit` 0 disables the limiter.
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+        self.timeouts = 0
+
+    def _overloaded(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is busy, please retry later",
+            headers={"Retry-After": retry_after_header(self.queue_timeout)},
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.limit <= 0:
+            yield
+            return
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                raise self._overloaded() from None
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise self._overloaded() from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "shed": self.shed,
+            "queue_timeouts": self.timeouts,
+        }
+
+
+class RouteLimits:
+    """
+        Token bucket per client (`per_minute` requests, bursts up to `burst`)
+        plus a concurrency limit shared by all clients of one route class
+    """
+
+    def __init__(self, name: str, buckets, per_minute: float, burst: int, concurrency: ConcurrencyLimiter):
+        self.name = name
+        self.buckets = buckets
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.concurrency = concurrency
+        self.limited = 0
+
+    async def check_rate(self, client_key: str):
+        if self.rate <= 0:
+            return
+        retry_after = await self.buckets.take(f"{self.name}:{client_key}", self.rate, self.burst)
+        if retry_after:
+            self.limited += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": retry_after_header(retry_after)},
+            )
+
+    @asynccontextmanager
+    async def admit(self, client_key: str):
+        # сначала лимит клиента, чтобы отклонённые запросы не занимали место в очереди
+        await self.check_rate(client_key)
+        async with self.concurrency.slot():
+            yield
+
+    def stats(self) -> dict:
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "rate_limited": self.limited,
+            "concurrency": self.concurrency.stats(),
+        }
+
+
+def make_buckets():
+    if settings.rate_limit_backend == "redis":
+        return RedisTokenBuckets(redis_from_url(settings.rate_limit_redis_url, "RATE_LIMIT_BACKEND"))
+    return MemoryTokenBuckets()
+
+
+buckets = make_buckets()
+
+# Создание и отмена броней: ограничение по пользователю, параллельность ~ размер пула БД
+booking_limits = RouteLimits(
+    "bookings",
+    buckets,
+    per_minute=settings.rate_limit_bookings_per_minute,
+    burst=settings.rate_limit_bookings_burst,
+    concurrency=ConcurrencyLimiter(
+        limit=settings.concurrency_bookings_limit or settings.db_pool_size + settings.db_max_overflow,
+        max_queue=settings.concurrency_max_queue,
+        queue_timeout=settings.concurrency_queue_timeout_seconds,
+    ),
+)
+
+# Логин и регистрация (bcrypt): ограничение по IP
+auth_limits = RouteLimits(
+    "auth",
+    buckets,
+    per_minute=settings.rate_limit_auth_per_minute,
+    burst=settings.rate_limit_auth_burst,
+    concurrency=ConcurrencyLimiter(
+        limit=settings.concurrency_auth_limit,
+        max_queue=settings.concurrency_max_queue,
+        queue_timeout=settings.concurrency_queue_timeout_seconds,
+    ),
+)
+
+
+def client_ip(request: Request) -> str:
+    # за прокси адрес клиента берётся из X-Forwarded-For при запуске uvicorn с --proxy-headers
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_auth(request: Request):
+    """Dependency for unauthenticated routes: rate limit by client IP"""
+    if not settings.rate_limit_enabled:
+        yield
+        return
+    async with auth_limits.admit(f"ip:{client_ip(request)}"):
+        yield
+
+
+def limits_stats() -> dict:
+    return {
+        "enabled": settings.rate_limit_enabled,
+        "backend": buckets.name,
+        "tracked_clients": len(buckets),
+        "backend_failures": getattr(buckets, "failures", 0),
+        "bookings": booking_limits.stats(),
+        "auth": auth_limits.stats(),
+    }
@@ -0,0 +1,163 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.auth import get_current_active_user
+from auth.cache import user_cache
+from auth.hashing import password_hasher
+from cache.responses import response_cache
+from config import settings
+from models import schemas
+from models.database import engine, read_engine, pool_status, get_db
+from monitoring.profiler import MAX_PROFILE_SECONDS, ProfileFormat, ProfileMode, profile_event_loop
+from monitoring.watchdog import loop_watchdog
+from ratelimit.limiter import limits_stats
+from workers.broadcast import availability_broadcaster
+from workers.partitions import partition_maintenance
+from workers.waitlist import waitlist_worker
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+@router.get("/cache/users")
+async def user_cache_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: hit/miss counters of the authenticated users cache
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return user_cache.stats()
+
+
+@router.get("/cache/responses")
+async def response_cache_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: hit ratio of the response cache behind GET /tables/
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return response_cache.stats()
+
+
+@router.get("/hashing")
+async def password_hashing_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: bcrypt worker pool latency and queue depth
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return password_hasher.stats()
+
+
+@router.get("/limits")
+async def rate_limit_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: rate limited and shed requests, current concurrency per route class
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return limits_stats()
+
+
+@router.get("/waitlist")
+async def waitlist_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: assignments made by the waitlist worker of this process
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return waitlist_worker.stats()
+
+
+@router.get("/live")
+async def live_updates_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: live availability subscribers of this process
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return availability_broadcaster.stats()
+
+
+@router.get("/partitions")
+async def partition_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Available only for Admin: monthly partitions of bookings and the last maintenance run of this process
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return await partition_maintenance.stats(db)
+
+
+@router.get("/db/pool")
+async def db_pool_status(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: checked out / idle / overflow connections and checkout wait times
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return {
+        "primary": pool_status(engine),
+        "replica": pool_status(read_engine) if read_engine is not engine else None,
+        "settings": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "statement_timeout_ms": settings.db_statement_timeout_ms,
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+            "query_cache_size": settings.db_query_cache_size,
+        },
+    }
+
+
+@router.get("/loop")
+async def event_loop_stats(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+):
+    """
+        Available only for Admin: event loop lag measured by the watchdog of this worker
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can see service stats")
+    return loop_watchdog.stats()
+
+
+@router.post("/profile")
+async def profile_worker(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+        interval_ms: float = Query(5, ge=1, le=100, description="Sampling interval"),
+        mode: ProfileMode = Query(ProfileMode.wall, description="wall keeps idle samples, cpu drops them"),
+        output: ProfileFormat = Query(ProfileFormat.collapsed, alias="format"),
+        block_threshold_ms: float = Query(100, ge=1, description="Report loop stalls longer than this"),
+):
+    """
+        Available only for Admin: sample the event loop of the worker that serves
+        this request for `seconds` and report loop lag with the stacks that blocked it
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can profile the service")
+    return await profile_event_loop(seconds, interval_ms, mode, output, block_threshold_ms)
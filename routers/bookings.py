@@ -1,12 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.auth import get_current_active_user
+from auth.auth import get_current_active_user, get_user_read_db
 from models import schemas, crud
-from models.database import get_db
+from models.availability import build_availability_grid
+from models.database import get_db, get_read_db
+from models.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ratelimit.dependencies import limit_bookings
+from .responses import rows_response
 
 router = APIRouter(
     prefix="/bookings",
@@ -14,82 +19,167 @@ router = APIRouter(
 )
 
 
-@router.post("/create", response_model=schemas.BookingShow)
+@router.post("/create", response_model=schemas.BookingShow, dependencies=[Depends(limit_bookings)])
 async def create_booking(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
         start_time: datetime = Query(..., description="Start time of the booking"),
         end_time: datetime = Query(..., description="End time of the booking"),
         table_type: schemas.TableType = Query(..., description="Type of the table"),
+        waitlist: bool = Query(False, description="Join the waitlist if no table is available"),
         db: AsyncSession = Depends(get_db)):
+    """
+        With waitlist=true a full slot returns 202 with a waitlist entry instead of 404,
+        its status is at /waitlist/{id} (or /waitlist/{id}/ws)
+    """
 
-    # Проверка, что end_time позже start_time
-    if end_time <= start_time:
-        raise HTTPException(status_code=400, detail="End time must be after start time")
-
-    # Проверка, что разница между start_time и end_time не менее 1 часа и не более 4 часов
-    duration = end_time - start_time
-    if duration < timedelta(hours=1) or duration > timedelta(hours=4):
-        raise HTTPException(status_code=400, detail="Booking duration must be between 1 and 4 hours")
+    # Проверка времени и длительности брони
+    slot = schemas.check_booking_slot(start_time, end_time)
 
-    # Поиск доступного стола указанного типа
-    table = await crud.get_available_table(db, table_type, start_time, end_time)
-    if not table:
+    # Выбор свободного стола и создание брони одним запросом
+    new_booking = await crud.book_available_table(db, table_type, slot, current_user.id)
+    if not new_booking:
+        if waitlist:
+            entry = await crud.join_waitlist(db, table_type, slot, current_user.id)
+            return ORJSONResponse(entry, status_code=202)
         raise HTTPException(status_code=404, detail="No available table of the selected type")
+    return ORJSONResponse(new_booking)
 
-    # Создание объекта бронирования
-    booking_data = schemas.BookingCreate(
-        start_time=start_time,
-        end_time=end_time,
-        user_id=current_user.id,
-        table_id=table.id,
-        table_type=table_type,
-    )
-    new_booking = await crud.create_booking(db=db, booking=booking_data)
-    return new_booking
+
+@router.post("/batch", response_model=schemas.BookingBatchResult, dependencies=[Depends(limit_bookings)])
+async def create_booking_batch(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        batch: schemas.BookingBatchCreate,
+        db: AsyncSession = Depends(get_db)):
+    """
+        Book tables of one type for a list of slots and/or a recurrence rule in one transaction.
+        In all_or_nothing mode nothing is booked unless every slot can be booked (409 otherwise),
+        in partial mode every slot that can be booked is booked.
+    """
+    requested = list(batch.slots)
+    if batch.recurrence:
+        requested += batch.recurrence.expand()
+    if not requested:
+        raise HTTPException(status_code=400, detail="No slots to book")
+    if len(requested) > schemas.MAX_BATCH_SLOTS:
+        raise HTTPException(status_code=400, detail=f"At most {schemas.MAX_BATCH_SLOTS} slots can be booked at once")
+
+    # Каждый слот проверяется по тем же правилам, что и одиночная бронь
+    results: list[schemas.BookingSlotResult] = []
+    valid_slots: list[schemas.BookingSlot] = []
+    for slot in requested:
+        try:
+            valid_slots.append(schemas.check_booking_slot(slot.start_time, slot.end_time))
+            results.append(schemas.BookingSlotResult(
+                start_time=slot.start_time, end_time=slot.end_time, status=schemas.SlotStatus.booked
+            ))
+        except HTTPException as e:
+            results.append(schemas.BookingSlotResult(
+                start_time=slot.start_time, end_time=slot.end_time,
+                status=schemas.SlotStatus.invalid, detail=e.detail
+            ))
+
+    all_or_nothing = batch.mode == schemas.BatchMode.all_or_nothing
+    if all_or_nothing and len(valid_slots) < len(requested):
+        raise HTTPException(status_code=400, detail=[r.model_dump(mode="json") for r in results])
+
+    bookings = iter(await crud.book_batch(db, batch.table_type, valid_slots, current_user.id, all_or_nothing))
+    for result in results:
+        if result.status != schemas.SlotStatus.booked:
+            continue
+        booking = next(bookings)
+        if booking is None:
+            result.status = schemas.SlotStatus.unavailable
+            result.detail = "No available table of the selected type"
+        else:
+            result.booking = schemas.BookingShow(**booking)
+
+    booked = sum(1 for result in results if result.status == schemas.SlotStatus.booked)
+    if all_or_nothing and booked < len(results):
+        for result in results:
+            if result.status == schemas.SlotStatus.booked:
+                result.status = schemas.SlotStatus.unavailable
+                result.detail = "Not booked: another slot of the batch is unavailable"
+        raise HTTPException(status_code=409, detail=[r.model_dump(mode="json") for r in results])
+
+    return schemas.BookingBatchResult(booked=booked, failed=len(results) - booked, results=results)
+
+
+@router.get("/availability", response_model=schemas.AvailabilityGrid)
+async def read_availability(
+        day: date = Query(..., alias="date", description="Day to show free tables for"),
+        table_type: schemas.TableType | None = Query(None, description="Only this type of table"),
+        db: AsyncSession = Depends(get_read_db),
+):
+    """
+        Free tables per hour and bookable start/duration combinations of a day,
+        for every table type
+    """
+    occupancy = await crud.get_day_occupancy(db, day)
+    return ORJSONResponse(build_availability_grid(day, occupancy, datetime.now(), table_type))
 
 
 @router.get("/my_bookings", response_model=list[schemas.BookingShow])
 async def read_bookings(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_user_read_db)
 ):
-    bookings = await crud.get_bookings(db=db, current_user=current_user)
-    return bookings
+    bookings, next_cursor = await crud.get_bookings(db=db, current_user=current_user, cursor=cursor, limit=limit)
+    return rows_response(bookings, next_cursor)
 
 
 @router.get("/my_upcoming_bookings", response_model=list[schemas.BookingShow])
 async def read_upcoming_bookings(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_user_read_db)
 ):
     bookings = await crud.get_upcoming_bookings(db=db, current_user=current_user)
-    return bookings
+    return rows_response(bookings)
 
 
 @router.get("/my_previous_bookings", response_model=list[schemas.BookingShow])
 async def read_previous_bookings(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_user_read_db)
 ):
-    bookings = await crud.get_previous_bookings(db=db, current_user=current_user)
-    return bookings
+    bookings, next_cursor = await crud.get_previous_bookings(
+        db=db, current_user=current_user, cursor=cursor, limit=limit
+    )
+    return rows_response(bookings, next_cursor)
 
 
 @router.get("/get_all_bookings", response_model=list[schemas.BookingShow])
 async def get_all_bookings(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        date_from: datetime | None = Query(None, description="Bookings starting at or after this time"),
+        date_to: datetime | None = Query(None, description="Bookings starting before this time"),
+        table_id: int | None = Query(None),
+        user_id: int | None = Query(None),
+        cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_user_read_db)
 ):
     """
-    Available only for Admin: get all bookings made by all users
+    Available only for Admin: get all bookings made by all users, page by page
     """
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Access denied: only Admin can see all bookings")
-    bookings = await crud.admin_get_all_bookings(db=db)
-    return bookings
+    bookings, next_cursor = await crud.admin_get_all_bookings(
+        db=db,
+        user_id=user_id,
+        table_id=table_id,
+        date_from=date_from,
+        date_to=date_to,
+        cursor=cursor,
+        limit=limit,
+    )
+    return rows_response(bookings, next_cursor)
 
 
-@router.delete("/delete_booking/{booking_id}")
+@router.delete("/delete_booking/{booking_id}", dependencies=[Depends(limit_bookings)])
 async def delete_booking(
         current_user: Annotated[schemas.User, Depends(get_current_active_user)],
         booking_id: int,
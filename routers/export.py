@@ -0,0 +1,74 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Annotated
+
+import orjson
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+
+from auth.auth import get_current_active_user
+from models import schemas, crud
+from models.database import ReadSessionLocal
+
+router = APIRouter(
+    prefix="/bookings",
+    tags=["bookings"],
+)
+
+CSV_COLUMNS = ("id", "start_time", "end_time", "user_id", "table_id")
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def encode_ndjson(rows) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(CSV_COLUMNS, row)), option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (booking_id, start_time.isoformat(), end_time.isoformat(), user_id, table_id)
+        for booking_id, start_time, end_time, user_id, table_id in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def export_chunks(export_format: ExportFormat, filters: list):
+    # Сессия открывается внутри генератора: зависимость get_db закрылась бы раньше,
+    # чем StreamingResponse дочитает данные
+    encode = encode_csv if export_format == ExportFormat.csv else encode_ndjson
+    if export_format == ExportFormat.csv:
+        yield (",".join(CSV_COLUMNS) + "\r\n").encode()
+    async with ReadSessionLocal() as db:
+        async for rows in crud.stream_bookings(db, *filters):
+            yield encode(rows)
+
+
+@router.get("/export")
+async def export_bookings(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+        date_from: datetime | None = Query(None, description="Bookings starting at or after this time"),
+        date_to: datetime | None = Query(None, description="Bookings starting before this time"),
+        table_id: int | None = Query(None),
+):
+    """
+        Available only for Admin: stream all bookings as NDJSON or CSV
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can export bookings")
+    filters = crud.booking_filters(table_id=table_id, date_from=date_from, date_to=date_to)
+    media_type = "text/csv" if export_format == ExportFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        export_chunks(export_format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="bookings.{export_format.value}"'},
+    )
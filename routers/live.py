@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from config import settings
+from workers.broadcast import availability_broadcaster
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+)
+
+# Через сколько миллисекунд EventSource переподключается после обрыва
+SSE_RETRY_MS = 3000
+# Heartbeat WebSocket: пустой список событий, заодно обнаруживает закрытые соединения
+EMPTY_EVENTS = "[]"
+
+
+async def _sse_events():
+    # подписка создаётся при первой итерации и живёт ровно столько, сколько генератор ответа
+    subscriber = availability_broadcaster.subscribe()
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            messages = await subscriber.receive(settings.live_updates_heartbeat_seconds)
+            if messages:
+                yield "".join(f"data: {message}\n\n" for message in messages)
+            else:
+                yield ": ping\n\n"
+    finally:
+        availability_broadcaster.unsubscribe(subscriber)
+
+
+@router.get("/availability")
+async def availability_events():
+    """
+        Server-Sent Events stream of availability changes. Every message is a JSON
+        array of events: booked / cancelled (booking id, table_id, start_time,
+        end_time), tables_added (ids, table_type), tables_deleted (ids) and resync,
+        after which the client reloads GET /bookings/availability and GET /tables/.
+        The first message is always a resync.
+    """
+    availability_broadcaster.check_capacity()
+    return StreamingResponse(
+        _sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/availability/ws")
+async def availability_socket(websocket: WebSocket):
+    """
+        The same events as /live/availability, one JSON array per text message
+    """
+    try:
+        availability_broadcaster.check_capacity()
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    subscriber = availability_broadcaster.subscribe()
+    try:
+        while True:
+            messages = await subscriber.receive(settings.live_updates_heartbeat_seconds)
+            for message in messages or [EMPTY_EVENTS]:
+                await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        availability_broadcaster.unsubscribe(subscriber)
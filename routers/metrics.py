@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from monitoring.prometheus import request_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    """
+        Prometheus text exposition of this worker's request and SQL metrics
+    """
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,18 @@
+from collections.abc import Iterable, Mapping
+
+from fastapi.responses import ORJSONResponse
+
+from models.pagination import NEXT_CURSOR_HEADER
+
+
+def rows_response(rows: Iterable[Mapping], next_cursor: str | None = None) -> ORJSONResponse:
+    """
+        Encode column-only query rows straight to JSON with orjson.
+
+        The rows already have exactly the fields of the declared response_model,
+        so returning a response object skips the per-row Pydantic validation
+        that FastAPI would otherwise run. response_model is still declared on
+        the route for the OpenAPI schema.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return ORJSONResponse([dict(row) for row in rows], headers=headers)
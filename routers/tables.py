@@ -1,10 +1,13 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth import get_current_active_user
+from cache.responses import response_cache, TABLES_RESPONSE_KEY
 from models import schemas, crud
-from models.database import get_db
+from models.database import get_db, get_read_db
+from .responses import rows_response
 
 router = APIRouter(
     prefix="/tables",
@@ -26,10 +29,33 @@ async def add_table(
     return await crud.create_table(db=db, table=table)
 
 
+@router.post("/bulk_add", response_model=list[schemas.Table])
+async def bulk_add_tables(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        tables: schemas.TableBulkCreate,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Available only for Admin: add many tables of one type at once
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can add new tables")
+    created = await crud.create_tables(db=db, tables=tables)
+    return rows_response(created)
+
+
 @router.get("/", response_model=list[schemas.Table])
-async def read_tables(db: AsyncSession = Depends(get_db)):
-    tables = await crud.get_tables(db=db)
-    return tables
+async def read_tables(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+        Served from the response cache with an ETag; `If-None-Match` with the current ETag gets a 304
+    """
+    cached = await response_cache.get(TABLES_RESPONSE_KEY)
+    if cached is None:
+        # сессия не берёт соединение из пула, пока ответ есть в кэше
+        generation = await response_cache.generation(TABLES_RESPONSE_KEY)
+        tables = await crud.get_tables(db=db)
+        cached = await response_cache.fill(TABLES_RESPONSE_KEY, orjson.dumps([dict(row) for row in tables]), generation)
+    return cached.to_response(request)
 
 
 @router.delete("/delete_table/{table_id}")
@@ -44,3 +70,19 @@ async def delete_table(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Access denied: only Admin can delete tables")
     return await crud.delete_table(db=db, table_id=table_id)
+
+
+@router.post("/bulk_delete", response_model=schemas.TableBulkDeleteResult)
+async def bulk_delete_tables(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        tables: schemas.TableBulkDelete,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Available only for Admin: delete tables by a list of ids together with their bookings
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can delete tables")
+    deleted = await crud.delete_tables(db=db, table_ids=tables.ids)
+    not_found = sorted(set(tables.ids) - set(deleted))
+    return schemas.TableBulkDeleteResult(deleted=sorted(deleted), not_found=not_found)
@@ -3,9 +3,10 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.auth import get_current_active_user
+from auth.auth import get_current_active_user, get_current_user, ensure_active
 from models import schemas, crud
 from models.database import get_db
+from ratelimit.limiter import limit_auth
 
 router = APIRouter(
     prefix="/users",
@@ -13,7 +14,7 @@ router = APIRouter(
 )
 
 
-@router.post("/register", response_model=schemas.User)
+@router.post("/register", response_model=schemas.User, dependencies=[Depends(limit_auth)])
 async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
@@ -23,6 +24,21 @@ async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db))
 
 @router.get("/me", response_model=schemas.User)
 async def read_users_me(
-        current_user: Annotated[schemas.User, Depends(get_current_active_user)]
+        current_user: Annotated[schemas.User, Depends(get_current_user)]
 ):
-    return current_user
+    return ensure_active(current_user)
+
+
+@router.patch("/{user_id}/status", response_model=schemas.User)
+async def update_user_status(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        user_id: int,
+        user_status: schemas.UserStatusUpdate,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Available only for Admin: disable/enable users and grant/revoke admin rights
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied: only Admin can change user status")
+    return await crud.update_user_status(db=db, user_id=user_id, user_status=user_status)
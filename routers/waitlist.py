@@ -0,0 +1,82 @@
+import asyncio
+from typing import Annotated
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.auth import get_current_active_user
+from models import schemas, crud
+from models.database import get_db, SessionLocal
+from workers.waitlist import waitlist_worker
+
+router = APIRouter(
+    prefix="/waitlist",
+    tags=["waitlist"],
+)
+
+# Как часто WebSocket перечитывает статус без уведомления (отмена, истечение)
+RECHECK_SECONDS = 30
+
+
+@router.get("/{entry_id}", response_model=schemas.WaitlistEntry)
+async def read_waitlist_entry(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        entry_id: int,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Status of a waitlist entry: position in the queue while waiting, booking_id once assigned
+    """
+    return ORJSONResponse(await crud.get_waitlist_entry(db, entry_id, current_user))
+
+
+@router.delete("/{entry_id}")
+async def cancel_waitlist_entry(
+        current_user: Annotated[schemas.User, Depends(get_current_active_user)],
+        entry_id: int,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+        Leave the waitlist while the entry is still waiting
+    """
+    return await crud.cancel_waitlist_entry(db, entry_id, current_user)
+
+
+@router.websocket("/{entry_id}/ws")
+async def waitlist_updates(
+        websocket: WebSocket,
+        entry_id: int,
+        token: str = Query(..., description="Access token, browsers cannot send headers with WebSocket"),
+):
+    """
+        Sends the entry on connect and after every change, closes once it is no longer waiting
+    """
+    try:
+        async with SessionLocal() as db:
+            current_user = await get_current_active_user(token, db)
+            entry = await crud.get_waitlist_entry(db, entry_id, current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    changed = waitlist_worker.subscribe(entry_id)
+    try:
+        while True:
+            await websocket.send_text(orjson.dumps(entry).decode())
+            if entry["status"] != schemas.WaitlistStatus.waiting.value:
+                break
+            try:
+                await asyncio.wait_for(changed.wait(), RECHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+            async with SessionLocal() as db:
+                entry = await crud.get_waitlist_entry(db, entry_id, current_user)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        waitlist_worker.unsubscribe(entry_id, changed)
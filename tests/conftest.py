@@ -0,0 +1,50 @@
+import pytest
+
+from cache.responses import FILL_SCRIPT
+
+
+class FakeRedis:
+    """
+        In-memory stand-in for the few redis.asyncio.Redis calls the backends
+        make; `eval` understands only the scripts registered in SCRIPTS.
+        Values come back as bytes, like from a real client.
+    """
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value, ex: int | None = None, px: int | None = None):
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    async def exists(self, *keys: str) -> int:
+        return sum(key in self.data for key in keys)
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        return await self.SCRIPTS[script](self, keys, args)
+
+    async def _fill(self, keys, args) -> int:
+        key, gen_key = keys
+        value, generation, ttl = args
+        if (await self.get(gen_key) or b"0").decode() != generation:
+            return 0
+        await self.set(key, value, ex=ttl)
+        return 1
+
+    SCRIPTS = {FILL_SCRIPT: _fill}
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models.allocation import AllocationStrategy, TableAllocator, fit_key, gaps_around
+from models.occupancy import DAY_HOURS, OccupancyMap, hours_mask
+from models.schemas import OPENING_HOUR, TableType
+
+DAY = date(2030, 1, 15)
+TABLE_TYPE = TableType.two_guest_table.value
+
+
+def reference_gaps(day_mask: int, first: int, last: int) -> tuple[int, int]:
+    """Free hours counted one by one down from `first` and up from `last` (exclusive)"""
+    before = 0
+    while first - before - 1 >= 0 and not day_mask >> (first - before - 1) & 1:
+        before += 1
+    after = 0
+    while last + after < DAY_HOURS and not day_mask >> (last + after) & 1:
+        after += 1
+    return before, after
+
+
+def test_no_neighbours():
+    for first in range(DAY_HOURS):
+        for last in range(first + 1, DAY_HOURS + 1):
+            mask = ((1 << (last - first)) - 1) << first
+            assert gaps_around(0, mask) == (first, DAY_HOURS - last)
+
+
+def test_whole_day():
+    assert gaps_around(0, (1 << DAY_HOURS) - 1) == (0, 0)
+
+
+def test_neighbours_on_one_side():
+    # бронь вплотную к занятому первому часу, справа до конца дня свободно
+    assert gaps_around(0b1, 0b110) == (0, DAY_HOURS - 3)
+    # бронь вплотную к занятому последнему часу, слева свободно с открытия
+    last_hour = 1 << (DAY_HOURS - 1)
+    assert gaps_around(last_hour, last_hour >> 1) == (DAY_HOURS - 2, 0)
+
+
+def test_matches_reference_for_every_day():
+    for day_mask in range(1 << DAY_HOURS):
+        for first in range(DAY_HOURS):
+            for last in range(first + 1, min(first + 4, DAY_HOURS) + 1):
+                mask = ((1 << (last - first)) - 1) << first
+                if day_mask & mask:
+                    continue
+                assert gaps_around(day_mask, mask) == reference_gaps(day_mask, first, last), (bin(day_mask), first, last)
+
+
+def test_fit_key_prefers_tight_runs():
+    # два свободных часа вокруг брони хуже, чем бронь вплотную к соседу
+    assert fit_key(0b1, 0b10) < fit_key(0b0, 0b10)
+
+
+@pytest.mark.parametrize("strategy", list(AllocationStrategy))
+def test_pick_returns_free_table(strategy: AllocationStrategy):
+    occupancy = OccupancyMap()
+    for table_id in (1, 2, 3):
+        occupancy.add_table(table_id, TABLE_TYPE)
+    opening = datetime(DAY.year, DAY.month, DAY.day, OPENING_HOUR)
+    # стол 1 занят в первый час, стол 2 свободен весь день, стол 3 занят целиком
+    occupancy.add_booking(1, 1, opening, opening + timedelta(hours=1))
+    occupancy.add_booking(2, 3, opening, opening + timedelta(hours=DAY_HOURS))
+
+    allocator = TableAllocator(strategy, upgrade=False)
+    picked = allocator.pick(occupancy, TableType.two_guest_table, DAY, hours_mask(OPENING_HOUR + 1, 2))
+    # best-fit ставит бронь вплотную к брони стола 1, first-fit берёт наименьший id
+    assert picked == 1
+    assert allocator.pick(occupancy, TableType.two_guest_table, DAY, hours_mask(OPENING_HOUR, 1)) == 2
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from routers import live
+from workers.broadcast import RESYNC, AvailabilityBroadcaster, Subscriber, availability_broadcaster
+
+BOOKED = '[{"op":"booked","id":1}]'
+
+
+def test_new_subscriber_starts_with_resync():
+    async def scenario():
+        return await Subscriber().receive(timeout=1)
+
+    assert asyncio.run(scenario()) == [RESYNC]
+
+
+def test_idle_subscriber_gets_heartbeat():
+    async def scenario():
+        subscriber = Subscriber()
+        await subscriber.receive(timeout=1)
+        # ни одного события за время ожидания: пустой список вместо исключения
+        return await subscriber.receive(timeout=0.01)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_sse_stream_pings_when_idle(monkeypatch):
+    monkeypatch.setattr(live, "settings", SimpleNamespace(live_updates_heartbeat_seconds=0.01))
+
+    async def scenario():
+        events = live._sse_events()
+        chunks = [await anext(events) for _ in range(3)]
+        await events.aclose()
+        return chunks
+
+    retry, resync, ping = asyncio.run(scenario())
+    assert retry.startswith("retry:")
+    assert resync == f"data: {RESYNC}\n\n"
+    assert ping == ": ping\n\n"
+    assert availability_broadcaster.stats()["subscribers"] == 0
+
+
+def test_published_payloads_are_delivered_in_order():
+    async def scenario():
+        broadcaster = AvailabilityBroadcaster(max_subscribers=10, max_pending=10)
+        subscriber = broadcaster.subscribe()
+        await subscriber.receive(timeout=1)
+        broadcaster.publish(BOOKED)
+        broadcaster.publish("[]")
+        return await subscriber.receive(timeout=1), broadcaster
+
+    messages, broadcaster = asyncio.run(scenario())
+    assert messages == [BOOKED, "[]"]
+    assert broadcaster.published == 2 and broadcaster.overflows == 0
+
+
+def test_slow_subscriber_overflows_into_resync():
+    async def scenario():
+        broadcaster = AvailabilityBroadcaster(max_subscribers=10, max_pending=2)
+        slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+        await slow.receive(timeout=1)
+        await fast.receive(timeout=1)
+        for _ in range(3):
+            broadcaster.publish(BOOKED)
+            if fast.pending:
+                await fast.receive(timeout=1)
+        overflowed = await slow.receive(timeout=1)
+        # после resync клиент снова получает события
+        broadcaster.publish(BOOKED)
+        return overflowed, await slow.receive(timeout=1), broadcaster
+
+    overflowed, after, broadcaster = asyncio.run(scenario())
+    assert overflowed == [RESYNC]
+    assert after == [BOOKED]
+    assert broadcaster.overflows == 1
+
+
+def test_listener_reconnect_resyncs_everybody():
+    async def scenario():
+        broadcaster = AvailabilityBroadcaster(max_subscribers=10, max_pending=10)
+        subscribers = [broadcaster.subscribe() for _ in range(3)]
+        for subscriber in subscribers:
+            await subscriber.receive(timeout=1)
+        broadcaster.publish(BOOKED)
+        broadcaster.publish(None)
+        return [await subscriber.receive(timeout=1) for subscriber in subscribers]
+
+    assert asyncio.run(scenario()) == [[RESYNC]] * 3
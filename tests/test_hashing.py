@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from auth.hashing import PasswordHasher
+
+
+async def settle(hasher: PasswordHasher, pending: int):
+    for _ in range(200):
+        if hasher.pending == pending:
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"pending stayed at {hasher.pending}, expected {pending}")
+
+
+def test_cancelled_waiters_release_their_slots():
+    hasher = PasswordHasher(workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(hasher._run(release.wait))
+        queued = asyncio.create_task(hasher._run(release.wait))
+        await settle(hasher, 2)
+
+        # запрос из очереди отменён до начала работы - место сразу освобождается
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        await settle(hasher, 1)
+
+        # bcrypt уже считается в пуле: место занято, пока он не закончит
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert hasher.pending == 1
+
+        release.set()
+        await settle(hasher, 0)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_full_pool_rejects_with_503():
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(hasher._run(release.wait))
+        await settle(hasher, 1)
+        with pytest.raises(HTTPException) as rejected:
+            await hasher._run(release.wait)
+        release.set()
+        await running
+        await settle(hasher, 0)
+        return rejected.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert hasher.rejected == 1
@@ -0,0 +1,168 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models.occupancy import DAY_HOURS, LANE_BITS, OccupancyMap, hours_mask, occupancy_mask
+from models.schemas import OPENING_HOUR, CLOSING_HOUR, MAX_BOOKING_HOURS
+
+DAY = date(2030, 1, 15)
+TABLE_TYPE = "two guest table"
+FULL_DAY = (1 << DAY_HOURS) - 1
+
+
+def at(hour: int, day: date = DAY) -> datetime:
+    return datetime(day.year, day.month, day.day) + timedelta(hours=hour)
+
+
+class ReferenceMap:
+    """Busy hours of every table as plain sets, checked one table at a time"""
+
+    def __init__(self):
+        self.tables: dict[int, set[int]] = {}
+        self.bookings: dict[int, tuple[int, set[int]]] = {}
+
+    def add_table(self, table_id: int):
+        self.tables.setdefault(table_id, set())
+
+    def remove_table(self, table_id: int):
+        del self.tables[table_id]
+        self.bookings = {b: entry for b, entry in self.bookings.items() if entry[0] != table_id}
+
+    def add_booking(self, booking_id: int, table_id: int, first_hour: int, hours: int):
+        busy = set(range(first_hour - OPENING_HOUR, first_hour - OPENING_HOUR + hours))
+        self.tables[table_id] |= busy
+        self.bookings[booking_id] = (table_id, busy)
+
+    def remove_booking(self, booking_id: int):
+        table_id, busy = self.bookings.pop(booking_id)
+        self.tables[table_id] -= busy
+
+    def day_mask(self, table_id: int) -> int:
+        return sum(1 << cell for cell in self.tables[table_id])
+
+    def free_tables(self, mask: int) -> list[int]:
+        return [table_id for table_id in sorted(self.tables) if not self.day_mask(table_id) & mask]
+
+
+def all_masks():
+    masks = [FULL_DAY]
+    for first_hour in range(OPENING_HOUR, CLOSING_HOUR):
+        for hours in range(1, min(MAX_BOOKING_HOURS, CLOSING_HOUR - first_hour) + 1):
+            masks.append(hours_mask(first_hour, hours))
+    return masks
+
+
+def assert_matches(occupancy: OccupancyMap, reference: ReferenceMap):
+    assert occupancy.masks(DAY).get(TABLE_TYPE, []) == [reference.day_mask(t) for t in sorted(reference.tables)]
+    for mask in all_masks():
+        expected = reference.free_tables(mask)
+        assert occupancy.free_tables(TABLE_TYPE, DAY, mask) == expected
+        assert occupancy.count_free(TABLE_TYPE, DAY, mask) == len(expected)
+        assert occupancy.first_free(TABLE_TYPE, DAY, mask) == (expected[0] if expected else None)
+        assert occupancy.free_table_masks(TABLE_TYPE, DAY, mask) == [(t, reference.day_mask(t)) for t in expected]
+
+
+def test_day_fits_in_lane():
+    assert DAY_HOURS < LANE_BITS
+    assert occupancy_mask(DAY, at(OPENING_HOUR), at(CLOSING_HOUR)) == FULL_DAY
+
+
+def test_first_and_last_hour():
+    occupancy, reference = OccupancyMap(), ReferenceMap()
+    for table_id in (1, 2, 3):
+        occupancy.add_table(table_id, TABLE_TYPE)
+        reference.add_table(table_id)
+    occupancy.add_booking(1, 1, at(OPENING_HOUR), at(OPENING_HOUR + 1))
+    reference.add_booking(1, 1, OPENING_HOUR, 1)
+    occupancy.add_booking(2, 2, at(CLOSING_HOUR - 1), at(CLOSING_HOUR))
+    reference.add_booking(2, 2, CLOSING_HOUR - 1, 1)
+
+    assert occupancy.masks(DAY)[TABLE_TYPE] == [1, 1 << (DAY_HOURS - 1), 0]
+    assert_matches(occupancy, reference)
+
+
+def test_full_lanes_do_not_spill_into_neighbours():
+    # полностью занятые 12 бит полосы соседствуют со свободными полосами и с 16-битной границей
+    occupancy, reference = OccupancyMap(), ReferenceMap()
+    for table_id in range(1, 6):
+        occupancy.add_table(table_id, TABLE_TYPE)
+        reference.add_table(table_id)
+    for booking_id, table_id in enumerate((2, 4), start=1):
+        occupancy.add_booking(booking_id, table_id, at(OPENING_HOUR), at(CLOSING_HOUR))
+        reference.add_booking(booking_id, table_id, OPENING_HOUR, DAY_HOURS)
+
+    assert occupancy.masks(DAY)[TABLE_TYPE] == [0, FULL_DAY, 0, FULL_DAY, 0]
+    assert_matches(occupancy, reference)
+
+
+def test_fully_booked_day():
+    occupancy = OccupancyMap()
+    for table_id in range(1, 9):
+        occupancy.add_table(table_id, TABLE_TYPE)
+        occupancy.add_booking(table_id, table_id, at(OPENING_HOUR), at(CLOSING_HOUR))
+
+    for mask in all_masks():
+        assert occupancy.first_free(TABLE_TYPE, DAY, mask) is None
+        assert occupancy.free_tables(TABLE_TYPE, DAY, mask) == []
+        assert occupancy.count_free(TABLE_TYPE, DAY, mask) == 0
+    # другой день остаётся свободным
+    assert occupancy.count_free(TABLE_TYPE, DAY + timedelta(days=1), FULL_DAY) == 8
+
+
+def test_unknown_type_and_empty_day():
+    occupancy = OccupancyMap()
+    assert occupancy.first_free(TABLE_TYPE, DAY, FULL_DAY) is None
+    occupancy.add_table(7, TABLE_TYPE)
+    assert occupancy.first_free(TABLE_TYPE, DAY, FULL_DAY) == 7
+    assert occupancy.free_table_masks(TABLE_TYPE, DAY, FULL_DAY) == [(7, 0)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_operations_match_reference(seed: int):
+    rng = random.Random(seed)
+    occupancy, reference = OccupancyMap(), ReferenceMap()
+    table_ids = rng.sample(range(1, 200), 40)
+    for table_id in table_ids:
+        occupancy.add_table(table_id, TABLE_TYPE)
+        reference.add_table(table_id)
+
+    booking_id = 0
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.6:
+            table_id = rng.choice(sorted(reference.tables))
+            first_hour = rng.randrange(OPENING_HOUR, CLOSING_HOUR)
+            hours = rng.randint(1, min(MAX_BOOKING_HOURS, CLOSING_HOUR - first_hour))
+            if reference.day_mask(table_id) & hours_mask(first_hour, hours):
+                continue
+            booking_id += 1
+            occupancy.add_booking(booking_id, table_id, at(first_hour), at(first_hour + hours))
+            reference.add_booking(booking_id, table_id, first_hour, hours)
+        elif action < 0.85 and reference.bookings:
+            removed = rng.choice(sorted(reference.bookings))
+            occupancy.remove_booking(removed)
+            reference.remove_booking(removed)
+        elif action < 0.93:
+            # новый стол вставляет полосу в середину упакованного числа
+            table_id = rng.choice([t for t in range(1, 250) if t not in reference.tables])
+            occupancy.add_table(table_id, TABLE_TYPE)
+            reference.add_table(table_id)
+        elif len(reference.tables) > 1:
+            table_id = rng.choice(sorted(reference.tables))
+            occupancy.remove_table(table_id)
+            reference.remove_table(table_id)
+    assert_matches(occupancy, reference)
+
+
+def test_prune_drops_past_days():
+    occupancy = OccupancyMap()
+    occupancy.add_table(1, TABLE_TYPE)
+    occupancy.add_booking(1, 1, at(OPENING_HOUR), at(OPENING_HOUR + 2))
+    occupancy.add_booking(2, 1, at(OPENING_HOUR, DAY + timedelta(days=1)), at(OPENING_HOUR + 2, DAY + timedelta(days=1)))
+
+    occupancy.prune(DAY + timedelta(days=1))
+    assert occupancy.masks(DAY)[TABLE_TYPE] == [0]
+    assert occupancy.masks(DAY + timedelta(days=1))[TABLE_TYPE] == [0b11]
+    occupancy.remove_booking(2)
+    assert occupancy.masks(DAY + timedelta(days=1))[TABLE_TYPE] == [0]
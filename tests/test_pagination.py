@@ -0,0 +1,91 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from models import crud
+from models.pagination import decode_cursor, encode_cursor
+
+START = datetime(2030, 1, 15, 12)
+
+
+def test_round_trip():
+    for start_time, booking_id in [(START, 1), (START.replace(microsecond=123456), 2 ** 40)]:
+        cursor = encode_cursor(start_time, booking_id)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (start_time, booking_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "garbage",
+    "%%%",
+    "тест",
+    base64.urlsafe_b64encode(b"\xff\xfe\xfd").decode(),
+    base64.urlsafe_b64encode(b"2030-01-15T12:00:00").decode(),
+    base64.urlsafe_b64encode(b"2030-01-15T12:00:00|1|2").decode(),
+    base64.urlsafe_b64encode(b"2030-13-45T12:00:00|1").decode(),
+    base64.urlsafe_b64encode(b"2030-01-15T12:00:00|one").decode(),
+    # подделанный курсор: испорчен один символ
+    encode_cursor(START, 7)[:-2] + "!!",
+])
+def test_invalid_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """
+        Evaluates the keyset page of list_bookings over `rows` in Python and
+        keeps the compiled statements
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: (row["start_time"], row["id"]))
+        self.statements = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append(str(compiled))
+        # без фильтров параметры - (start_time, id) курсора, если он есть, и LIMIT
+        *after, limit = compiled.params.values()
+        rows = self.rows
+        if after:
+            rows = [row for row in rows if (row["start_time"], row["id"]) > tuple(after)]
+        return FakeResult(rows[:limit])
+
+
+def test_keyset_order_on_equal_start_time():
+    # много броней с одним временем начала: порядок внутри него задаёт id
+    rows = [{"id": booking_id, "start_time": START + timedelta(hours=booking_id % 2)}
+            for booking_id in range(1, 24)]
+    db = FakeSession(rows)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(crud.list_bookings(db, cursor=cursor, limit=5))
+        seen += [row["id"] for row in page]
+        if cursor is None:
+            break
+        assert decode_cursor(cursor) == (page[-1]["start_time"], page[-1]["id"])
+
+    expected = [row["id"] for row in sorted(rows, key=lambda row: (row["start_time"], row["id"]))]
+    assert seen == expected
+    assert len(db.statements) == 5
+    assert "(bookings_history.start_time, bookings_history.id) >" in db.statements[1]
+    assert "ORDER BY bookings_history.start_time, bookings_history.id" in db.statements[1]
@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from ratelimit import buckets
+from ratelimit.buckets import MemoryTokenBuckets, RedisTokenBuckets
+from ratelimit.limiter import ConcurrencyLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(buckets, "time", clock)
+    return clock
+
+
+def take(bucket, key: str = "user:1", rate: float = 1.0, burst: int = 3) -> float:
+    return asyncio.run(bucket.take(key, rate, burst))
+
+
+def test_memory_bucket_allows_burst_then_limits(clock):
+    bucket = MemoryTokenBuckets()
+    assert [take(bucket) for _ in range(3)] == [0, 0, 0]
+    assert take(bucket) == pytest.approx(1.0)
+    # ключи независимы
+    assert take(bucket, key="user:2") == 0
+
+
+def test_memory_bucket_refills_up_to_burst(clock):
+    bucket = MemoryTokenBuckets()
+    for _ in range(3):
+        take(bucket)
+    clock.now += 2
+    assert [take(bucket) for _ in range(2)] == [0, 0]
+    assert take(bucket) > 0
+
+    clock.now += 3600
+    assert [take(bucket) for _ in range(3)] == [0, 0, 0]
+    assert take(bucket) > 0
+
+
+def test_memory_bucket_drops_least_recent_keys(clock):
+    bucket = MemoryTokenBuckets(max_keys=2)
+    for key in ("a", "b", "c"):
+        take(bucket, key=key, burst=1)
+    assert len(bucket) == 2
+    # "a" вытеснен и снова начинает с полного ведра
+    assert take(bucket, key="a", burst=1) == 0
+    assert take(bucket, key="c", burst=1) > 0
+
+
+class FlakyRedis:
+    """Stands in for redis.asyncio.Redis: `eval` returns `retry_after` or raises `error`"""
+
+    def __init__(self):
+        self.error: BaseException | None = None
+        self.retry_after = "0"
+        self.calls = 0
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.retry_after
+
+
+def test_redis_bucket_returns_script_result(clock):
+    client = FlakyRedis()
+    client.retry_after = "0.5"
+    assert take(RedisTokenBuckets(client)) == 0.5
+
+
+@pytest.mark.parametrize("error", [ConnectionRefusedError("down"), asyncio.TimeoutError()])
+def test_redis_outage_falls_back_to_worker_buckets(clock, error):
+    client = FlakyRedis()
+    client.error = error
+    bucket = RedisTokenBuckets(client)
+
+    # запросы не падают, лимит продолжает действовать в пределах воркера
+    assert [take(bucket) for _ in range(3)] == [0, 0, 0]
+    assert take(bucket) > 0
+    assert bucket.failures == 4
+
+    client.error = None
+    client.retry_after = "0"
+    assert take(bucket) == 0
+    assert client.calls == 5
+    assert bucket.failures == 4
+
+
+def test_redis_programming_errors_are_not_swallowed(clock):
+    client = FlakyRedis()
+    client.error = ValueError("bad script")
+    with pytest.raises(ValueError):
+        take(RedisTokenBuckets(client))
+
+
+def test_queue_timeout_returns_503():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=0.01)
+
+    async def scenario():
+        async with limiter.slot():
+            with pytest.raises(HTTPException) as timed_out:
+                async with limiter.slot():
+                    pass
+        return timed_out.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert limiter.timeouts == 1
+    assert limiter.stats()["active"] == 0 and limiter.stats()["waiting"] == 0
+
+
+def test_full_queue_is_shed_immediately():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=1)
+
+    async def scenario():
+        async with limiter.slot():
+            waiting = asyncio.create_task(limiter.slot().__aenter__())
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as shed:
+                async with limiter.slot():
+                    pass
+            waiting.cancel()
+        return shed.value
+
+    assert asyncio.run(scenario()).status_code == 503
+    assert limiter.shed == 1
+
+
+def test_disabled_limiter_admits_everything():
+    limiter = ConcurrencyLimiter(limit=0, max_queue=0, queue_timeout=0)
+
+    async def scenario():
+        async with limiter.slot():
+            async with limiter.slot():
+                return True
+
+    assert asyncio.run(scenario())
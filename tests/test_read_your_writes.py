@@ -0,0 +1,51 @@
+import asyncio
+
+from models import database
+from models.database import RecentWriters, RedisRecentWriters
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_memory_marks_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(database, "time", clock)
+    writers = RecentWriters(window=5)
+
+    asyncio.run(writers.mark(1))
+    assert asyncio.run(writers.is_recent(1))
+    assert not asyncio.run(writers.is_recent(2))
+    clock.now += 5
+    assert not asyncio.run(writers.is_recent(1))
+
+
+def test_redis_marks_are_seen_by_other_workers(fake_redis):
+    writer, reader = RedisRecentWriters(fake_redis, window=5), RedisRecentWriters(fake_redis, window=5)
+
+    asyncio.run(writer.mark(1))
+    assert asyncio.run(reader.is_recent(1))
+    assert not asyncio.run(reader.is_recent(2))
+    assert list(fake_redis.data) == ["recent_writer:1"]
+
+
+class DownRedis:
+    async def set(self, *args, **kwargs):
+        raise ConnectionRefusedError("down")
+
+    async def exists(self, *keys):
+        raise asyncio.TimeoutError()
+
+
+def test_redis_outage_falls_back_to_worker_marks():
+    writers = RedisRecentWriters(DownRedis(), window=5)
+
+    asyncio.run(writers.mark(1))
+    # запись и чтение в одном воркере по-прежнему видят отметку
+    assert asyncio.run(writers.is_recent(1))
+    assert not asyncio.run(writers.is_recent(2))
+    assert writers.failures == 3
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from models import schemas
+from models.schemas import (
+    CLOSING_HOUR, MAX_BATCH_SLOTS, MAX_RECURRENCE_DAYS, OPENING_HOUR,
+    BatchMode, BookingBatchCreate, RecurrenceRule, SlotStatus, check_booking_slot,
+)
+from routers import bookings as bookings_router
+
+# понедельник
+MONDAY = date(2030, 1, 14)
+
+
+def rule(**fields) -> RecurrenceRule:
+    return RecurrenceRule(**{"start_date": MONDAY, "until": MONDAY + timedelta(days=13),
+                             "start_hour": 12, "duration": 2, **fields})
+
+
+def test_expand_weekdays_between_bounds():
+    slots = rule().expand()
+    # две рабочие недели, выходные пропущены
+    assert len(slots) == 10
+    assert slots[0].start_time == datetime(2030, 1, 14, 12)
+    assert slots[0].end_time == datetime(2030, 1, 14, 14)
+    assert slots[-1].start_time == datetime(2030, 1, 25, 12)
+    assert all(slot.start_time.weekday() < 5 for slot in slots)
+
+
+def test_until_is_inclusive():
+    slots = rule(until=MONDAY + timedelta(days=7), weekdays={0}).expand()
+    assert [slot.start_time.date() for slot in slots] == [MONDAY, MONDAY + timedelta(days=7)]
+    assert rule(until=MONDAY, weekdays={1}).expand() == []
+
+
+def test_period_bounds():
+    with pytest.raises(HTTPException) as error:
+        rule(until=MONDAY - timedelta(days=1))
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        rule(until=MONDAY + timedelta(days=MAX_RECURRENCE_DAYS))
+    assert error.value.status_code == 400
+    rule(until=MONDAY + timedelta(days=MAX_RECURRENCE_DAYS - 1))
+
+
+def test_expand_stops_after_max_slots():
+    daily = rule(until=MONDAY + timedelta(days=MAX_RECURRENCE_DAYS - 1), weekdays=set(range(7)))
+    # на один слот больше предела, чтобы маршрут мог ответить 400
+    assert len(daily.expand()) == MAX_BATCH_SLOTS + 1
+
+
+@pytest.mark.parametrize("fields", [
+    {"start_hour": OPENING_HOUR - 1},
+    {"start_hour": CLOSING_HOUR},
+    {"duration": 0},
+    {"duration": 5},
+    {"weekdays": set()},
+    {"weekdays": {7}},
+])
+def test_invalid_rule_fields(fields):
+    with pytest.raises(ValidationError):
+        rule(**fields)
+
+
+def test_occurrences_ending_after_hours_are_rejected():
+    slots = rule(start_hour=CLOSING_HOUR - 2, duration=4).expand()
+    assert slots
+    for slot in slots:
+        with pytest.raises(HTTPException) as error:
+            check_booking_slot(slot.start_time, slot.end_time)
+        assert error.value.status_code == 400
+
+
+def booked(slot, booking_id: int) -> dict:
+    return {"id": booking_id, "user_id": 1, "table_id": 3,
+            "start_time": slot.start_time, "end_time": slot.end_time}
+
+
+def create_batch(monkeypatch, batch: BookingBatchCreate, available):
+    """Calls the batch route with crud.book_batch booking only the slots `available` accepts"""
+    calls = []
+
+    async def book_batch(db, table_type, slots, user_id, all_or_nothing):
+        calls.append((len(slots), all_or_nothing))
+        return [booked(slot, i) if available(slot) else None for i, slot in enumerate(slots, start=1)]
+
+    monkeypatch.setattr(bookings_router.crud, "book_batch", book_batch)
+    user = SimpleNamespace(id=1)
+    return asyncio.run(bookings_router.create_booking_batch(user, batch, db=None)), calls
+
+
+def test_partial_batch_reports_every_slot(monkeypatch):
+    batch = BookingBatchCreate(
+        table_type=schemas.TableType.two_guest_table,
+        slots=[{"start_time": datetime(2030, 1, 14, 20), "end_time": datetime(2030, 1, 14, 23)}],
+        recurrence=rule(until=MONDAY + timedelta(days=2)),
+        mode=BatchMode.partial,
+    )
+    result, calls = create_batch(monkeypatch, batch, lambda slot: slot.start_time.day != 15)
+
+    assert calls == [(3, False)]
+    assert [r.status for r in result.results] == [
+        SlotStatus.invalid, SlotStatus.booked, SlotStatus.unavailable, SlotStatus.booked,
+    ]
+    assert (result.booked, result.failed) == (2, 2)
+    assert result.results[1].booking.table_id == 3
+
+
+def test_all_or_nothing_batch_is_rejected_as_a_whole(monkeypatch):
+    batch = BookingBatchCreate(table_type=schemas.TableType.two_guest_table, recurrence=rule(until=MONDAY + timedelta(days=2)))
+    with pytest.raises(HTTPException) as error:
+        create_batch(monkeypatch, batch, lambda slot: slot.start_time.day != 15)
+    assert error.value.status_code == 409
+    assert {r["status"] for r in error.value.detail} == {"unavailable"}
+
+
+def test_too_many_occurrences_is_bad_request(monkeypatch):
+    daily = rule(until=MONDAY + timedelta(days=MAX_RECURRENCE_DAYS - 1), weekdays=set(range(7)))
+    batch = BookingBatchCreate(table_type=schemas.TableType.two_guest_table, recurrence=daily)
+    with pytest.raises(HTTPException) as error:
+        create_batch(monkeypatch, batch, lambda slot: True)
+    assert error.value.status_code == 400
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from cache.responses import CachedResponse, MemoryBackend, RedisBackend, ResponseCache
+
+KEY = "tables:list"
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request, fake_redis) -> ResponseCache:
+    if request.param == "memory":
+        backend = MemoryBackend(max_size=16, ttl=60)
+    else:
+        backend = RedisBackend(fake_redis)
+    return ResponseCache(backend, ttl=60)
+
+
+def http_request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_miss_then_hit(cache):
+    assert run(cache.get(KEY)) is None
+    generation = run(cache.generation(KEY))
+    filled = run(cache.fill(KEY, b'[{"id": 1}]', generation))
+
+    cached = run(cache.get(KEY))
+    assert cached == filled
+    assert cached.body == b'[{"id": 1}]'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_etag_and_not_modified(cache):
+    cached = run(cache.fill(KEY, b"[]", run(cache.generation(KEY))))
+    assert cached.etag.startswith('"') and cached.etag.endswith('"')
+
+    fresh = cached.to_response(http_request())
+    assert fresh.status_code == 200
+    assert fresh.body == b"[]"
+    assert fresh.headers["etag"] == cached.etag
+    assert fresh.headers["cache-control"] == "no-cache"
+
+    for header in (cached.etag, f"W/{cached.etag}", f'"other", {cached.etag}', "*"):
+        revalidated = cached.to_response(http_request(header))
+        assert revalidated.status_code == 304
+        assert revalidated.body == b""
+        assert revalidated.headers["etag"] == cached.etag
+
+    assert cached.to_response(http_request('"other"')).status_code == 200
+    # другое тело - другой ETag
+    assert CachedResponse.build(b"[1]").etag != cached.etag
+
+
+def test_invalidate_bumps_generation(cache):
+    generation = run(cache.generation(KEY))
+    run(cache.fill(KEY, b"[]", generation))
+
+    run(cache.invalidate(KEY))
+    assert run(cache.get(KEY)) is None
+    assert run(cache.generation(KEY)) != generation
+    assert cache.invalidations == 1
+
+    run(cache.fill(KEY, b"[1]", run(cache.generation(KEY))))
+    assert run(cache.get(KEY)).body == b"[1]"
+
+
+def test_fill_with_old_generation_is_dropped(cache):
+    # промах прочитал данные до записи, а заполняет кэш уже после её сброса
+    stale_generation = run(cache.generation(KEY))
+    run(cache.invalidate(KEY))
+
+    returned = run(cache.fill(KEY, b"stale", stale_generation))
+    assert returned.body == b"stale"
+    assert run(cache.get(KEY)) is None
+
+
+def test_other_keys_keep_their_generation(cache):
+    generation = run(cache.generation("other"))
+    run(cache.invalidate(KEY))
+    run(cache.fill("other", b"[]", generation))
+    assert run(cache.get("other")).body == b"[]"
+
+
+def test_memory_drop_all_invalidates_every_key():
+    backend = MemoryBackend(max_size=16, ttl=60)
+    cache = ResponseCache(backend, ttl=60)
+    generations = {key: run(cache.generation(key)) for key in (KEY, "other")}
+    run(cache.fill("other", b"[]", generations["other"]))
+
+    # None приходит от pg_listener после переподключения
+    backend.drop(None)
+    assert run(cache.get("other")) is None
+    for key, generation in generations.items():
+        run(cache.fill(key, b"stale", generation))
+        assert run(cache.get(key)) is None
+
+
+def test_redis_backend_keeps_generation_next_to_body(fake_redis):
+    cache = ResponseCache(RedisBackend(fake_redis, prefix="response:"), ttl=60)
+    run(cache.fill(KEY, b"[]", run(cache.generation(KEY))))
+    run(cache.invalidate(KEY))
+    assert fake_redis.data == {"response:tables:list:gen": b"1"}
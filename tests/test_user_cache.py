@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from auth import cache as auth_cache
+from auth.cache import evict_user
+from cache import lru
+from cache.lru import TTLCache
+from models.crud import USER_CHANNEL
+from workers.listener import PgListener
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(lru, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("alice", 1)
+    clock.now += 59
+    assert cache.get("alice") == 1
+    clock.now += 1
+    assert cache.get("alice") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_set_refreshes_ttl(clock):
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("alice", 1)
+    clock.now += 50
+    cache.set("alice", 2)
+    clock.now += 50
+    assert cache.get("alice") == 2
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("alice", 1)
+    cache.set("bob", 2)
+    # чтение делает alice самой свежей, вытесняется bob
+    assert cache.get("alice") == 1
+    cache.set("carol", 3)
+
+    assert cache.get("bob") is None
+    assert cache.get("alice") == 1 and cache.get("carol") == 3
+    assert cache.evictions == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_zero_size_disables_cache(clock):
+    cache = TTLCache(max_size=0, ttl=60)
+    cache.set("alice", 1)
+    assert cache.get("alice") is None
+
+
+def test_user_change_notification_evicts_one_user(monkeypatch):
+    cache = TTLCache(max_size=10, ttl=60)
+    monkeypatch.setattr(auth_cache, "user_cache", cache)
+    cache.set("alice", SimpleNamespace(disabled=False))
+    cache.set("bob", SimpleNamespace(disabled=False))
+    listener = PgListener()
+    listener.subscribe(USER_CHANNEL, evict_user)
+
+    # уведомление, отправленное crud из другого воркера: payload - имя изменённого пользователя
+    listener._dispatch(None, 1, USER_CHANNEL, "alice")
+    assert cache.get("alice") is None
+    assert cache.get("bob") is not None
+
+
+def test_listener_reconnect_clears_every_user(monkeypatch):
+    cache = TTLCache(max_size=10, ttl=60)
+    monkeypatch.setattr(auth_cache, "user_cache", cache)
+    cache.set("alice", SimpleNamespace(disabled=False))
+    cache.set("bob", SimpleNamespace(disabled=False))
+
+    evict_user(None)
+    assert len(cache) == 0
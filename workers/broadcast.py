@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+
+from fastapi import HTTPException, status
+
+from config import settings
+from models import crud
+from monitoring.prometheus import request_metrics
+from .listener import pg_listener
+
+# Сообщение, после которого клиент должен заново запросить GET /bookings/availability и GET /tables/
+RESYNC = '[{"op":"resync"}]'
+
+
+class Subscriber:
+    """
+        One live updates connection: payloads waiting to be sent and the event
+        that wakes its sender. Idle connections cost just this object.
+    """
+    __slots__ = ("pending", "wakeup", "overflowed")
+
+    def __init__(self):
+        self.pending: deque[str] = deque()
+        self.wakeup = asyncio.Event()
+        # клиент пропустил сообщения и должен начать с resync; новый клиент начинает с него сразу
+        self.overflowed = True
+        self.wakeup.set()
+
+    async def receive(self, timeout: float) -> list[str]:
+        """
+            Payloads to send, oldest first, after waiting up to `timeout` seconds
+            for at least one. An empty list means the wait timed out.
+        """
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+        if self.overflowed:
+            self.overflowed = False
+            self.pending.clear()
+            return [RESYNC]
+        messages = list(self.pending)
+        self.pending.clear()
+        return messages
+
+
+class AvailabilityBroadcaster:
+    """
+        Fans the `availability` notifications out to the SSE and WebSocket
+        connections of this worker. Every worker listens on the channel itself,
+        so a booking written through any worker reaches all connections.
+
+        Backpressure is per connection: a client that does not read fast enough
+        keeps at most `max_pending` payloads queued, beyond that they are dropped
+        and the client gets a resync message instead. A lost listener connection
+        resyncs everybody the same way.
+    """
+
+    def __init__(self, max_subscribers: int, max_pending: int):
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._subscribers: set[Subscriber] = set()
+        self.published = 0
+        self.overflows = 0
+        self.rejected = 0
+
+    def start(self):
+        pg_listener.subscribe(crud.AVAILABILITY_CHANNEL, self.publish)
+
+    def publish(self, payload: str | None):
+        if payload is not None:
+            self.published += 1
+        for subscriber in self._subscribers:
+            if not subscriber.overflowed:
+                if payload is not None and len(subscriber.pending) < self.max_pending:
+                    subscriber.pending.append(payload)
+                else:
+                    if payload is not None:
+                        self.overflows += 1
+                    subscriber.overflowed = True
+                    subscriber.pending.clear()
+            subscriber.wakeup.set()
+
+    def check_capacity(self):
+        if len(self._subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many live update subscribers, please poll instead",
+            )
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "max_pending": self.max_pending,
+            "listening": pg_listener.connected.is_set(),
+            "published": self.published,
+            "overflows": self.overflows,
+            "rejected": self.rejected,
+        }
+
+    def render(self) -> list[str]:
+        return [
+            "# HELP live_updates_subscribers Open live availability connections",
+            "# TYPE live_updates_subscribers gauge",
+            f"live_updates_subscribers {len(self._subscribers)}",
+            "# HELP live_updates_overflows_total Slow clients whose pending updates were dropped for a resync",
+            "# TYPE live_updates_overflows_total counter",
+            f"live_updates_overflows_total {self.overflows}",
+        ]
+
+
+availability_broadcaster = AvailabilityBroadcaster(
+    max_subscribers=settings.live_updates_max_subscribers,
+    max_pending=settings.live_updates_max_pending,
+)
+request_metrics.collectors.append(availability_broadcaster.render)
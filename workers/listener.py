@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PgListener:
+    """
+        One dedicated asyncpg connection per worker process, outside the
+        SQLAlchemy pool, that LISTENs on the subscribed channels and calls the
+        callbacks on the event loop.
+
+        After every (re)connect each callback is called with payload None:
+        notifications sent while the connection was down are lost, so
+        subscribers should treat it as "anything may have changed".
+    """
+
+    def __init__(self, retry_delay: float = 1.0):
+        self.retry_delay = retry_delay
+        self._callbacks: dict[str, list[Callable[[str | None], None]]] = {}
+        self._task: asyncio.Task | None = None
+        self.connected = asyncio.Event()
+
+    def subscribe(self, channel: str, callback: Callable[[str | None], None]):
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def start(self):
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str):
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Listener callback for %s failed", channel)
+
+    async def _run(self):
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(
+                    host=settings.db_host,
+                    port=settings.db_port,
+                    user=settings.db_user,
+                    password=settings.db_pass,
+                    database=settings.db_name,
+                    server_settings={"application_name": "bookings-listener"},
+                )
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                for channel in self._callbacks:
+                    await connection.add_listener(channel, self._dispatch)
+                self.connected.set()
+                for channel in self._callbacks:
+                    self._dispatch(connection, 0, channel, None)
+                await closed.wait()
+                logger.warning("LISTEN connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed, retrying in %.1fs", self.retry_delay)
+            finally:
+                self.connected.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_delay)
+
+
+pg_listener = PgListener()
@@ -0,0 +1,88 @@
+"""
+    Maintenance of the monthly bookings partitions: runs in every worker
+    (whichever gets the advisory lock does the work) or once from cron:
+
+        python -m workers.partitions
+"""
+import asyncio
+import logging
+import time
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.database import SessionLocal
+from models.partitions import list_partitions, maintain_partitions
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintenance:
+    """
+        Background task creating the partitions of the next `months_ahead`
+        months and archiving the ones older than `hot_months`, at startup and
+        every `interval` seconds
+    """
+
+    def __init__(self, interval: float, months_ahead: int, hot_months: int):
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.hot_months = hot_months
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.last_run_ms = 0.0
+        self.last_result: dict | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Bookings partition maintenance failed")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> dict:
+        started = time.perf_counter()
+        async with SessionLocal() as db:
+            result = await maintain_partitions(db, date.today(), self.months_ahead, self.hot_months)
+        self.runs += 1
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        self.last_result = result
+        return result
+
+    async def stats(self, db: AsyncSession) -> dict:
+        partitions = await list_partitions(db)
+        return {
+            "months_ahead": self.months_ahead,
+            "hot_months": self.hot_months,
+            "runs": self.runs,
+            "last_run_ms": round(self.last_run_ms, 2),
+            "last_result": self.last_result,
+            "partitions": partitions,
+        }
+
+
+partition_maintenance = PartitionMaintenance(
+    interval=settings.partition_maintenance_interval_seconds,
+    months_ahead=settings.bookings_partition_months_ahead,
+    hot_months=settings.bookings_hot_months,
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(partition_maintenance.run_once()))
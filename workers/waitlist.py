@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from datetime import date
+
+from config import settings
+from models import crud
+from models.database import SessionLocal
+from .listener import pg_listener
+
+logger = logging.getLogger(__name__)
+
+
+class WaitlistWorker:
+    """
+        Background task assigning tables to waitlist entries.
+
+        It wakes up on `capacity_freed` notifications (a booking of that day
+        was deleted, tables were added, someone joined the queue) and only
+        looks at entries of the affected days; every `sweep_interval` seconds
+        and after a listener reconnect it expires stale entries and goes over
+        the whole queue. `waitlist_assigned` notifications from whichever worker
+        did the assignment wake the WebSocket subscribers of this process.
+    """
+
+    def __init__(self, batch_size: int, sweep_interval: float):
+        self.batch_size = batch_size
+        self.sweep_interval = sweep_interval
+        self._wakeup = asyncio.Event()
+        # None = весь список, иначе только дни, где освободилось место
+        self._days: set[date] | None = None
+        self._subscribers: dict[int, set[asyncio.Event]] = {}
+        self._task: asyncio.Task | None = None
+        self.assigned = 0
+        self.runs = 0
+        self.last_run_ms = 0.0
+
+    def capacity_freed(self, payload: str | None):
+        if not payload:
+            self._days = None
+        elif self._days is not None:
+            self._days.add(date.fromisoformat(payload))
+        self._wakeup.set()
+
+    def entries_assigned(self, payload: str | None):
+        if payload is None:
+            # уведомления могли потеряться - будим всех подписчиков, они перечитают статус
+            events = [event for events in self._subscribers.values() for event in events]
+        else:
+            events = [event for entry_id in payload.split(",") for event in self._subscribers.get(int(entry_id), ())]
+        for event in events:
+            event.set()
+
+    def subscribe(self, entry_id: int) -> asyncio.Event:
+        event = asyncio.Event()
+        self._subscribers.setdefault(entry_id, set()).add(event)
+        return event
+
+    def unsubscribe(self, entry_id: int, event: asyncio.Event):
+        events = self._subscribers.get(entry_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self._subscribers[entry_id]
+
+    def start(self):
+        if self._task is None:
+            pg_listener.subscribe(crud.CAPACITY_CHANNEL, self.capacity_freed)
+            pg_listener.subscribe(crud.WAITLIST_CHANNEL, self.entries_assigned)
+            self._spawn()
+
+    def _spawn(self):
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        # _run не должен завершаться сам: без него лист ожидания обслуживается только уведомлениями
+        if task.cancelled() or task is not self._task:
+            return
+        logger.error("Waitlist worker stopped unexpectedly, restarting", exc_info=task.exception())
+        self._days = None
+        self._spawn()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.sweep_interval)
+            except asyncio.TimeoutError:
+                self._days = None
+            self._wakeup.clear()
+            days, self._days = self._days, set()
+            try:
+                await self.process(days)
+            except Exception:
+                logger.exception("Waitlist assignment failed")
+                self._days = None
+                await asyncio.sleep(1)
+
+    async def process(self, days: set[date] | None):
+        started = time.perf_counter()
+        async with SessionLocal() as db:
+            if days is None:
+                await crud.expire_waitlist(db)
+            for day in [None] if days is None else sorted(days):
+                after_id = 0
+                while True:
+                    created, last_id = await crud.assign_waitlist(db, after_id, self.batch_size, day)
+                    self.assigned += len(created)
+                    if last_id is None:
+                        break
+                    after_id = last_id
+        self.runs += 1
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_size,
+            "sweep_interval_seconds": self.sweep_interval,
+            "listening": pg_listener.connected.is_set(),
+            "runs": self.runs,
+            "assigned": self.assigned,
+            "last_run_ms": round(self.last_run_ms, 2),
+            "subscribers": sum(len(events) for events in self._subscribers.values()),
+        }
+
+
+waitlist_worker = WaitlistWorker(
+    batch_size=settings.waitlist_batch_size,
+    sweep_interval=settings.waitlist_sweep_seconds,
+)